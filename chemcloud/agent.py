@@ -0,0 +1,431 @@
+"""
+Node-local agent that submits and polls ChemCloud tasks on behalf of many processes.
+
+Run one agent per machine:
+
+```sh
+python -m chemcloud.agent  # Listens on ~/.chemcloud/agent.sock
+```
+
+and use an `AgentClient` in each process instead of a `CCClient`. The agent owns the
+only connection pool, access token and `PollScheduler` on the node, so polls of
+every process are merged into one timeline and the server sees one client.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import socket
+from collections.abc import AsyncGenerator
+from contextlib import aclosing
+from functools import partial
+from pathlib import Path
+from typing import Any, Optional, Union, cast
+
+from pydantic import TypeAdapter
+from pydantic_core import to_json
+from qcdata import Inputs, ProgramOutput
+
+from .client import CCClient
+from .config import Settings, settings
+from .exceptions import AgentError
+from .loop import BackgroundLoop
+from .models import FutureOutput
+
+logger = logging.getLogger(__name__)
+
+# Outputs with collected files can be large; messages are single JSON lines.
+_STREAM_LIMIT = 2**28
+_inputs_adapter: TypeAdapter[list[Any]] = TypeAdapter(list[Inputs])
+
+
+def default_socket_path(settings: Settings = settings) -> Path:
+    """Path of the agent's Unix socket for the given settings."""
+    return Path(settings.chemcloud_base_directory) / settings.chemcloud_agent_socket
+
+
+async def _send(writer: asyncio.StreamWriter, message: dict[str, Any]) -> None:
+    writer.write(to_json(message) + b"\n")
+    await writer.drain()
+
+
+class Agent:
+    """
+    Serves ChemCloud to processes on this machine over a Unix socket.
+
+    Messages are JSON objects, one per line. Every request carries an `id` that is
+    echoed in its replies, so one connection may have many requests in flight:
+
+    - `{"op": "submit", "id": 1, "program": "psi4", "inputs": [...], "options": {}}`
+      submits inputs with `CCClient.compute_async(**options)` and replies
+      `{"id": 1, "task_ids": [...]}`. The agent starts collecting the tasks at once.
+    - `{"op": "subscribe", "id": 2, "task_ids": [...]}` replies
+      `{"id": 2, "index": i, "task_id": ..., "output": {...}}` as each task completes
+      (`index` is the position in `task_ids`), then `{"id": 2, "done": true}`.
+      Outputs are delivered to every subscriber waiting when a task completes, or
+      to the first one to subscribe afterwards, and then released by the agent.
+      Outputs nobody subscribes to are released `result_ttl` seconds after the
+      task completes.
+
+    Failed requests are answered with `{"id": ..., "error": "..."}`.
+
+    Parameters:
+        client: The client used to submit and poll tasks.
+        path: Path of the Unix socket. Defaults to `chemcloud_agent_socket` in the
+            ChemCloud base directory.
+        initial_interval: The minimum interval between status checks of a task.
+        result_ttl: Seconds completed outputs are kept for a subscriber. Defaults to
+            `chemcloud_agent_result_ttl`.
+    """
+
+    def __init__(
+        self,
+        client: CCClient,
+        path: Optional[Union[str, Path]] = None,
+        *,
+        initial_interval: float = 1.0,
+        result_ttl: Optional[float] = None,
+    ):
+        self.client = client
+        self.path = Path(path) if path else default_socket_path(client._settings)
+        self.initial_interval = initial_interval
+        self.result_ttl = (
+            client._settings.chemcloud_agent_result_ttl
+            if result_ttl is None
+            else result_ttl
+        )
+        self._results: dict[str, asyncio.Future[ProgramOutput]] = {}
+        self._expiry: dict[str, asyncio.TimerHandle] = {}
+        self._collectors: set[asyncio.Task] = set()
+
+    async def serve_async(self) -> None:
+        """Listen for connections until cancelled."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.path.unlink(missing_ok=True)  # Left behind by an agent that crashed
+        server = await asyncio.start_unix_server(
+            self._handle_connection, sock=self._bind(), limit=_STREAM_LIMIT
+        )
+        logger.info(f"ChemCloud agent listening on {self.path}.")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            for task in self._collectors:
+                task.cancel()
+            for timer in self._expiry.values():
+                timer.cancel()
+            await asyncio.gather(*self._collectors, return_exceptions=True)
+            self.path.unlink(missing_ok=True)
+            await self.client.close_async()
+
+    def _bind(self) -> socket.socket:
+        """
+        Create the socket owner-only from the start; other users must never be able
+        to connect and use our credentials.
+        """
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        umask = os.umask(0o177)
+        try:
+            sock.bind(str(self.path))
+        except BaseException:
+            sock.close()
+            raise
+        finally:
+            os.umask(umask)
+        return sock
+
+    async def _handle_connection(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        requests: set[asyncio.Task] = set()
+        try:
+            while line := await reader.readline():
+                task = asyncio.create_task(self._handle_request(line, writer))
+                requests.add(task)
+                task.add_done_callback(requests.discard)
+        finally:
+            # The process disconnected; its subscriptions are no longer needed.
+            for task in requests:
+                task.cancel()
+            await asyncio.gather(*requests, return_exceptions=True)
+            writer.close()
+
+    async def _handle_request(self, line: bytes, writer: asyncio.StreamWriter) -> None:
+        request_id = None
+        try:
+            request = json.loads(line)
+            request_id = request.get("id")
+            if request["op"] == "submit":
+                task_ids = await self._submit(
+                    request["program"], request["inputs"], request.get("options", {})
+                )
+                await _send(writer, {"id": request_id, "task_ids": task_ids})
+            elif request["op"] == "subscribe":
+                await self._subscribe(request_id, request["task_ids"], writer)
+            else:
+                raise ValueError(f"Unknown op {request['op']!r}.")
+        except (ConnectionError, asyncio.CancelledError):
+            raise
+        except Exception as exc:
+            logger.warning(f"Agent request {request_id} failed: {exc!r}")
+            await _send(writer, {"id": request_id, "error": f"{exc!r}"})
+
+    async def _submit(
+        self, program: str, inputs: list[Any], options: dict[str, Any]
+    ) -> list[str]:
+        # Each submission is a client run until it is collected (see `_collect`)
+        self.client._begin_run()
+        try:
+            future = cast(
+                FutureOutput,
+                await self.client.compute_async(
+                    program,
+                    _inputs_adapter.validate_python(inputs),
+                    return_future=True,
+                    **options,
+                ),
+            )
+        except BaseException:
+            await self.client._end_run()
+            raise
+        loop = asyncio.get_running_loop()
+        for task_id in future.task_ids:
+            result = self._results[task_id] = loop.create_future()
+            result.add_done_callback(partial(self._schedule_expiry, task_id))
+        collector = asyncio.create_task(self._collect(future))
+        self._collectors.add(collector)
+        collector.add_done_callback(self._collectors.discard)
+        return future.task_ids
+
+    async def _collect(self, future: FutureOutput) -> None:
+        """
+        Poll a submission through the client's scheduler and publish outputs, then
+        end the submission's client run so local statistics are saved.
+        """
+        try:
+            async for _, task_id, output in future.stream_async(
+                initial_interval=self.initial_interval
+            ):
+                if task_id in self._results:
+                    self._results[task_id].set_result(output)
+        except Exception as exc:
+            for task_id in future.task_ids:
+                result = self._results.get(task_id)
+                if result is not None and not result.done():
+                    result.set_exception(exc)
+                    result.exception()  # Raised to subscribers; don't log it unread
+        finally:
+            await self.client._end_run()
+
+    def _schedule_expiry(
+        self, task_id: str, result: "asyncio.Future[ProgramOutput]"
+    ) -> None:
+        """Release a completed output if nobody subscribes within `result_ttl`."""
+        if self._results.get(task_id) is result:
+            self._expiry[task_id] = asyncio.get_running_loop().call_later(
+                self.result_ttl, self._release, task_id
+            )
+
+    def _release(self, task_id: str) -> None:
+        if self._results.pop(task_id, None) is not None:
+            logger.debug(f"Released output of task {task_id}.")
+        timer = self._expiry.pop(task_id, None)
+        if timer is not None:
+            timer.cancel()
+
+    async def _subscribe(
+        self, request_id: Any, task_ids: list[str], writer: asyncio.StreamWriter
+    ) -> None:
+        unknown = [task_id for task_id in task_ids if task_id not in self._results]
+        if unknown:
+            raise KeyError(f"Tasks not submitted through this agent: {unknown}")
+        waiters = [
+            asyncio.ensure_future(self._wait(i, task_id, self._results[task_id]))
+            for i, task_id in enumerate(task_ids)
+        ]
+        try:
+            for completed in asyncio.as_completed(waiters):
+                i, task_id, output = await completed
+                self._release(task_id)
+                await _send(
+                    writer,
+                    {
+                        "id": request_id,
+                        "index": i,
+                        "task_id": task_id,
+                        "output": output,
+                    },
+                )
+        finally:
+            for waiter in waiters:
+                waiter.cancel()
+        await _send(writer, {"id": request_id, "done": True})
+
+    async def _wait(
+        self, index: int, task_id: str, result: "asyncio.Future[ProgramOutput]"
+    ) -> tuple[int, str, ProgramOutput]:
+        # Shielded so one subscriber disconnecting does not cancel the result.
+        return index, task_id, await asyncio.shield(result)
+
+
+class AgentClient:
+    """
+    Submits and collects tasks through a local `Agent` rather than connecting to
+    ChemCloud directly.
+
+    Usage:
+        ```python
+        client = AgentClient()
+        outputs = client.compute("psi4", prog_inputs)
+        ```
+
+    Parameters:
+        path: Path of the agent's Unix socket. Defaults to `chemcloud_agent_socket`
+            in the ChemCloud base directory.
+        settings: An instance of the Settings class. Defaults to the global settings
+            object.
+    """
+
+    def __init__(
+        self,
+        path: Optional[Union[str, Path]] = None,
+        *,
+        settings: Settings = settings,
+    ):
+        self.path = Path(path) if path else default_socket_path(settings)
+        self._loop: Optional[BackgroundLoop] = None
+
+    async def _request(
+        self, message: dict[str, Any]
+    ) -> AsyncGenerator[dict[str, Any], None]:
+        """Send one request on its own connection and yield its replies."""
+        try:
+            reader, writer = await asyncio.open_unix_connection(
+                self.path, limit=_STREAM_LIMIT
+            )
+        except (FileNotFoundError, ConnectionRefusedError) as exc:
+            raise AgentError(
+                f"No ChemCloud agent is listening on {self.path}. Start one with "
+                "`python -m chemcloud.agent`."
+            ) from exc
+        try:
+            await _send(writer, {"id": 0, **message})
+            while line := await reader.readline():
+                reply = json.loads(line)
+                if "error" in reply:
+                    raise AgentError(reply["error"])
+                yield reply
+        finally:
+            writer.close()
+
+    async def submit_async(
+        self, program: str, inputs: list[Any], **options: Any
+    ) -> list[str]:
+        """
+        Submit inputs through the agent and return their task IDs.
+
+        Parameters:
+            program: A program name matching one of the agent's supported programs.
+            inputs: The input objects to compute.
+            **options: JSON-serializable keyword arguments for
+                `CCClient.compute_async` (e.g., `collect_files` or `queue`).
+        """
+        request = {
+            "op": "submit",
+            "program": program,
+            "inputs": inputs,
+            "options": options,
+        }
+        async with aclosing(self._request(request)) as replies:
+            async for reply in replies:
+                return reply["task_ids"]
+        raise AgentError("The agent closed the connection without replying.")
+
+    async def as_completed_async(
+        self, task_ids: list[str]
+    ) -> AsyncGenerator[tuple[int, str, ProgramOutput], None]:
+        """Yield `(index, task_id, output)` for tasks submitted through the agent."""
+        request = {"op": "subscribe", "task_ids": task_ids}
+        async with aclosing(self._request(request)) as replies:
+            async for reply in replies:
+                if reply.get("done"):
+                    return
+                yield (
+                    reply["index"],
+                    reply["task_id"],
+                    ProgramOutput.model_validate(reply["output"]),
+                )
+        raise AgentError("The agent closed the connection before all tasks finished.")
+
+    async def compute_async(
+        self, program: str, inp_obj: Union[Any, list[Any]], **options: Any
+    ) -> Union[ProgramOutput, list[ProgramOutput]]:
+        """
+        Compute inputs through the agent and return their outputs in input order.
+
+        Parameters:
+            program: A program name matching one of the agent's supported programs.
+            inp_obj: A single input object or a list of input objects.
+            **options: JSON-serializable keyword arguments for
+                `CCClient.compute_async` (e.g., `collect_files` or `queue`).
+        """
+        inputs = inp_obj if isinstance(inp_obj, list) else [inp_obj]
+        task_ids = await self.submit_async(program, inputs, **options)
+        outputs: list[Optional[ProgramOutput]] = [None] * len(task_ids)
+        async for i, _, output in self.as_completed_async(task_ids):
+            outputs[i] = output
+        results = cast(list[ProgramOutput], outputs)
+        return results if isinstance(inp_obj, list) else results[0]
+
+    def compute(
+        self, program: str, inp_obj: Union[Any, list[Any]], **options: Any
+    ) -> Union[ProgramOutput, list[ProgramOutput]]:
+        """Sync wrapper for `compute_async`."""
+        return self.run(self.compute_async(program, inp_obj, **options))
+
+    def run(self, coro: Any) -> Any:
+        """Run a coroutine on the client's background event loop."""
+        if self._loop is None:
+            self._loop = BackgroundLoop(name="chemcloud-agent-client")
+        return self._loop.run(coro)
+
+    def close(self) -> None:
+        """Stop the background event loop."""
+        if self._loop is not None:
+            self._loop.stop()
+            self._loop = None
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    """Entry point of `python -m chemcloud.agent`."""
+    parser = argparse.ArgumentParser(
+        prog="python -m chemcloud.agent",
+        description="Submit and poll ChemCloud tasks for every process on this node.",
+    )
+    parser.add_argument("--socket", help="Path of the Unix socket to listen on.")
+    parser.add_argument("--profile", help="ChemCloud credentials profile to use.")
+    parser.add_argument("--queue", help="Default compute queue.")
+    parser.add_argument(
+        "--result-ttl",
+        type=float,
+        help="Seconds to keep outputs that no process has collected.",
+    )
+    parser.add_argument("--log-level", default="INFO")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(
+        level=args.log_level.upper(),
+        format="%(asctime)s %(levelname)s %(name)s: %(message)s",
+    )
+    client = CCClient(profile=args.profile, queue=args.queue)
+    agent = Agent(client, args.socket, result_ttl=args.result_ttl)
+    try:
+        asyncio.run(agent.serve_async())
+    except KeyboardInterrupt:
+        logger.info("ChemCloud agent stopped.")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,21 +1,78 @@
 import asyncio
+import atexit
+import json
 import logging
-from asyncio import Semaphore
-from typing import Any, Coroutine, Optional, Union
+import os
+import threading
+from collections.abc import Callable
+from concurrent.futures import Executor, ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Coroutine, Optional, Union, cast
+from weakref import WeakKeyDictionary, WeakSet
 
-from httpx import AsyncClient
 from qcdata import InputType, ProgramOutput
 from typing_extensions import TypeAlias
 
 from . import __version__
+from .coalescing import Coalescer
 from .config import Settings, settings
+from .deletion import DeletionQueue
+from .encoding import PayloadCache, batch_template, encode_batch
 from .exceptions import UnsupportedProgramError
-from .http_client import _HttpClient
+from .executor import CCExecutor
+from .finite_difference import Scheme, finite_difference_async
+from .http_client import _HttpClient, _without_credentials
+from .loop import BackgroundLoop
 from .models import READY_STATES, FutureOutput, TaskStatus
+from .polling import PollScheduler
+from .retry import RetryPolicy
+from .scheduling import (
+    CostEstimator,
+    HeuristicCostEstimator,
+    RaceStatistics,
+    RuntimeHistory,
+    longest_first,
+)
+from .sweep import AxisValues, PointBuilder, Sweep, SweepResult, run_sweep_async
+from .workflow import StageProgress, Workflow, run_chains_async
 
 logger = logging.getLogger(__name__)
 
+# Clients whose loop- and thread-bound state is reset in the child after os.fork()
+_live_clients: "WeakSet[CCClient]" = WeakSet()
+
+
+def _reset_clients_after_fork() -> None:
+    for client in list(_live_clients):
+        client._after_fork_in_child()
+
+
+if hasattr(os, "register_at_fork"):  # Not available on Windows
+    os.register_at_fork(after_in_child=_reset_clients_after_fork)
+
+
+def _flush_deletions_at_exit() -> None:
+    """Send deletions still queued when the interpreter exits without `close()`."""
+    for client in list(_live_clients):
+        loop = client._loop
+        if loop is None:
+            continue
+        try:
+            loop.run(
+                client._flush_deletions(client._settings.chemcloud_delete_flush_timeout)
+            )
+        except Exception as exc:  # Never fail interpreter shutdown
+            logger.warning(f"Unable to delete queued outputs at exit: {exc!r}")
+
+
+# Run before concurrent.futures shuts down its executors at exit; DNS lookups on
+# the event loop need them, so plain `atexit` hooks run too late to send anything.
+getattr(threading, "_register_atexit", atexit.register)(_flush_deletions_at_exit)
+
+
 QCDataInputsOrList: TypeAlias = Union[InputType, list[InputType]]
+# A program name or a (program, queue) pair
+RaceCandidate: TypeAlias = Union[str, tuple[str, Optional[str]]]
 
 
 class CCClient:
@@ -62,11 +119,117 @@ class CCClient:
         self.queue = queue
         self._settings = settings
         self._openapi_spec: Optional[dict[str, Any]] = None
+        self._runtime_history: Optional[RuntimeHistory] = None
+        self._race_stats: Optional[RaceStatistics] = None
+        self._reset_runtime_state()
+        _live_clients.add(self)
+
+    def _reset_runtime_state(self) -> None:
+        """
+        Create the thread-, loop- and process-bound state of the client. Called on
+        construction, unpickling and in the child after a fork.
+        """
+        # Created lazily, one per event loop the client is used from.
+        self._poll_schedulers: WeakKeyDictionary[
+            asyncio.AbstractEventLoop, PollScheduler
+        ] = WeakKeyDictionary()
+        self._loop: Optional[BackgroundLoop] = None
+        self._loop_lock = threading.Lock()
+        self._active_runs = 0  # Only touched from the background loop
+        self._callback_executor: Optional[Executor] = None
+        # Outputs queued by another process are deleted by that process.
+        self._deletions = DeletionQueue(
+            self,
+            delay=self._settings.chemcloud_delete_delay,
+            max_batch_size=self._settings.chemcloud_delete_batch_size,
+        )
+
+    def __getstate__(self) -> dict[str, Any]:
+        """
+        Pickle only the configuration, cached OpenAPI spec and a token handle (the
+        access and refresh tokens), so workers of a process pool, Dask or Ray reuse
+        the parent's login. Usernames and passwords are not pickled. Connections,
+        the event loop thread and callback pool are rebuilt lazily on first use in
+        the worker.
+        """
+        return {
+            "_http_client": self._http_client,
+            "queue": self.queue,
+            "_settings": _without_credentials(self._settings),
+            "_openapi_spec": self._openapi_spec,
+        }
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        # Reloaded lazily from disk in the worker
+        self._runtime_history = None
+        self._race_stats = None
+        self._reset_runtime_state()
+        _live_clients.add(self)
+
+    def _after_fork_in_child(self) -> None:
+        """
+        Drop state inherited from the parent process. Its event loop thread does
+        not exist in the child and its locks may have been held at fork time.
+        """
+        self._reset_runtime_state()
+        self._http_client._reset_runtime_state()
 
     @property
     def profile(self) -> str:
         return self._http_client._profile
 
+    @property
+    def runtime_history(self) -> RuntimeHistory:
+        """Locally recorded wall times of completed calculations."""
+        if self._runtime_history is None:
+            path = (
+                self._settings.chemcloud_base_directory
+                / self._settings.chemcloud_runtime_history_file
+                if self._settings.chemcloud_record_runtimes
+                else None
+            )
+            self._runtime_history = RuntimeHistory(path)
+        return self._runtime_history
+
+    @property
+    def race_stats(self) -> RaceStatistics:
+        """Locally recorded winners of `race()` calls."""
+        if self._race_stats is None:
+            path = (
+                self._settings.chemcloud_base_directory
+                / self._settings.chemcloud_race_stats_file
+                if self._settings.chemcloud_record_runtimes
+                else None
+            )
+            self._race_stats = RaceStatistics(path)
+        return self._race_stats
+
+    @property
+    def poll_scheduler(self) -> PollScheduler:
+        """
+        Scheduler that polls the tasks of all FutureOutputs using this client from
+        the running event loop.
+        """
+        loop = asyncio.get_running_loop()
+        scheduler = self._poll_schedulers.get(loop)
+        if scheduler is None:
+            scheduler = self._poll_schedulers[loop] = PollScheduler(
+                max_polls_per_second=self._settings.chemcloud_max_polls_per_second,
+                jitter=self._settings.chemcloud_poll_jitter,
+            )
+        return scheduler
+
+    @property
+    def callback_executor(self) -> Executor:
+        """Default thread pool that runs FutureOutput completion callbacks."""
+        if self._callback_executor is None:
+            self._callback_executor = ThreadPoolExecutor(
+                max_workers=self._settings.chemcloud_callback_workers,
+                thread_name_prefix="chemcloud-callback",
+            )
+        return self._callback_executor
+
     @property
     def version(self) -> str:
         """Returns chemcloud client version"""
@@ -84,6 +247,8 @@ class CCClient:
         propagate_wfn: bool = False,
         queue: Optional[str] = None,
         return_future: bool = False,
+        order_by_cost: Union[bool, CostEstimator] = False,
+        retry: Optional[RetryPolicy] = None,
     ) -> Union[ProgramOutput, list[ProgramOutput], FutureOutput]:
         """Asynchronously submit a computation to ChemCloud.
 
@@ -108,6 +273,14 @@ class CCClient:
                 from settings.
             return_future: If True, return a FutureOutput object. If False, block and
                 return the ProgramOutput object(s) directly.
+            order_by_cost: Submit the most expensive inputs first to reduce the
+                makespan of batches with mixed sizes. If True, costs are estimated from
+                atom count, basis, calctype, program and locally recorded runtimes.
+                A callable `(program, inp) -> float` may be passed to customize the
+                estimate. Outputs are always returned in the original input order.
+            retry: A RetryPolicy used to resubmit failed tasks (e.g., SCF convergence
+                failures or lost workers). Outputs of resubmitted tasks replace the
+                failed outputs at their original indices.
 
         Returns:
             Object providing access to a computation's eventual result. You can check a
@@ -140,15 +313,21 @@ class CCClient:
         # Normalize inputs to a list.
         inp_list = [inp_obj] if not isinstance(inp_obj, list) else inp_obj
 
-        # Create a list of coroutines to submit compute requests.
-        coroutines = [
-            self._http_client._authenticated_request_async(
-                "post", "/compute", data=inp, params=url_params
+        if order_by_cost and len(inp_list) > 1:
+            estimator = (
+                HeuristicCostEstimator(self.runtime_history)
+                if order_by_cost is True
+                else order_by_cost
+            )
+            order = longest_first(program, inp_list, estimator)
+            ordered_ids = await self._submit_async(
+                [inp_list[i] for i in order], url_params
             )
-            for inp in inp_list
-        ]
-        # Use asyncio.gather to run them concurrently.
-        task_ids = await asyncio.gather(*coroutines)
+            task_ids = [""] * len(inp_list)
+            for i, task_id in zip(order, ordered_ids):
+                task_ids[i] = task_id
+        else:
+            task_ids = await self._submit_async(inp_list, url_params)
 
         future = FutureOutput(
             task_ids=task_ids,
@@ -156,17 +335,401 @@ class CCClient:
             program=program,
             client=self,
             return_single_output=not isinstance(inp_obj, list),
+            submit_params=url_params,
+            retry_policy=retry,
         )
         if return_future:
             return future
         return await future.get_async()
 
+    async def _submit_async(
+        self, inp_list: list[Any], url_params: dict[str, Any]
+    ) -> list[str]:
+        """
+        Submit a list of inputs and return their task IDs in input order.
+
+        Batches whose inputs differ only by geometry are sent as a single template
+        plus packed geometries if the server advertises the batch route.
+        """
+        # Check the (cached) spec first: building a template dumps every input
+        if (
+            self._settings.chemcloud_template_encoding
+            and len(inp_list) > 1
+            and await self._server_supports_async("post", "/compute/batch")
+        ):
+            if len(inp_list) > self._settings.chemcloud_serialization_chunk_size:
+                template = await asyncio.to_thread(batch_template, inp_list)
+            else:
+                template = batch_template(inp_list)
+            if template is not None:
+                logger.info(
+                    f"Submitting {len(inp_list)} inputs as a single template batch."
+                )
+                return await self._http_client._authenticated_request_async(
+                    "post",
+                    "/compute/batch",
+                    data=encode_batch(inp_list, template),
+                    params=url_params,
+                )
+
+        # Serialize each unique input once. Large batches are serialized in chunks
+        # on a worker thread so encoding overlaps requests already in flight.
+        cache = PayloadCache()
+        chunk_size = self._settings.chemcloud_serialization_chunk_size
+        submissions: list[asyncio.Task] = []
+        for start in range(0, len(inp_list), chunk_size):
+            chunk = inp_list[start : start + chunk_size]
+            if len(inp_list) > chunk_size:
+                payloads = await asyncio.to_thread(cache.serialize_many, chunk)
+            else:
+                payloads = cache.serialize_many(chunk)
+            submissions.extend(
+                asyncio.ensure_future(
+                    self._http_client._authenticated_request_async(
+                        "post", "/compute", data=payload, params=url_params
+                    )
+                )
+                for payload in payloads
+            )
+        logger.debug(f"Serialized {len(inp_list)} inputs as {len(cache)} payloads.")
+        # Use asyncio.gather to wait for them concurrently.
+        return list(await asyncio.gather(*submissions))
+
     def compute(
         self, *args, **kwargs
     ) -> Union[ProgramOutput, list[ProgramOutput], FutureOutput]:
         """Synchronous wrapper for compute_async."""
         return self.run(self.compute_async(*args, **kwargs))
 
+    async def race_async(
+        self,
+        candidates: list[RaceCandidate],
+        inp_obj: Any,
+        *,
+        timeout: Optional[float] = None,
+        initial_interval: float = 1.0,
+        skip_after: Optional[int] = None,
+        **kwargs,
+    ) -> ProgramOutput:
+        """
+        Submit the same input to several programs or queues and return the first
+        successful result. Tasks still running on the other candidates are revoked.
+
+        The winner of each race is recorded in `CCClient.race_stats`. Once a
+        candidate has won at least 90% of `skip_after` or more races for similar
+        inputs, the race is skipped and the input is only submitted to that candidate.
+
+        Parameters:
+            candidates: Program names or `(program, queue)` pairs to race.
+            inp_obj: A single input object.
+            timeout: The maximum time to wait for a successful result.
+            initial_interval: The minimum interval between status checks of a task.
+            skip_after: Number of recorded races before a dominant candidate is used
+                alone. Defaults to `chemcloud_race_skip_after`. Pass 0 (or set the
+                setting to None) to always race.
+            **kwargs: Additional keyword arguments passed to `compute_async`.
+
+        Returns:
+            The first successful ProgramOutput. If every candidate fails, the first
+                failed ProgramOutput is returned.
+        """
+        targets = {
+            (c if isinstance(c, str) else "@".join(filter(None, c))): (
+                (c, None) if isinstance(c, str) else c
+            )
+            for c in candidates
+        }
+        key = RaceStatistics.key(list(targets), inp_obj)
+        if skip_after is None:
+            skip_after = self._settings.chemcloud_race_skip_after
+        favorite = (
+            self.race_stats.favorite(key, min_races=skip_after) if skip_after else None
+        )
+        if favorite in targets:
+            logger.info(f"Skipping race; {favorite} reliably wins for this input.")
+            targets = {favorite: targets[favorite]}
+
+        submitted = await asyncio.gather(
+            *(
+                self.compute_async(
+                    program, inp_obj, queue=queue, return_future=True, **kwargs
+                )
+                for program, queue in targets.values()
+            ),
+            return_exceptions=True,
+        )
+        errors = [r for r in submitted if isinstance(r, BaseException)]
+        if errors:
+            # Don't leave the candidates that were submitted running on the server
+            await asyncio.gather(
+                *(r.cancel_async() for r in submitted if isinstance(r, FutureOutput)),
+                return_exceptions=True,
+            )
+            raise errors[0]
+        futures = cast(list[FutureOutput], submitted)
+        waiters = {
+            asyncio.ensure_future(
+                future.first_success_async(timeout, initial_interval)
+            ): label
+            for label, future in zip(targets, futures)
+        }
+        winner: Optional[str] = None
+        result: Optional[ProgramOutput] = None
+        pending = set(waiters)
+        try:
+            while pending and winner is None:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for waiter in done:
+                    output = waiter.result()
+                    if winner is None and output.success:
+                        winner, result = waiters[waiter], output
+                    elif result is None:
+                        result = output
+        finally:
+            for waiter in pending:
+                waiter.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+            # Revoke the losers
+            await asyncio.gather(*(future.cancel_async() for future in futures))
+
+        if winner is not None and len(targets) > 1:
+            logger.info(f"{winner} won the race.")
+            self.race_stats.record(key, winner)
+        assert result is not None, "At least one candidate should be complete."
+        return result
+
+    def race(self, *args, **kwargs) -> ProgramOutput:
+        """Sync wrapper for `race_async`."""
+        return self.run(self.race_async(*args, **kwargs))
+
+    async def run_workflow_async(
+        self,
+        workflow: Workflow,
+        inputs: list[Any],
+        *,
+        checkpoint_dir: Optional[Union[str, Path]] = None,
+        initial_interval: float = 1.0,
+        on_progress: Optional[Callable[[dict[str, StageProgress]], None]] = None,
+    ) -> list[dict[str, ProgramOutput]]:
+        """
+        Run a Workflow of dependent computations for each input.
+
+        Each molecule flows through the workflow independently: a downstream task is
+        submitted the moment its own upstream task completes successfully.
+
+        Parameters:
+            workflow: The Workflow to run.
+            inputs: Inputs for the root stage(s) of the workflow, one per molecule.
+            checkpoint_dir: If set, every submitted task is saved with
+                `FutureOutput.save` to `<checkpoint_dir>/<stage>-<index>.json`. Tasks
+                with a checkpoint are resumed instead of resubmitted when the workflow
+                is run again.
+            initial_interval: The minimum interval between status checks of a task.
+            on_progress: Called with the StageProgress of every stage each time a
+                task is submitted or completes.
+
+        Returns:
+            One dictionary per input mapping stage names to ProgramOutputs. Stages
+                skipped because an upstream task failed are absent.
+        """
+        return await workflow.run_async(
+            self,
+            inputs,
+            checkpoint_dir=checkpoint_dir,
+            initial_interval=initial_interval,
+            on_progress=on_progress,
+        )
+
+    def run_workflow(self, *args, **kwargs) -> list[dict[str, ProgramOutput]]:
+        """Sync wrapper for `run_workflow_async`."""
+        return self.run(self.run_workflow_async(*args, **kwargs))
+
+    async def compute_chains_async(
+        self,
+        program: str,
+        chains: list[list[InputType]],
+        *,
+        guess_keyword: str = "guess",
+        initial_interval: float = 1.0,
+        **kwargs,
+    ) -> list[list[ProgramOutput]]:
+        """
+        Compute chains of correlated inputs (e.g., scan points or trajectory frames),
+        seeding each input with the wavefunction of the previous input in its chain.
+
+        Every task is submitted with `collect_wfn=True`. As soon as input i of a chain
+        completes, its wavefunction files are added to input i+1 as `files` and named
+        by `keywords[guess_keyword]` (see `chemcloud.workflow.seed_wavefunction`), so
+        neighbors start from a converged guess and need fewer SCF iterations. Chains
+        run in parallel with each other. Use `chemcloud.workflow.split_into_chains`
+        to split one long trajectory into several chains.
+
+        Parameters:
+            program: A program name matching one of the self.supported_programs.
+            chains: Lists of inputs ordered so that neighbors are similar.
+            guess_keyword: The program keyword that names the guess file(s).
+            initial_interval: The minimum interval between status checks of a task.
+            **kwargs: Additional keyword arguments passed to `compute_async`.
+
+        Returns:
+            ProgramOutputs in the same shape as `chains`. If an input fails, the next
+                input in its chain runs without a wavefunction guess.
+        """
+        return await run_chains_async(
+            self,
+            program,
+            chains,
+            guess_keyword=guess_keyword,
+            initial_interval=initial_interval,
+            **kwargs,
+        )
+
+    def compute_chains(self, *args, **kwargs) -> list[list[ProgramOutput]]:
+        """Sync wrapper for `compute_chains_async`."""
+        return self.run(self.compute_chains_async(*args, **kwargs))
+
+    async def finite_difference_async(
+        self,
+        program: str,
+        inp: InputType,
+        *,
+        step: float = 0.005,
+        scheme: Scheme = "central",
+        translational: bool = True,
+        initial_interval: float = 1.0,
+        **kwargs,
+    ) -> ProgramOutput:
+        """
+        Compute a gradient or hessian with client-side finite differences.
+
+        Works with any program: displaced geometries are generated locally and
+        submitted as one batch of energy (for a gradient) or gradient (for a hessian)
+        calculations. Results are collected as they complete and the derivative is
+        assembled with vectorized finite-difference formulas. If any displacement
+        fails, the remaining tasks are revoked.
+
+        Parameters:
+            program: A program name matching one of the self.supported_programs.
+            inp: A ProgramInput with calctype "gradient" or "hessian".
+            step: Displacement size in bohr.
+            scheme: "central" (2 tasks per coordinate, error O(step^2)) or
+                "forward" (1 task per coordinate plus the reference, error O(step)).
+            translational: Use translational invariance to skip displacing the last
+                atom, saving 6 (central) or 3 (forward) tasks. Disable for
+                calculations in an external field.
+            initial_interval: The minimum interval between status checks of a task.
+            **kwargs: Additional keyword arguments passed to `compute_async`.
+
+        Returns:
+            A ProgramOutput with the gradient (and, for "forward", the energy) or the
+                hessian (and the reference gradient) in `.data`.
+        """
+        return await finite_difference_async(
+            self,
+            program,
+            inp,
+            step=step,
+            scheme=scheme,
+            translational=translational,
+            initial_interval=initial_interval,
+            **kwargs,
+        )
+
+    def finite_difference(self, *args, **kwargs) -> ProgramOutput:
+        """Sync wrapper for `finite_difference_async`."""
+        return self.run(self.finite_difference_async(*args, **kwargs))
+
+    async def sweep_async(
+        self,
+        program: str,
+        template: InputType,
+        axes: dict[str, AxisValues],
+        *,
+        build: Optional[PointBuilder] = None,
+        window: Optional[int] = None,
+        initial_interval: float = 1.0,
+        **kwargs,
+    ) -> SweepResult:
+        """
+        Compute every point of a parameter grid (e.g., structures x methods x basis
+        sets x keyword variants).
+
+        The grid is expanded lazily: inputs are built and submitted only as the
+        number of points in flight drops below `window`, so the full list of inputs
+        is never held in memory. Grid points with identical inputs are computed once.
+
+        Usage:
+            ```python
+            result = client.sweep(
+                "psi4",
+                prog_input,
+                {
+                    "structure": {"water": water, "ammonia": ammonia},
+                    "method": ["hf", "b3lyp"],
+                    "basis": ["6-31g", "cc-pvdz"],
+                },
+            )
+            result.sel(structure="water", method="b3lyp", basis="6-31g")
+            result[0, 1, 0]  # Same output, indexed by position
+            ```
+
+        Parameters:
+            program: A program name matching one of the self.supported_programs.
+            template: The input every grid point is derived from.
+            axes: Maps axis names to values, given as a list or as a dict of
+                labels to values. `structure`, `method`, `basis` and `keywords` (dicts
+                merged into the template's keywords) are applied by default.
+            build: Called as `build(template, **point)` to build the input of a grid
+                point. Required for axes other than the default ones.
+            window: Maximum number of grid points in flight. Defaults to
+                `chemcloud_sweep_window`.
+            initial_interval: The minimum interval between status checks of a task.
+            **kwargs: Additional keyword arguments passed to `compute_async`.
+
+        Returns:
+            A SweepResult holding the ProgramOutputs on the grid.
+        """
+        return await run_sweep_async(
+            self,
+            program,
+            Sweep(template, axes, build),
+            window=window or self._settings.chemcloud_sweep_window,
+            initial_interval=initial_interval,
+            **kwargs,
+        )
+
+    def sweep(self, *args, **kwargs) -> SweepResult:
+        """Sync wrapper for `sweep_async`."""
+        return self.run(self.sweep_async(*args, **kwargs))
+
+    def executor(self, **kwargs) -> CCExecutor:
+        """
+        Return a `concurrent.futures.Executor` that computes inputs on ChemCloud.
+
+        `executor.submit(program, inp)` returns a standard Future per task, so
+        ChemCloud can be plugged into code written for thread or process pools.
+
+        Parameters:
+            **kwargs: Keyword arguments passed to `CCExecutor`.
+        """
+        return CCExecutor(self, **kwargs)
+
+    def coalescer(self, **kwargs) -> Coalescer:
+        """
+        Return a `Coalescer` that batches concurrent single-input submissions.
+
+        Inputs passed to `coalescer.compute_async(program, inp)` within
+        `chemcloud_coalesce_window` seconds are submitted with one `compute_async`
+        call and polled as a group; each caller awaits only its own output. Useful
+        when many coroutines (e.g., web request handlers) each compute one input.
+
+        Parameters:
+            **kwargs: Keyword arguments passed to `Coalescer`.
+        """
+        return Coalescer(self, **kwargs)
+
     async def fetch_output_async(
         self, task_id: str, delete: bool = True
     ) -> tuple[TaskStatus, Optional[ProgramOutput]]:
@@ -188,8 +751,8 @@ class CCClient:
         if output is not None:
             output = ProgramOutput(**output)
         if status in READY_STATES and delete:
-            # Fire-and-forget the deletion task
-            asyncio.create_task(self.delete_output_async(task_id))
+            # Deleted in the background, batched with other ready tasks
+            self._deletions.add(task_id)
         return status, output
 
     def fetch_output(
@@ -215,52 +778,132 @@ class CCClient:
         """Sync wrapper for `delete_output_async`."""
         return self.run(self.delete_output_async(task_id))
 
-    async def _run_helper(self, coro: Coroutine[Any, Any, Any]) -> Any:
+    async def revoke_async(self, task_ids: list[str]) -> list[str]:
         """
-        Internal helper that enables running async methods synchronously.
+        Revoke submitted tasks on the ChemCloud server.
 
-        We need this method in addition .run() because the semaphore must be created
-        within an async context in order to be bound to the current event loop. We add
-        the AsyncClient swap here for convenience (it could be in .run() be valid).
-        """
-        # Save the original client, semaphore, and lock.
-        original_client = self._http_client.async_client
-        original_semaphore = self._http_client.semaphore
-        original_lock = self._http_client._token_refresh_lock
+        All tasks are revoked with a single request. If the server does not advertise
+        `POST /compute/revoke`, a warning is logged and the tasks keep running on the
+        server.
 
-        # Create and set the new client, semaphore and lock
-        self._http_client._async_client = AsyncClient(
-            timeout=self._http_client.async_client.timeout,
+        Parameters:
+            task_ids: The IDs of the tasks to revoke.
+
+        Returns:
+            The IDs the server accepted for revocation; empty if it cannot revoke.
+        """
+        if not task_ids:
+            return []
+        if not await self._server_supports_async("post", "/compute/revoke"):
+            logger.warning(
+                "ChemCloud server does not support revoking tasks. "
+                f"{len(task_ids)} task(s) will keep running on the server."
+            )
+            return []
+        logger.info(f"Revoking {len(task_ids)} task(s).")
+        await self._http_client._authenticated_request_async(
+            "post", "/compute/revoke", data=json.dumps(task_ids).encode("utf-8")
         )
-        self._http_client._semaphore = Semaphore(self._settings.chemcloud_concurrency)
-        self._http_client._token_refresh_lock = asyncio.Lock()
+        return task_ids
+
+    def revoke(self, task_ids: list[str]) -> list[str]:
+        """Sync wrapper for `revoke_async`."""
+        return self.run(self.revoke_async(task_ids))
+
+    async def _run_helper(self, coro: Coroutine[Any, Any, Any]) -> Any:
+        """
+        Await a coroutine submitted by `.run()` and persist local statistics.
 
+        When the last concurrent run finishes, the deletion worker and token
+        refresher are stopped so no requests are sent between calls; queued IDs are
+        sent on the next call, by `close()` or at interpreter exit.
+        """
+        self._begin_run()
         try:
             return await coro
         finally:
-            # Wait for any pending background tasks (excluding the current one)
-            # Ensures delete tasks are completed before closing the client.
-            pending = [
-                task
-                for task in asyncio.all_tasks()
-                if task is not asyncio.current_task()
-            ]
-            if pending:
-                await asyncio.gather(*pending, return_exceptions=True)
-
-            # Restore original client and semaphore.
-            await self._http_client._async_client.aclose()
-            self._http_client._async_client = original_client
-            self._http_client._semaphore = original_semaphore
-            self._http_client._token_refresh_lock = original_lock
+            await self._end_run()
+
+    def _begin_run(self) -> None:
+        """Mark a run (or a long-lived user such as a CCExecutor) as active."""
+        self._active_runs += 1
+
+    async def _end_run(self) -> None:
+        """End a run started with `_begin_run` and persist local statistics."""
+        self._active_runs -= 1
+        if not self._active_runs:
+            await self._pause_background_work()
+        for store in (self._runtime_history, self._race_stats):
+            if store is not None:
+                await asyncio.to_thread(store.save)
+
+    async def _pause_background_work(self) -> None:
+        """Stop the deletion worker and token refresher of the running loop."""
+        await self._deletions.stop()
+        await self._http_client.stop_token_refresher()
+
+    async def _flush_deletions(self, timeout: Optional[float] = None) -> None:
+        """Send queued deletions now, waiting at most `timeout` seconds."""
+        await self._deletions.flush(timeout)
+
+    @property
+    def _background_loop(self) -> BackgroundLoop:
+        """Event loop thread shared by all synchronous calls, created lazily."""
+        with self._loop_lock:
+            if self._loop is None:
+                self._loop = BackgroundLoop()
+            return self._loop
+
+    async def close_async(self) -> None:
+        """
+        Delete any queued outputs from the server, close the connections of the
+        running event loop and wait for completion callbacks to finish.
+        """
+        await self._deletions.flush()
+        await self._http_client.aclose()
+        if self._callback_executor is not None:
+            await asyncio.to_thread(self._callback_executor.shutdown)
+            self._callback_executor = None
+
+    def close(self) -> None:
+        """
+        Delete any queued outputs from the server, close all connections, wait for
+        completion callbacks to finish and stop the background event loop.
+        """
+        with self._loop_lock:
+            loop, self._loop = self._loop, None
+        if loop is not None:
+            loop.run(self._run_helper(self.close_async()))
+            loop.stop()
+        if self._callback_executor is not None:
+            self._callback_executor.shutdown(wait=True)
+            self._callback_executor = None
 
     def run(self, coro: Coroutine[Any, Any, Any]) -> Any:
         """
-        Synchronous runner for async methods. Akin to asyncio.run() but centralized
-        on CCClient since we have to modify the ._http_client._async_client and
-        semaphore.
+        Synchronous runner for async methods.
+
+        Coroutines from every thread run on one event loop in a background thread, so
+        threads sharing a client share its connection pool, concurrency limit, token
+        and poll scheduler. Safe to call from many threads at once.
         """
-        return asyncio.run(self._run_helper(coro))
+        loop = self._background_loop
+        if loop.is_current:
+            coro.close()  # loop.run() raises below; don't leave `coro` unawaited
+        return loop.run(self._run_helper(coro))
+
+    async def authenticate_async(self) -> None:
+        """
+        Get (or refresh) an access token now rather than on the first request.
+
+        Call before sending the client to worker processes so they share the token
+        instead of each logging in.
+        """
+        await self._http_client.get_access_token()
+
+    def authenticate(self) -> None:
+        """Sync wrapper for `authenticate_async`."""
+        return self.run(self.authenticate_async())
 
     def hello_world(self, name: Optional[str] = None) -> str:
         """A simple endpoint to check connectivity to ChemCloud.
@@ -304,6 +947,18 @@ class CCClient:
             programs = [""]
         return programs
 
+    async def _server_supports_async(self, method: str, route: str) -> bool:
+        """
+        Check the OpenAPI specification for an optional server route.
+
+        Used to negotiate features that older ChemCloud servers may not provide.
+        """
+        spec = await self.openapi_spec_async()
+        paths = spec.get("paths", {})
+        full_route = f"{self._settings.chemcloud_api_version_prefix}{route}"
+        operations = paths.get(full_route) or paths.get(route) or {}
+        return method.lower() in operations
+
     @property
     def supported_programs(self) -> list[str]:
         """Sync wrapper for supported_programs_async."""
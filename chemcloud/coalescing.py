@@ -0,0 +1,152 @@
+"""Coalesce concurrent single-input submissions into batches."""
+
+import asyncio
+import logging
+from collections.abc import Hashable
+from functools import partial
+from typing import TYPE_CHECKING, Any, Optional, cast
+
+from qcdata import ProgramOutput
+
+from .models import FutureOutput
+
+if TYPE_CHECKING:
+    from .client import CCClient
+
+logger = logging.getLogger(__name__)
+
+
+class Coalescer:
+    """
+    Collects inputs submitted within `window` seconds of each other (with the same
+    program and options) and sends them as one `compute_async` batch. The batch is
+    polled as a group by the client's `PollScheduler`, while each caller awaits only
+    its own output.
+
+    Cancelling a caller before its batch is sent drops the input; after that, the
+    task is revoked on the server. A Coalescer must be used from a single event loop.
+
+    Usage:
+        ```python
+        coalescer = client.coalescer()
+
+        async def handler(inp):
+            return await coalescer.compute_async("psi4", inp)
+        ```
+
+    Parameters:
+        client: The client used to submit and poll tasks.
+        window: Seconds to wait after the first input of a batch arrives to
+            collect more inputs.
+        max_batch_size: Maximum number of inputs per batch.
+        initial_interval: The minimum interval between status checks of a task.
+    """
+
+    def __init__(
+        self,
+        client: "CCClient",
+        *,
+        window: Optional[float] = None,
+        max_batch_size: Optional[int] = None,
+        initial_interval: float = 1.0,
+    ):
+        settings = client._settings
+        self._client = client
+        self.window = settings.chemcloud_coalesce_window if window is None else window
+        self.max_batch_size = max_batch_size or settings.chemcloud_coalesce_batch_size
+        self.initial_interval = initial_interval
+        self._batches: dict[Hashable, list[tuple[Any, asyncio.Future]]] = {}
+        # Window timer of each open batch, cancelled if it is flushed early
+        self._timers: dict[Hashable, asyncio.TimerHandle] = {}
+        self._batch_tasks: set[asyncio.Task] = set()
+
+    async def compute_async(
+        self, program: str, inp: Any, /, **kwargs: Any
+    ) -> ProgramOutput:
+        """
+        Add an input to the open batch for its program and options and await its
+        output.
+
+        Parameters:
+            program: A program name matching one of the client's supported programs.
+            inp: The input object to compute.
+            **kwargs: Keyword arguments passed to `CCClient.compute_async` (e.g.,
+                `collect_files` or `queue`). Values must be hashable.
+        """
+        key = (program, tuple(sorted(kwargs.items(), key=lambda item: item[0])))
+        loop = asyncio.get_running_loop()
+        waiter = loop.create_future()
+        batch = self._batches.setdefault(key, [])
+        batch.append((inp, waiter))
+        if len(batch) >= self.max_batch_size:
+            self._flush(key)
+        elif len(batch) == 1:
+            self._timers[key] = loop.call_later(self.window, self._flush, key)
+        return await waiter
+
+    def _flush(self, key: Hashable) -> None:
+        """Send the open batch for `key`, if any."""
+        timer = self._timers.pop(key, None)
+        if timer is not None:
+            timer.cancel()
+        batch = [item for item in self._batches.pop(key, []) if not item[1].done()]
+        if not batch:
+            return
+        program, kwargs = cast(tuple, key)
+        task = asyncio.ensure_future(self._run_batch(program, dict(kwargs), batch))
+        self._batch_tasks.add(task)
+        task.add_done_callback(self._batch_tasks.discard)
+
+    async def _run_batch(
+        self,
+        program: str,
+        kwargs: dict[str, Any],
+        batch: list[tuple[Any, asyncio.Future]],
+    ) -> None:
+        waiters = [waiter for _, waiter in batch]
+        try:
+            future = cast(
+                FutureOutput,
+                await self._client.compute_async(
+                    program,
+                    [inp for inp, _ in batch],
+                    return_future=True,
+                    **kwargs,
+                ),
+            )
+            logger.debug(f"Submitted a coalesced batch of {len(batch)} inputs.")
+            for i, waiter in enumerate(waiters):
+                waiter.add_done_callback(partial(self._revoke_if_cancelled, future, i))
+            async for i, _, output in future.stream_async(
+                initial_interval=self.initial_interval
+            ):
+                if not waiters[i].done():
+                    waiters[i].set_result(output)
+        except Exception as exc:
+            for waiter in waiters:
+                if not waiter.done():
+                    waiter.set_exception(exc)
+
+    def _revoke_if_cancelled(
+        self, future: FutureOutput, index: int, waiter: asyncio.Future
+    ) -> None:
+        if waiter.cancelled() and not future._is_task_done(index):
+            logger.info(f"Revoking cancelled task {future.task_ids[index]}.")
+            task = asyncio.ensure_future(
+                self._client.revoke_async([future.task_ids[index]])
+            )
+            self._batch_tasks.add(task)
+            task.add_done_callback(self._batch_tasks.discard)
+
+    def cancel_pending(self) -> None:
+        """Cancel the callers whose inputs have not been sent yet."""
+        for batch in self._batches.values():
+            for _, waiter in batch:
+                waiter.cancel()
+
+    async def drain(self) -> None:
+        """Send open batches now and wait for all outstanding tasks."""
+        for key in list(self._batches):
+            self._flush(key)
+        while self._batch_tasks:
+            await asyncio.gather(*self._batch_tasks, return_exceptions=True)
@@ -16,15 +16,63 @@ class Settings(BaseSettings):
     chemcloud_base_directory: Path = Path.home() / ".chemcloud"
     chemcloud_credentials_file: str = "credentials"
     chemcloud_access_token_expiration_buffer: int = 15
+    # Renew access tokens in the background once this fraction of their lifetime has
+    # passed (None disables)
+    chemcloud_token_refresh_fraction: Optional[float] = 0.8
     chemcloud_domain: str = "https://chemcloud.mtzlab.com"
     chemcloud_api_version_prefix: str = "/api/v2"
     chemcloud_credentials_profile: str = "default"
     chemcloud_queue: Optional[str] = None
     chemcloud_concurrency: int = 3
+    # Opt-in limits on requests from all processes on this machine combined, shared
+    # through a file-locked token bucket in chemcloud_base_directory
+    chemcloud_node_max_requests_per_second: Optional[float] = None
+    chemcloud_node_max_in_flight: Optional[int] = None
+    chemcloud_node_limiter_file: str = "ratelimit.json"
     chemcloud_connect_timeout: int = 5
     chemcloud_read_timeout: int = 60  # for large payloads
     chemcloud_write_timeout: int = 15
     chemcloud_pool_timeout: int = 5
+    # Send batches differing only by geometry as one template (if server supports it)
+    chemcloud_template_encoding: bool = True
+    # Batches larger than this are serialized in chunks on a worker thread
+    chemcloud_serialization_chunk_size: int = 64
+    # Record wall times of completed calculations to calibrate cost estimates
+    chemcloud_record_runtimes: bool = True
+    chemcloud_runtime_history_file: str = "runtime_history.json"
+    chemcloud_race_stats_file: str = "race_stats.json"
+    # Skip races once a candidate has won 90% of at least this many similar races
+    chemcloud_race_skip_after: Optional[int] = 10
+    # Upper bound (seconds) on the interval between polls of a single task
+    chemcloud_max_poll_interval: float = 120.0
+    # Client-wide limit on task polls and relative jitter applied to poll times
+    chemcloud_max_polls_per_second: float = 50.0
+    chemcloud_poll_jitter: float = 0.1
+    # Maximum number of tasks refreshed per FutureOutput.refresh() call (None = all)
+    chemcloud_refresh_max_requests: Optional[int] = None
+    # Collected outputs are deleted from the server in the background in batches
+    chemcloud_delete_delay: float = 0.5
+    chemcloud_delete_batch_size: int = 100
+    # Seconds interpreter exit waits to send deletions still queued
+    chemcloud_delete_flush_timeout: float = 2.0
+    # Maximum number of completed outputs held to stream results in order
+    chemcloud_stream_buffer: int = 100
+    # Completion callbacks run on a thread pool; polling waits while a FutureOutput
+    # has this many callbacks queued or running
+    chemcloud_callback_workers: Optional[int] = None
+    chemcloud_callback_backlog: int = 32
+    # Inputs submitted to a CCExecutor within this many seconds are sent as one batch
+    chemcloud_executor_batch_delay: float = 0.05
+    chemcloud_executor_batch_size: int = 100
+    # Inputs passed to a Coalescer within this many seconds are sent as one batch
+    chemcloud_coalesce_window: float = 0.01
+    chemcloud_coalesce_batch_size: int = 100
+    # Maximum number of sweep points in flight at once
+    chemcloud_sweep_window: int = 200
+    # Unix socket (in chemcloud_base_directory) of the node-local agent
+    chemcloud_agent_socket: str = "agent.sock"
+    # Seconds the agent keeps completed outputs that no process has collected
+    chemcloud_agent_result_ttl: float = 3600.0
 
 
 settings = Settings()
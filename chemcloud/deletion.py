@@ -0,0 +1,136 @@
+"""Deferred, batched deletion of collected outputs from the ChemCloud server."""
+
+import asyncio
+import json
+import logging
+from typing import TYPE_CHECKING, Optional
+
+from httpx import HTTPError
+
+if TYPE_CHECKING:
+    from .client import CCClient
+
+logger = logging.getLogger(__name__)
+
+
+class DeletionQueue:
+    """
+    Collects task IDs whose outputs have been fetched and deletes them in bulk.
+
+    Deletions run in a single low-priority background task so they use at most one
+    of the client's concurrent requests and never delay `FutureOutput.get()`. Task
+    IDs are kept on the queue (not the event loop) so deletions not yet sent when a
+    `CCClient.run()` call returns are sent during the next call, on
+    `CCClient.close()` or at interpreter exit.
+
+    If the server advertises `DELETE /compute/output`, IDs are deleted with one
+    request per batch; otherwise they are deleted one at a time.
+
+    Parameters:
+        client: The client used to send delete requests.
+        delay: Seconds to wait after the first ID arrives to collect a batch.
+        max_batch_size: Maximum number of IDs deleted per bulk request.
+    """
+
+    def __init__(self, client: "CCClient", *, delay: float, max_batch_size: int):
+        self._client = client
+        self.delay = delay
+        self.max_batch_size = max_batch_size
+        self._pending: list[str] = []
+        self._worker: Optional[asyncio.Task] = None
+        # Held by the worker while it sends a batch so it is never cancelled
+        # mid-request. Bound to the event loop of the worker.
+        self._sending: Optional[asyncio.Lock] = None
+        self._sending_loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def add(self, task_id: str) -> None:
+        """Queue a task's output for deletion. Must be called within a loop."""
+        self._pending.append(task_id)
+        if self._live_worker() is None:
+            self._start_worker(linger=True)
+
+    def _live_worker(self) -> Optional[asyncio.Task]:
+        """The worker, unless it finished or its event loop no longer runs."""
+        worker = self._worker
+        if worker is None or worker.done() or not worker.get_loop().is_running():
+            return None
+        return worker
+
+    def _start_worker(self, linger: bool) -> asyncio.Task:
+        """Start the one worker draining the queue on the running loop."""
+        loop = asyncio.get_running_loop()
+        if self._sending_loop is not loop:
+            self._sending, self._sending_loop = asyncio.Lock(), loop
+        self._worker = loop.create_task(self._drain(linger))
+        return self._worker
+
+    async def _drain(self, linger: bool) -> None:
+        """Delete queued outputs until the queue is empty."""
+        assert self._sending is not None
+        while self._pending:
+            if linger:
+                await asyncio.sleep(self.delay)  # Let a batch accumulate
+            async with self._sending:
+                batch = self._pending[: self.max_batch_size]
+                try:
+                    await self._delete(batch)
+                except HTTPError as exc:
+                    logger.warning(f"Unable to delete outputs for {batch}: {exc}")
+                # Remove exactly the IDs sent; IDs added meanwhile stay queued.
+                sent = set(batch)
+                self._pending[:] = [i for i in self._pending if i not in sent]
+
+    async def _delete(self, batch: list[str]) -> None:
+        if len(batch) > 1 and await self._client._server_supports_async(
+            "delete", "/compute/output"
+        ):
+            logger.debug(f"Deleting outputs for {len(batch)} tasks in bulk.")
+            await self._client._http_client._authenticated_request_async(
+                "delete", "/compute/output", data=json.dumps(batch).encode("utf-8")
+            )
+        else:
+            for task_id in batch:
+                await self._client.delete_output_async(task_id)
+
+    async def stop(self) -> None:
+        """
+        Stop the background worker once any batch it is sending has been sent.
+        Queued IDs are kept for later.
+        """
+        worker = self._live_worker()
+        if worker is None or worker.get_loop() is not asyncio.get_running_loop():
+            return
+        assert self._sending is not None
+        async with self._sending:
+            worker.cancel()
+        await asyncio.gather(worker, return_exceptions=True)
+
+    async def flush(self, timeout: Optional[float] = None) -> None:
+        """
+        Delete all queued outputs now and wait for the deletions to finish.
+
+        Parameters:
+            timeout: Maximum seconds to wait. Deletion continues in the background
+                after that; IDs not deleted stay queued.
+        """
+        worker = self._live_worker()
+        if worker is not None and worker.get_loop() is not asyncio.get_running_loop():
+            # Only the worker's loop may drain the queue; flush there
+            await asyncio.wrap_future(
+                asyncio.run_coroutine_threadsafe(self.flush(timeout), worker.get_loop())
+            )
+            return
+        await self.stop()  # Skip the worker's batching delay
+        if not self._pending:
+            return
+        worker = self._start_worker(linger=False)
+        try:
+            await asyncio.wait_for(asyncio.shield(worker), timeout)
+        except asyncio.TimeoutError:
+            logger.warning(
+                f"Outputs of {len(self)} task(s) not deleted within {timeout}s; "
+                "they stay queued."
+            )
+
+    def __len__(self) -> int:
+        return len(self._pending)
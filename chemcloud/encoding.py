@@ -0,0 +1,150 @@
+"""Compact wire encodings for batches of inputs submitted to ChemCloud."""
+
+import json
+from base64 import b64decode, b64encode
+from hashlib import sha256
+from typing import Any, Optional
+
+import numpy as np
+from pydantic import BaseModel
+from qcdata.utils import json_dumps
+
+# Byte layout of packed geometries: little-endian float64, row-major (natoms, 3).
+GEOMETRY_DTYPE = "<f8"
+TEMPLATE_ENCODING = "template+float64-le"
+
+
+def batch_template(inputs: list[Any]) -> Optional[dict[str, Any]]:
+    """
+    Return the shared template for a batch of inputs that differ only by geometry.
+
+    A template is the JSON-serialized form of the first input with
+    `structure.geometry` removed. It is only returned when every input in the batch
+    serializes to the same template, i.e., they share `calctype`, `model`,
+    `keywords`, `files`, `symbols`, charge, multiplicity, etc.
+
+    Parameters:
+        inputs: A list of input objects.
+
+    Returns:
+        The template dictionary or None if the batch does not share a template.
+    """
+    if len(inputs) < 2:
+        return None
+
+    template: Optional[dict[str, Any]] = None
+    template_key: Optional[str] = None
+    previous = None
+    for inp in inputs:
+        if inp is previous:  # e.g. [prog_inp] * 100; already checked
+            continue
+        previous = inp
+        structure = getattr(inp, "structure", None)
+        if not isinstance(inp, BaseModel) or structure is None:
+            return None
+        dumped = inp.model_dump(mode="json", exclude_unset=True)
+        dumped["structure"].pop("geometry", None)
+        key = json.dumps(dumped, sort_keys=True)
+        if template_key is None:
+            template, template_key = dumped, key
+        elif key != template_key:
+            return None
+    return template
+
+
+def encode_batch(inputs: list[Any], template: dict[str, Any]) -> dict[str, Any]:
+    """
+    Encode a batch as a single template plus per-input packed geometries.
+
+    Parameters:
+        inputs: Input objects sharing `template` (see `batch_template`).
+        template: The shared template for the batch.
+
+    Returns:
+        A JSON-serializable payload. Geometries are concatenated in input order and
+            base64 encoded as little-endian float64 values.
+    """
+    geometries = np.stack(
+        [np.asarray(inp.structure.geometry, dtype=GEOMETRY_DTYPE) for inp in inputs]
+    )
+    return {
+        "encoding": TEMPLATE_ENCODING,
+        "template": template,
+        "geometry_shape": list(geometries.shape),
+        "geometries": b64encode(geometries.tobytes()).decode("ascii"),
+    }
+
+
+def decode_batch(payload: dict[str, Any]) -> list[dict[str, Any]]:
+    """
+    Expand a payload created by `encode_batch` back into per-input dictionaries.
+
+    This mirrors what the server does with a template payload and is used to emulate
+    the server locally.
+
+    Parameters:
+        payload: A payload created by `encode_batch`.
+
+    Returns:
+        A list of JSON-serializable input dictionaries in submission order.
+    """
+    if payload.get("encoding") != TEMPLATE_ENCODING:
+        raise ValueError(f"Unknown batch encoding: {payload.get('encoding')}")
+    geometries = np.frombuffer(
+        b64decode(payload["geometries"]), dtype=GEOMETRY_DTYPE
+    ).reshape(payload["geometry_shape"])
+    template_str = json.dumps(payload["template"])
+    decoded = []
+    for geometry in geometries:
+        inp = json.loads(template_str)  # Cheap deep copy of the template
+        inp["structure"]["geometry"] = geometry.tolist()
+        decoded.append(inp)
+    return decoded
+
+
+def content_hash(payload: bytes) -> str:
+    """Return a stable hash of a serialized payload."""
+    return sha256(payload).hexdigest()
+
+
+class PayloadCache:
+    """
+    Serialize input objects once per submission and reuse the encoded bytes.
+
+    Payloads are memoized by object identity, so `[prog_inp] * 100` is serialized a
+    single time, and deduplicated by content hash, so equal but distinct objects
+    share one bytes object. Cached objects must stay alive for the lifetime of the
+    cache since `id()` values may otherwise be reused.
+    """
+
+    def __init__(self) -> None:
+        self._by_id: dict[int, bytes] = {}
+        self._by_hash: dict[str, bytes] = {}
+        self._hashes: dict[int, str] = {}
+
+    def serialize(self, obj: Any) -> bytes:
+        """Return the JSON encoded bytes for an object."""
+        key = id(obj)
+        payload = self._by_id.get(key)
+        if payload is None:
+            payload = (
+                json_dumps(obj) if isinstance(obj, BaseModel) else json.dumps(obj)
+            ).encode("utf-8")
+            digest = content_hash(payload)
+            payload = self._by_hash.setdefault(digest, payload)
+            self._by_id[key] = payload
+            self._hashes[key] = digest
+        return payload
+
+    def serialize_many(self, objs: list[Any]) -> list[bytes]:
+        """Serialize a list of objects. Safe to run in a worker thread."""
+        return [self.serialize(obj) for obj in objs]
+
+    def hash_of(self, obj: Any) -> str:
+        """Return the content hash of an object, serializing it if needed."""
+        self.serialize(obj)
+        return self._hashes[id(obj)]
+
+    def __len__(self) -> int:
+        """Number of unique payloads in the cache."""
+        return len(self._by_hash)
@@ -12,3 +12,7 @@ class UnsupportedProgramError(BaseError):
 
 class AuthenticationError(BaseError):
     """An error occurred during authentication."""
+
+
+class AgentError(BaseError):
+    """The local ChemCloud agent is unreachable or failed a request."""
@@ -0,0 +1,134 @@
+"""A `concurrent.futures.Executor` backed by ChemCloud."""
+
+import logging
+import threading
+from collections.abc import Iterable, Iterator
+from concurrent.futures import Executor, Future
+from typing import TYPE_CHECKING, Any, Optional
+
+from qcdata import ProgramOutput
+
+from .coalescing import Coalescer
+
+if TYPE_CHECKING:
+    from .client import CCClient
+
+logger = logging.getLogger(__name__)
+
+
+class CCExecutor(Executor):
+    """
+    Executor whose `submit(program, inp)` returns a standard Future per task.
+
+    All work runs as coroutines on the client's background event loop (see
+    `CCClient.run`), so thousands of tasks can be pending without a thread per task,
+    `submit()` never blocks and tasks share the client's connection pool. Inputs
+    submitted within `batch_delay` seconds of each other (with the same program and
+    options) are sent as a single `compute_async` batch by a `Coalescer`, and the
+    batch is polled by the client's `PollScheduler`.
+
+    Cancelling a returned Future before its batch is sent drops the input; after
+    that, the task is revoked on the server. The executor counts as one long
+    `CCClient.run()` call until `shutdown()`: deletions are sent in the background
+    while it is open and local statistics are saved on shutdown.
+
+    Usage:
+        ```python
+        with client.executor() as executor:
+            futures = [executor.submit("psi4", inp) for inp in prog_inputs]
+            outputs = [future.result() for future in futures]
+            # Or, like any other Executor
+            outputs = list(executor.map("psi4", prog_inputs))
+        ```
+
+    Parameters:
+        client: The client used to submit and poll tasks.
+        batch_delay: Seconds to wait after the first input of a batch arrives to
+            collect more inputs.
+        max_batch_size: Maximum number of inputs per batch.
+        initial_interval: The minimum interval between status checks of a task.
+    """
+
+    def __init__(
+        self,
+        client: "CCClient",
+        *,
+        batch_delay: Optional[float] = None,
+        max_batch_size: Optional[int] = None,
+        initial_interval: float = 1.0,
+    ):
+        settings = client._settings
+        self._client = client
+        self._coalescer = Coalescer(
+            client,
+            window=(
+                settings.chemcloud_executor_batch_delay
+                if batch_delay is None
+                else batch_delay
+            ),
+            max_batch_size=max_batch_size or settings.chemcloud_executor_batch_size,
+            initial_interval=initial_interval,
+        )
+        self._shutdown = False
+        self._shutdown_lock = threading.Lock()
+        self._loop = client._background_loop
+        # Scheduled before any submission (call_soon_threadsafe is FIFO)
+        self._loop.loop.call_soon_threadsafe(client._begin_run)
+        self._drained: Optional["Future[None]"] = None
+
+    async def _drain(self) -> None:
+        """Send open batches, wait for all outstanding tasks and end the run."""
+        try:
+            await self._coalescer.drain()
+        finally:
+            await self._client._end_run()
+
+    def submit(  # type: ignore[override]
+        self, program: str, inp: Any, /, **kwargs
+    ) -> "Future[ProgramOutput]":
+        """
+        Submit an input and return a Future resolving to its ProgramOutput.
+
+        Parameters:
+            program: A program name matching one of the client's supported programs.
+            inp: The input object to compute.
+            **kwargs: Keyword arguments passed to `CCClient.compute_async` (e.g.,
+                `collect_files` or `queue`).
+        """
+        with self._shutdown_lock:
+            if self._shutdown:
+                raise RuntimeError("Cannot schedule new futures after shutdown.")
+            return self._loop.submit(
+                self._coalescer.compute_async(program, inp, **kwargs)
+            )
+
+    def map(  # type: ignore[override]
+        self, program: str, inputs: Iterable[Any], timeout: Optional[float] = None
+    ) -> Iterator[ProgramOutput]:
+        """
+        Submit every input and yield their ProgramOutputs in order.
+
+        Parameters:
+            program: A program name matching one of the client's supported programs.
+            inputs: The input objects to compute.
+            timeout: Maximum seconds to wait for each output, counted from this call.
+        """
+        # Executor.map calls `self.submit(program, inp)` for each input
+        return super().map(program, inputs, timeout=timeout)  # type: ignore[arg-type]
+
+    def shutdown(self, wait: bool = True, *, cancel_futures: bool = False) -> None:
+        """
+        Stop accepting new inputs. Outstanding tasks are still collected.
+
+        Parameters:
+            wait: Block until all outstanding tasks have completed.
+            cancel_futures: Cancel inputs that have not been sent to the server yet.
+        """
+        with self._shutdown_lock:
+            self._shutdown = True
+            if cancel_futures:
+                self._loop.loop.call_soon_threadsafe(self._coalescer.cancel_pending)
+            if self._drained is None:
+                self._drained = self._loop.submit(self._drain())
+        if wait:
+            self._drained.result()
@@ -0,0 +1,145 @@
+"""Inter-process file locks and atomic file writes for state shared on a node."""
+
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+from types import TracebackType
+from typing import IO, Optional, Union
+
+if sys.platform == "win32":  # pragma: no cover
+    import msvcrt
+
+    def _try_lock(f: IO) -> bool:
+        try:
+            msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+        except OSError:
+            return False
+        return True
+
+    def _unlock(f: IO) -> None:
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+else:
+    import fcntl
+
+    def _try_lock(f: IO) -> bool:
+        try:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return False
+        return True
+
+    def _unlock(f: IO) -> None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+class FileLock:
+    """
+    Exclusive advisory lock on `path`, shared by every process (and every client
+    within a process) that locks the same path. Not reentrant.
+
+    Usage:
+        ```python
+        with FileLock(path):
+            ...  # Synchronous critical section
+
+        async with FileLock(path):
+            ...  # Waits without blocking the event loop
+        ```
+
+    Parameters:
+        path: The lock file. Created (with its parent directories) if missing.
+        poll_interval: Seconds between attempts while waiting for the lock.
+    """
+
+    def __init__(self, path: Union[str, Path], *, poll_interval: float = 0.05):
+        self.path = Path(path)
+        self.poll_interval = poll_interval
+        self._file: Optional[IO] = None
+
+    def _open(self) -> IO:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        return open(self.path, "a+b")
+
+    def acquire(self, blocking: bool = True) -> bool:
+        """Acquire the lock. Returns False if `blocking=False` and it is held."""
+        f = self._open()
+        while not _try_lock(f):
+            if not blocking:
+                f.close()
+                return False
+            time.sleep(self.poll_interval)
+        self._file = f
+        return True
+
+    async def acquire_async(self) -> None:
+        """Acquire the lock, yielding to the event loop while it is held elsewhere."""
+        f = self._open()
+        try:
+            while not _try_lock(f):
+                await asyncio.sleep(self.poll_interval)
+        except BaseException:  # Cancelled while waiting
+            f.close()
+            raise
+        self._file = f
+
+    def release(self) -> None:
+        """Release the lock."""
+        if self._file is not None:
+            f, self._file = self._file, None
+            try:
+                _unlock(f)
+            finally:
+                f.close()
+
+    @property
+    def locked(self) -> bool:
+        """Whether this instance holds the lock."""
+        return self._file is not None
+
+    def __enter__(self) -> "FileLock":
+        self.acquire()
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[type[BaseException]],
+        exc: Optional[BaseException],
+        tb: Optional[TracebackType],
+    ) -> None:
+        self.release()
+
+    async def __aenter__(self) -> "FileLock":
+        await self.acquire_async()
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: Optional[type[BaseException]],
+        exc: Optional[BaseException],
+        tb: Optional[TracebackType],
+    ) -> None:
+        self.release()
+
+
+def atomic_write(path: Union[str, Path], data: bytes) -> None:
+    """
+    Write `data` to `path` so readers see either the old or the new contents, never
+    a partially written file.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
@@ -0,0 +1,203 @@
+"""Client-side finite-difference gradients and hessians for any program."""
+
+import logging
+from time import time
+from typing import TYPE_CHECKING, Any, Literal, Optional, cast
+
+import numpy as np
+from qcdata import CalcType, Files, ProgramOutput, Provenance
+from qcdata.models import SinglePointData
+
+from .models import FutureOutput
+
+if TYPE_CHECKING:
+    from .client import CCClient
+
+logger = logging.getLogger(__name__)
+
+Scheme = Literal["central", "forward"]
+
+
+def n_displaced_coordinates(natoms: int, translational: bool = True) -> int:
+    """
+    Number of Cartesian coordinates that must be displaced.
+
+    With `translational=True` the last atom is never displaced: its derivatives
+    follow from translational invariance (the forces on all atoms sum to zero).
+    """
+    return 3 * (natoms - 1) if translational and natoms > 1 else 3 * natoms
+
+
+def displacements(
+    natoms: int,
+    step: float,
+    scheme: Scheme = "central",
+    translational: bool = True,
+) -> np.ndarray:
+    """
+    Return the Cartesian displacements of a finite-difference calculation.
+
+    Parameters:
+        natoms: Number of atoms in the structure.
+        step: Displacement size in bohr.
+        scheme: "central" displaces every coordinate by +step and -step. "forward"
+            displaces every coordinate by +step and adds the undisplaced structure.
+        translational: Skip displacements of the last atom (see
+            `n_displaced_coordinates`).
+
+    Returns:
+        Array of shape (n_displacements, natoms, 3). For "central" the +step
+            displacements come first; for "forward" the undisplaced structure does.
+    """
+    ncoords = n_displaced_coordinates(natoms, translational)
+    steps = np.eye(3 * natoms)[:ncoords] * step
+    if scheme == "central":
+        disp = np.concatenate([steps, -steps])
+    elif scheme == "forward":
+        disp = np.concatenate([np.zeros((1, 3 * natoms)), steps])
+    else:
+        raise ValueError(f"Unknown finite-difference scheme '{scheme}'.")
+    return disp.reshape(-1, natoms, 3)
+
+
+def derivative(
+    values: np.ndarray,
+    natoms: int,
+    step: float,
+    scheme: Scheme = "central",
+    translational: bool = True,
+) -> np.ndarray:
+    """
+    Differentiate values computed at `displacements(...)` with respect to the
+    Cartesian coordinates.
+
+    Parameters:
+        values: Array of shape (n_displacements, m), e.g. energies (m=1) or flattened
+            gradients (m=3*natoms), in the order returned by `displacements`.
+        natoms: Number of atoms in the structure.
+        step: Displacement size in bohr.
+        scheme: The scheme used to generate the displacements.
+        translational: Whether the displacements skipped the last atom.
+
+    Returns:
+        Array of shape (3*natoms, m) whose row k is the derivative with respect to
+            coordinate k.
+    """
+    ncoords = n_displaced_coordinates(natoms, translational)
+    if scheme == "central":
+        rows = (values[:ncoords] - values[ncoords:]) / (2 * step)
+    else:
+        rows = (values[1:] - values[0]) / step
+    if ncoords < 3 * natoms:
+        # Translational invariance: derivatives with respect to the last atom are
+        # minus the sum of the derivatives with respect to all other atoms.
+        per_atom = rows.reshape(natoms - 1, 3, -1)
+        rows = np.concatenate([per_atom, -per_atom.sum(axis=0, keepdims=True)])
+    return rows.reshape(3 * natoms, -1)
+
+
+def _failed_output(
+    inp: Any, program: str, index: int, output: Optional[ProgramOutput]
+) -> ProgramOutput:
+    return ProgramOutput(
+        input_data=inp,
+        success=False,
+        data=Files(),
+        logs=output.logs if output is not None else None,
+        traceback=(
+            f"Finite-difference displacement {index} failed.\n"
+            f"{output.traceback if output is not None else ''}"
+        ),
+        provenance=Provenance(program=program),
+    )
+
+
+async def finite_difference_async(
+    client: "CCClient",
+    program: str,
+    inp: Any,
+    *,
+    step: float = 0.005,
+    scheme: Scheme = "central",
+    translational: bool = True,
+    initial_interval: float = 1.0,
+    **compute_kwargs,
+) -> ProgramOutput:
+    """
+    Compute a gradient or hessian by finite differences. See
+    `CCClient.finite_difference_async`.
+    """
+    calctype = str(getattr(inp.calctype, "value", inp.calctype))
+    if calctype not in ("gradient", "hessian"):
+        raise ValueError(
+            "Finite differences require a gradient or hessian calctype, "
+            f"not '{calctype}'."
+        )
+    # Energies are differentiated for gradients and gradients for hessians
+    sub_calctype = CalcType.energy if calctype == "gradient" else CalcType.gradient
+    natoms = len(inp.structure.symbols)
+    disp = displacements(natoms, step, scheme, translational)
+    displaced = [
+        inp.model_copy(
+            update={
+                "calctype": sub_calctype,
+                "structure": inp.structure.model_copy(
+                    update={"geometry": inp.structure.geometry + d}
+                ),
+            }
+        )
+        for d in disp
+    ]
+    logger.info(
+        f"Submitting {len(displaced)} displaced {sub_calctype.value} calculations."
+    )
+    start = time()
+    future = cast(
+        FutureOutput,
+        await client.compute_async(
+            program, displaced, return_future=True, **compute_kwargs
+        ),
+    )
+
+    # Collect results as they arrive and stop at the first failure
+    width = 1 if calctype == "gradient" else 3 * natoms
+    values = np.empty((len(displaced), width))
+    watch = client.poll_scheduler.watch(
+        future, list(range(len(displaced))), initial_interval
+    )
+    try:
+        for _ in range(len(displaced)):
+            i = await watch.next_ready()
+            output = future.outputs[i]
+            if output is None or not output.success:
+                await future.cancel_async()
+                return _failed_output(inp, program, i, output)
+            data = cast(SinglePointData, output.data)
+            value = data.energy if calctype == "gradient" else data.gradient
+            values[i] = np.asarray(value, dtype=float).ravel()
+    finally:
+        client.poll_scheduler.unwatch(watch)
+
+    rows = derivative(values, natoms, step, scheme, translational)
+    if calctype == "gradient":
+        data = SinglePointData(
+            energy=values[0, 0] if scheme == "forward" else None,
+            gradient=rows.reshape(natoms, 3),
+        )
+    else:
+        ncoords = n_displaced_coordinates(natoms, translational)
+        # Central differences give the reference gradient as the mean of +/- steps
+        reference = (
+            values[0]
+            if scheme == "forward"
+            else (values[:ncoords] + values[ncoords:]).mean(axis=0)
+        )
+        data = SinglePointData(
+            gradient=reference.reshape(natoms, 3), hessian=(rows + rows.T) / 2
+        )
+    return ProgramOutput(
+        input_data=inp,
+        success=True,
+        data=data,
+        provenance=Provenance(program=program, wall_time=time() - start),
+    )
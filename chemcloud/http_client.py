@@ -2,12 +2,16 @@ import asyncio
 import json
 import logging
 import sys
+import threading
 from base64 import urlsafe_b64decode
+from contextlib import nullcontext
+from functools import lru_cache
 from getpass import getpass
 from pathlib import Path
 from time import time
 from typing import Any, Optional, Union
 from urllib.parse import urlencode
+from weakref import WeakKeyDictionary
 
 import httpx
 import tomli_w
@@ -20,11 +24,42 @@ else:
     import tomli as tomllib
 
 from .config import Settings, settings
+from .filelock import FileLock, atomic_write
+from .ratelimit import NodeRateLimiter
 
 logger = logging.getLogger(__name__)
 logger.addHandler(logging.NullHandler())
 
 
+def _without_credentials(settings: Settings) -> Settings:
+    """Copy of `settings` without a username or password (e.g., for pickling)."""
+    if settings.chemcloud_username is None and settings.chemcloud_password is None:
+        return settings
+    return settings.model_copy(
+        update={"chemcloud_username": None, "chemcloud_password": None}
+    )
+
+
+class _LoopState:
+    """Connection pool and asyncio primitives bound to a single event loop."""
+
+    def __init__(self, settings: Settings):
+        self.async_client = httpx.AsyncClient(
+            timeout=httpx.Timeout(
+                connect=settings.chemcloud_connect_timeout,
+                read=settings.chemcloud_read_timeout,
+                write=settings.chemcloud_write_timeout,
+                pool=settings.chemcloud_pool_timeout,
+            )
+        )
+        self.semaphore = asyncio.Semaphore(settings.chemcloud_concurrency)
+        self.token_refresh_lock = asyncio.Lock()
+        # Ahead-of-expiry token refresh (see `_HttpClient._schedule_refresh`)
+        self.scheduled_token = ""
+        self.refresher: Optional[asyncio.TimerHandle] = None
+        self.refresh_task: Optional[asyncio.Task] = None
+
+
 class _HttpClient:
     """
     Internal, asynchronous HTTP client for interacting with the ChemCloud API.
@@ -56,35 +91,79 @@ class _HttpClient:
         self._refresh_token: str = ""
         self._chemcloud_domain = chemcloud_domain or self._settings.chemcloud_domain
         self._tokens_set_from_file: bool = False
-        # Create async client, semaphore, and refresh lock lazily when a loop is running.
-        self._async_client: Optional[httpx.AsyncClient] = None
-        self._token_refresh_lock: Optional[asyncio.Lock] = None
-        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._node_limiter: Optional[NodeRateLimiter] = None
+        if (
+            settings.chemcloud_node_max_requests_per_second
+            or settings.chemcloud_node_max_in_flight
+        ):
+            self._node_limiter = NodeRateLimiter(
+                Path(settings.chemcloud_base_directory)
+                / settings.chemcloud_node_limiter_file,
+                rate=settings.chemcloud_node_max_requests_per_second,
+                max_in_flight=settings.chemcloud_node_max_in_flight,
+            )
+        self._reset_runtime_state()
+
+    def _reset_runtime_state(self) -> None:
+        """Create the loop- and thread-bound state. Called again after a fork."""
+        # AsyncClient, semaphore and refresh lock are bound to an event loop, so one
+        # set is created lazily per loop the client is used from.
+        self._loop_state: WeakKeyDictionary[asyncio.AbstractEventLoop, _LoopState] = (
+            WeakKeyDictionary()
+        )
+        # Serializes token refreshes across threads (and therefore event loops).
+        self._token_mutex = threading.Lock()
+
+    def __getstate__(self) -> dict[str, Any]:
+        """
+        Pickle the configuration and tokens only; connections are rebuilt lazily.
+        Usernames and passwords are never pickled, so call `CCClient.authenticate()`
+        before sending a client that logs in with them to other processes.
+        """
+        if not (self._access_token or self._refresh_token) and self._chemcloud_password:
+            logger.warning(
+                "Pickling a client that has not authenticated yet; its password is "
+                "not pickled. Call authenticate() first to share its tokens."
+            )
+        state = self.__dict__.copy()
+        del state["_loop_state"], state["_token_mutex"]
+        state["_chemcloud_username"] = state["_chemcloud_password"] = None
+        state["_settings"] = _without_credentials(self._settings)
+        return state
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._reset_runtime_state()
 
     def __repr__(self) -> str:
         return (
             f"{type(self).__name__}({self._chemcloud_domain}, profile={self._profile})"
         )
 
+    def _state(self) -> "_LoopState":
+        """State bound to the running event loop."""
+        loop = asyncio.get_running_loop()
+        state = self._loop_state.get(loop)
+        if state is None:
+            state = self._loop_state[loop] = _LoopState(self._settings)
+        return state
+
     @property
     def async_client(self) -> httpx.AsyncClient:
-        if self._async_client is None:
-            self._async_client = httpx.AsyncClient(
-                timeout=httpx.Timeout(
-                    connect=self._settings.chemcloud_connect_timeout,
-                    read=self._settings.chemcloud_read_timeout,
-                    write=self._settings.chemcloud_write_timeout,
-                    pool=self._settings.chemcloud_pool_timeout,
-                )
-            )
-        return self._async_client
+        """The AsyncClient (connection pool) of the running event loop."""
+        return self._state().async_client
 
     @property
     def semaphore(self) -> asyncio.Semaphore:
-        if self._semaphore is None:
-            # Create the semaphore using the currently running event loop.
-            self._semaphore = asyncio.Semaphore(self._settings.chemcloud_concurrency)
-        return self._semaphore
+        """Limits concurrent requests made from the running event loop."""
+        return self._state().semaphore
+
+    async def aclose(self) -> None:
+        """Close the connection pool of the running event loop."""
+        await self.stop_token_refresher()
+        state = self._loop_state.pop(asyncio.get_running_loop(), None)
+        if state is not None:
+            await state.async_client.aclose()
 
     async def _request_async(
         self,
@@ -92,7 +171,7 @@ class _HttpClient:
         route: str,
         *,
         headers: Optional[dict[str, str]] = None,
-        data: Optional[Union[dict[str, Any], str]] = None,
+        data: Optional[Union[dict[str, Any], str, bytes]] = None,
         params: Optional[dict[str, Any]] = None,
         api_call: bool = True,
         max_attempts: int = 3,
@@ -104,7 +183,10 @@ class _HttpClient:
         # Retry for RequestErrors (non HTTPStatusErrors)
         for attempt in range(1, max_attempts + 1):
             try:
-                async with self.semaphore:
+                async with (
+                    self.semaphore,
+                    self._node_limiter.slot() if self._node_limiter else nullcontext(),
+                ):
                     response = await self.async_client.request(
                         method, url, headers=headers, content=content, params=params
                     )
@@ -113,7 +195,8 @@ class _HttpClient:
                     )
 
                 response.raise_for_status()
-                return response.json()
+                # Some routes (e.g., DELETE) return no content
+                return response.json() if response.content else None
             except httpx.RequestError as exc:
                 logger.error(f"Request error on attempt {attempt} for {url}: {exc}")
                 if attempt == max_attempts:
@@ -144,12 +227,17 @@ class _HttpClient:
         api_call: bool,
         headers: Optional[dict[str, str]] = None,
     ) -> tuple[str, Union[str, bytes]]:
-        """Builds URL and serializes request content appropriately."""
+        """
+        Builds URL and serializes request content appropriately.
+
+        `bytes` data is treated as an already serialized JSON payload.
+        """
         url = (
             f"{self._chemcloud_domain}"
             f"{self._settings.chemcloud_api_version_prefix if api_call else ''}{route}"
         )
 
+        content: Union[str, bytes]
         # Auth requests do not use JSON content type.
         if (
             headers
@@ -161,11 +249,12 @@ class _HttpClient:
         else:
             if headers is not None:
                 headers.setdefault("content-type", "application/json")
-            content = (
-                json_dumps(data)
-                if isinstance(data, (BaseModel, list))
-                else json.dumps(data or {})
-            )
+            if isinstance(data, bytes):  # Already serialized
+                content = data
+            elif isinstance(data, (BaseModel, list)):
+                content = json_dumps(data)
+            else:
+                content = json.dumps(data or {})
 
         return url, content
 
@@ -174,35 +263,144 @@ class _HttpClient:
         Returns a valid access token asynchronously.
         Uses a lock to ensure only one refresh occurs at a time.
         """
-        if self._access_token and not self._is_token_expired(self._access_token):
+        token = self._access_token
+        if token and not self._is_token_expired(token):
             logger.debug("Access token is valid, returning cached token.")
-            return self._access_token
+        else:
+            token = await self._renew_tokens(stale_token=token)
+        self._schedule_refresh()
+        return token
+
+    async def _renew_tokens(self, stale_token: str) -> str:
+        """
+        Replace `stale_token` with a new access token (refreshing or logging in),
+        unless another coroutine or thread already replaced it.
+        """
+        async with self._state().token_refresh_lock:
+            # Coroutines on other threads' loops may be refreshing; wait without
+            # blocking this loop.
+            while not self._token_mutex.acquire(blocking=False):
+                await asyncio.sleep(0.01)
+            try:
+                # Double-check after acquiring the locks in case another task
+                # refreshed it.
+                if (
+                    self._access_token
+                    and self._access_token != stale_token
+                    and not self._is_token_expired(self._access_token)
+                ):
+                    logger.debug(
+                        "Access token refreshed by another coroutine, returning "
+                        "updated token."
+                    )
+                    return self._access_token
 
-        # Lazily create the lock in an async context where an event loop is active.
-        if self._token_refresh_lock is None:
-            self._token_refresh_lock = asyncio.Lock()
+                if self._refresh_token:
+                    logger.info("Refreshing tokens using refresh token.")
+                    await self._refresh_tokens(self._refresh_token)
+                else:
+                    logger.info(f"No refresh token set.")
+                    await self._set_tokens()
 
-        async with self._token_refresh_lock:
-            # Double-check after acquiring the lock in case another task refreshed it.
-            if self._access_token and not self._is_token_expired(self._access_token):
-                logger.debug(
-                    "Access token refreshed by another coroutine, returning updated token."
-                )
                 return self._access_token
+            finally:
+                self._token_mutex.release()
 
-            if self._refresh_token:
-                logger.info(
-                    "Access token expired. Refreshing tokens using refresh token."
-                )
-                await self._refresh_tokens(self._refresh_token)
-            else:
-                logger.info(f"No refresh token set.")
-                await self._set_tokens()
+    def _schedule_refresh(self) -> None:
+        """
+        Schedule renewal of the current access token on the running loop once
+        `chemcloud_token_refresh_fraction` of its lifetime has passed, so requests
+        never wait on `/oauth/token`. Each token is scheduled once; if renewing it
+        fails, it is refreshed on expiry as usual.
+        """
+        fraction = self._settings.chemcloud_token_refresh_fraction
+        token = self._access_token
+        state = self._state()
+        if not fraction or not self._refresh_token or state.scheduled_token == token:
+            return
+        try:
+            claims = self._token_claims(token)
+        except ValueError:
+            logger.debug("Access token is not a JWT; not refreshing it ahead.")
+            return
+        expires = claims["exp"]
+        issued = claims.get("iat", time())
+        refresh_at = min(
+            issued + fraction * (expires - issued),
+            expires - self._settings.chemcloud_access_token_expiration_buffer,
+        )
+        if state.refresher is not None:
+            state.refresher.cancel()
+        state.scheduled_token = token
+        state.refresher = asyncio.get_running_loop().call_later(
+            max(refresh_at - time(), 0), self._start_refresh_ahead, token, state
+        )
 
-            return self._access_token
+    def _start_refresh_ahead(self, token: str, state: _LoopState) -> None:
+        state.refresher = None
+        if self._access_token == token:  # Not renewed by a request in the meantime
+            state.refresh_task = asyncio.ensure_future(self._refresh_ahead(token))
+
+    async def _refresh_ahead(self, token: str) -> None:
+        logger.debug("Refreshing access token ahead of its expiry.")
+        try:
+            await self._renew_tokens(stale_token=token)
+        except httpx.HTTPError as exc:
+            # The next request will retry when the token actually expires.
+            logger.warning(f"Unable to refresh access token ahead of expiry: {exc}")
+        else:
+            self._schedule_refresh()
+
+    async def stop_token_refresher(self) -> None:
+        """Cancel the scheduled ahead-of-expiry refresh of the running loop, if any."""
+        state = self._loop_state.get(asyncio.get_running_loop())
+        if state is None:
+            return
+        if state.refresher is not None:
+            state.refresher.cancel()
+            state.refresher = None
+        if state.refresh_task is not None:
+            state.refresh_task.cancel()
+            await asyncio.gather(state.refresh_task, return_exceptions=True)
+            state.refresh_task = None
+        state.scheduled_token = ""
 
     async def _refresh_tokens(self, refresh_token: str) -> None:
-        """Get new access and refresh tokens asynchronously."""
+        """
+        Get new access and refresh tokens asynchronously.
+
+        Tokens set from the credentials file are shared by every process using the
+        profile on this machine. The refresh then happens under a file lock: the
+        first process to take it refreshes and writes the new tokens, while the
+        others wait and adopt them instead of hitting `/oauth/token` themselves.
+        """
+        if not self._tokens_set_from_file:
+            await self._request_refreshed_tokens(refresh_token)
+            return
+
+        async with FileLock(self._credentials_lock_file):
+            # Another process may have refreshed (and rotated the refresh token)
+            # while this one waited for the lock.
+            cached = self._read_credentials().get(self._profile, {})
+            access_token = cached.get("access_token", "")
+            if (
+                access_token
+                and access_token != self._access_token
+                and not self._is_token_expired(access_token)
+            ):
+                logger.info("Using tokens refreshed by another process.")
+                self._access_token = access_token
+                self._refresh_token = cached.get("refresh_token", refresh_token)
+                return
+            await self._request_refreshed_tokens(
+                cached.get("refresh_token", refresh_token)
+            )
+            self._write_credentials(
+                self._access_token, self._refresh_token, self._profile
+            )
+
+    async def _request_refreshed_tokens(self, refresh_token: str) -> None:
+        """Exchange a refresh token for new tokens at `/oauth/token`."""
         logger.info("Refreshing tokens...")
         data = {"grant_type": "refresh_token", "refresh_token": refresh_token}
         headers = {"content-type": "application/x-www-form-urlencoded"}
@@ -214,10 +412,6 @@ class _HttpClient:
         # Auth0 backend.
         self._access_token = response["access_token"]
         self._refresh_token = response.get("refresh_token", refresh_token)
-        if self._tokens_set_from_file:  # tokens originally set from file
-            self.write_tokens_to_credentials_file(
-                self._access_token, self._refresh_token, profile=self._profile
-            )
 
     async def _set_tokens(self) -> None:
         """
@@ -235,10 +429,7 @@ class _HttpClient:
 
         un = self._chemcloud_username or self._settings.chemcloud_username
         pw = self._chemcloud_password or self._settings.chemcloud_password
-        credentials_file = (
-            self._settings.chemcloud_base_directory
-            / self._settings.chemcloud_credentials_file
-        )
+        credentials_file = self._credentials_file
 
         unauth_msg = (
             "You must authenticate with ChemCloud to make this request.\n"
@@ -257,8 +448,7 @@ class _HttpClient:
             self._chemcloud_username, self._chemcloud_password = None, None
 
         elif credentials_file.is_file():
-            with open(credentials_file, "rb") as f:
-                credentials = tomllib.load(f)
+            credentials = self._read_credentials()
             try:
                 self._access_token = credentials[self._profile]["access_token"]
                 self._refresh_token = credentials[self._profile]["refresh_token"]
@@ -328,11 +518,22 @@ class _HttpClient:
         return response["access_token"], response["refresh_token"]
 
     def _is_token_expired(self, jwt: str) -> bool:
-        payload = self._decode_access_token(jwt)
-        return payload["exp"] <= (
+        return self._token_claims(jwt)["exp"] <= (
             int(time()) + self._settings.chemcloud_access_token_expiration_buffer
         )
 
+    @staticmethod
+    @lru_cache(maxsize=16)
+    def _token_claims(jwt: str) -> dict[str, Any]:
+        """
+        Decoded claims of a JWT, cached so authenticated requests do not decode the
+        token each time. Raises ValueError if `jwt` cannot be decoded.
+        """
+        try:
+            return _HttpClient._decode_access_token(jwt)
+        except (IndexError, UnicodeDecodeError) as exc:
+            raise ValueError("Malformed JWT") from exc
+
     @staticmethod
     def _decode_access_token(jwt: str) -> dict[str, Any]:
         """Decode jwt string and return dictionary of payload claims."""
@@ -344,6 +545,29 @@ class _HttpClient:
         json_string = urlsafe_b64decode(encoded_payload).decode("utf-8")
         return json.loads(json_string)
 
+    @property
+    def _credentials_file(self) -> Path:
+        return (
+            Path(self._settings.chemcloud_base_directory)
+            / self._settings.chemcloud_credentials_file
+        )
+
+    @property
+    def _credentials_lock_file(self) -> Path:
+        """Lock serializing refreshes and writes of the credentials file."""
+        return self._credentials_file.with_name(f"{self._credentials_file.name}.lock")
+
+    def _read_credentials(self) -> dict[str, Any]:
+        """
+        Read all profiles from the credentials file. Needs no lock since the file is
+        only ever replaced atomically.
+        """
+        try:
+            with open(self._credentials_file, "rb") as f:
+                return tomllib.load(f)
+        except FileNotFoundError:
+            return {}
+
     def write_tokens_to_credentials_file(
         self,
         access_token: str,
@@ -354,22 +578,19 @@ class _HttpClient:
         """Writes access_token and refresh_token to configuration file"""
         assert access_token and refresh_token, "Both tokens must be provided"
         profile = profile or self._settings.chemcloud_credentials_profile
+        with FileLock(self._credentials_lock_file):
+            self._write_credentials(access_token, refresh_token, profile)
 
-        credentials_file = (
-            Path(self._settings.chemcloud_base_directory)
-            / self._settings.chemcloud_credentials_file
-        )
-
-        if credentials_file.is_file():
-            with open(credentials_file, "rb") as f:
-                credentials = tomllib.load(f)
-        else:
-            credentials_file.parent.mkdir(parents=True, exist_ok=True)
-            credentials = {}
-
+    def _write_credentials(
+        self, access_token: str, refresh_token: str, profile: str
+    ) -> None:
+        """
+        Atomically update one profile of the credentials file. The caller must hold
+        the credentials lock so concurrent writers cannot drop each other's profiles.
+        """
+        credentials = self._read_credentials()
         credentials[profile] = {
             "access_token": access_token,
             "refresh_token": refresh_token,
         }
-        with open(credentials_file, "wb") as f:
-            tomli_w.dump(credentials, f)
+        atomic_write(self._credentials_file, tomli_w.dumps(credentials).encode())
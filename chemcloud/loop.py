@@ -0,0 +1,95 @@
+"""An asyncio event loop running in a background thread."""
+
+import asyncio
+import logging
+import threading
+from concurrent.futures import Future
+from typing import Any, Coroutine, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Seconds `BackgroundLoop.run` waits for an interrupted coroutine to clean up
+CANCEL_TIMEOUT = 1.0
+
+
+class BackgroundLoop:
+    """
+    Event loop running forever in a daemon thread.
+
+    Coroutines submitted from any thread run on the one loop, so they share its
+    connection pool, semaphores and poll scheduler.
+    """
+
+    def __init__(self, name: str = "chemcloud-loop"):
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(
+            target=self._run_forever, name=name, daemon=True
+        )
+        self._thread.start()
+
+    def _run_forever(self) -> None:
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    @property
+    def is_current(self) -> bool:
+        """Whether the caller is running on this loop's thread."""
+        return threading.current_thread() is self._thread
+
+    def submit(self, coro: Coroutine[Any, Any, T]) -> "Future[T]":
+        """Schedule a coroutine on the loop from any thread."""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def run(self, coro: Coroutine[Any, Any, T], timeout: Optional[float] = None) -> T:
+        """
+        Run a coroutine on the loop and block the calling thread for its result.
+
+        If waiting is interrupted (e.g., by Ctrl-C or the timeout), the coroutine is
+        cancelled and given up to `CANCEL_TIMEOUT` seconds to clean up before the
+        exception is re-raised.
+        """
+        if self.is_current:
+            coro.close()
+            raise RuntimeError(
+                "Cannot block on the ChemCloud event loop from its own thread. "
+                "Use the async API (e.g., `await client.compute_async(...)`) instead."
+            )
+        finished = threading.Event()
+
+        async def run_coro() -> T:
+            try:
+                return await coro
+            finally:
+                finished.set()
+
+        future = self.submit(run_coro())
+        try:
+            return future.result(timeout)
+        except BaseException:
+            future.cancel()
+            finished.wait(CANCEL_TIMEOUT)
+            raise
+
+    def stop(self) -> None:
+        """Cancel outstanding tasks, stop the loop and join its thread."""
+        if not self._thread.is_alive():
+            return
+
+        async def cancel_tasks() -> None:
+            tasks = [
+                task
+                for task in asyncio.all_tasks()
+                if task is not asyncio.current_task()
+            ]
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        if not self.is_current:
+            self.submit(cancel_tasks()).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        if not self.is_current:
+            self._thread.join()
+            self.loop.close()
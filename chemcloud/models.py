@@ -1,20 +1,29 @@
 import asyncio
 import json
 import logging
+import threading
 import traceback
-from collections.abc import AsyncGenerator, Generator
+from collections import deque
+from collections.abc import AsyncGenerator, Callable, Generator, Iterable
+from concurrent.futures import Executor
+from concurrent.futures import Future as ConcurrentFuture
 from enum import Enum
+from functools import partial
+from itertools import islice
 from pathlib import Path
 from time import sleep, time
-from typing import TYPE_CHECKING, Any, Optional, Union, cast
+from typing import TYPE_CHECKING, Any, Literal, NamedTuple, Optional, Union, cast
 from uuid import uuid4
 
 from httpx import HTTPError
-from pydantic import BaseModel, field_validator, model_validator
+from pydantic import BaseModel, Field, PrivateAttr, field_validator, model_validator
 from qcdata import Files, Inputs, ProgramOutput, Provenance
 from typing_extensions import Self
 
 from .exceptions import TimeoutError
+from .polling import PollQueue, ReorderBuffer, next_poll_delay
+from .retry import RetryPolicy
+from .scheduling import CALCTYPE_COST
 
 # Option 1: Use TYPE_CHECKING for static type hints.
 if TYPE_CHECKING:
@@ -49,6 +58,18 @@ class TaskStatus(str, Enum):
 
 READY_STATES = {TaskStatus.SUCCESS, TaskStatus.FAILURE, TaskStatus.REVOKED}
 
+# Called with (index, task_id, output) when a task becomes ready.
+TaskCallback = Callable[[int, str, ProgramOutput], Any]
+
+
+class CallbackError(NamedTuple):
+    """An exception raised by a completion callback."""
+
+    #: Index of the task the callback ran for (None for `add_done_callback`).
+    task_index: Optional[int]
+    task_id: Optional[str]
+    error: BaseException
+
 
 class FutureOutput(BaseModel):
     """
@@ -78,6 +99,13 @@ class FutureOutput(BaseModel):
 
         statuses: A list of TaskStatus enums corresponding to the status of each task.
             Generally not passed by the user, but used internally to track task status.
+        submitted_at: Unix time the tasks were submitted. Used to schedule polls.
+        submit_params: The URL parameters the tasks were submitted with. Used to
+            resubmit failed tasks.
+        attempts: Number of times each task has been submitted.
+        retry_policy: Optional `RetryPolicy` deciding which failed tasks are
+            resubmitted. Results of resubmitted tasks replace the failed outputs at
+            the original indices. Not saved by `.save()`.
     """
 
     task_ids: list[str]
@@ -87,6 +115,24 @@ class FutureOutput(BaseModel):
     outputs: list[Optional[ProgramOutput]] = []
     return_single_output: bool = False
     statuses: list[TaskStatus] = []
+    submitted_at: float = Field(default_factory=time)
+    submit_params: dict[str, Any] = {}
+    attempts: list[int] = []
+    retry_policy: Optional[RetryPolicy] = Field(default=None, exclude=True)
+    _refresh_cursor: int = PrivateAttr(default=0)
+    _task_callbacks: list[tuple[TaskCallback, Optional[Executor]]] = PrivateAttr(
+        default_factory=list
+    )
+    _done_callbacks: list[tuple[Callable, Optional[Executor]]] = PrivateAttr(
+        default_factory=list
+    )
+    _pending_callbacks: set[ConcurrentFuture] = PrivateAttr(default_factory=set)
+    # Callbacks waiting for a slot: (executor, task index, fn, args)
+    _queued_callbacks: deque[
+        tuple[Optional[Executor], Optional[int], Callable, tuple]
+    ] = PrivateAttr(default_factory=deque)
+    _callback_errors: list[CallbackError] = PrivateAttr(default_factory=list)
+    _callback_lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
 
     model_config = {
         # Raises an error if extra fields are passed to model.
@@ -120,6 +166,8 @@ class FutureOutput(BaseModel):
             self.outputs = [None] * len(self.task_ids)
         if not self.statuses:
             self.statuses = [TaskStatus.PENDING] * len(self.task_ids)
+        if not self.attempts:
+            self.attempts = [1] * len(self.task_ids)
         return self
 
     @model_validator(mode="after")
@@ -138,49 +186,293 @@ class FutureOutput(BaseModel):
             raise AttributeError("Tasks submitted as a list. Use `task_ids` instead.")
         return self.task_ids[0]
 
-    async def refresh_async(self) -> None:
-        """Refresh the status and output for uncollected tasks."""
+    async def refresh_async(
+        self,
+        indices: Optional[list[int]] = None,
+        *,
+        max_requests: Optional[int] = None,
+        order: Literal["round_robin", "oldest"] = "round_robin",
+    ) -> None:
+        """
+        Refresh the status and output for uncollected tasks.
+
+        Unfinished tasks are walked in a bounded window: at most `max_requests` tasks
+        are refreshed per call and only `chemcloud_concurrency` requests (and
+        coroutines) exist at once, so the cost of a refresh does not grow with the
+        size of the batch.
+
+        Parameters:
+            indices: Only refresh the tasks at these indices. If None, all unfinished
+                tasks are candidates.
+            max_requests: Maximum number of tasks to refresh in this call. Defaults to
+                `chemcloud_refresh_max_requests` (no limit if None).
+            order: Where to start the window when `indices` is None. "round_robin"
+                continues after the last task refreshed by the previous call so every
+                task is eventually refreshed; "oldest" always starts from the first
+                submitted task.
+        """
         logger.debug("Refreshing task statuses and outputs.")
 
         # Identify unfinished tasks
         assert self.statuses is not None  # For mypy
-        unfinished_indices = [
-            i for i, status in enumerate(self.statuses) if status not in READY_STATES
-        ]
-        if not unfinished_indices:
+        settings = self.client._settings
+        if max_requests is None:
+            max_requests = settings.chemcloud_refresh_max_requests
+        if indices is None:
+            n_tasks = len(self.task_ids)
+            start = self._refresh_cursor % n_tasks if order == "round_robin" else 0
+            candidates: Iterable[int] = (
+                (start + offset) % n_tasks for offset in range(n_tasks)
+            )
+        else:
+            candidates = indices
+        window = list(
+            islice((i for i in candidates if not self._is_task_done(i)), max_requests)
+        )
+        if not window:
             logger.debug("No unfinished tasks to refresh.")
             return  # Nothing to refresh
+        if indices is None:
+            self._refresh_cursor = window[-1] + 1
+
+        # Refresh the window with a fixed number of workers
+        logger.info(f"Refreshing {len(window)} unfinished task(s).")
+        to_refresh = iter(window)
+
+        async def worker() -> None:
+            for i in to_refresh:
+                try:
+                    result = await self.client.fetch_output_async(self.task_ids[i])
+                except HTTPError as exc:
+                    # Insulate users against all HTTP errors
+                    logger.error(
+                        f"Error collecting task {self.task_ids[i]}: {exc}",
+                        exc_info=True,
+                    )
+                    self.statuses[i] = TaskStatus.FAILURE
+                    self.outputs[i] = self._output_from_exception(exc, self.inputs[i])
+                else:
+                    self._apply_result(i, result)
+                    if self.retry_policy is not None and self._is_task_retryable(i):
+                        await self._retry_async(i)
+                if self._is_task_done(i):
+                    self._run_callbacks(i)
+
+        n_workers = min(settings.chemcloud_concurrency, len(window))
+        await asyncio.gather(*(worker() for _ in range(n_workers)))
+
+    def _apply_result(
+        self, index: int, result: tuple[TaskStatus, Optional[ProgramOutput]]
+    ) -> None:
+        """Update a task's status and output from `fetch_output_async` results."""
+        assert (
+            isinstance(result, tuple) and len(result) == 2
+        ), "Invalid result returned."
+        logger.debug(f"Task {self.task_ids[index]} collected: status {result[0]}")
+        self.statuses[index], self.outputs[index] = result
+        if result[1] is not None and self.client._settings.chemcloud_record_runtimes:
+            self.client.runtime_history.record(
+                self.program, self.inputs[index], result[1]
+            )
 
-        # Build coroutines to refresh unfinished tasks
-        coroutines = [
-            self.client.fetch_output_async(self.task_ids[i]) for i in unfinished_indices
-        ]
-        # Run the coroutines in parallel; collect statues and results.
-        logger.info(f"Refreshing {len(unfinished_indices)} unfinished task(s).")
-        results = await asyncio.gather(*coroutines, return_exceptions=True)
-
-        # Update statuses and outputs based on results
-        for i, result in zip(unfinished_indices, results):
-            # Insulate users against all HTTP errors
-            if isinstance(result, HTTPError):
-                logger.error(
-                    f"Error collecting task {self.task_ids[i]}: {result}", exc_info=True
+    def _is_task_retryable(self, index: int) -> bool:
+        """Whether the task at `index` failed on the server (was not revoked)."""
+        return self.statuses[index] in (
+            TaskStatus.SUCCESS,
+            TaskStatus.FAILURE,
+        ) and not self._is_task_successful(index)
+
+    async def _retry_async(self, index: int) -> None:
+        """Resubmit the failed task at `index` if the retry policy allows it."""
+        assert self.retry_policy is not None  # For mypy
+        kind = self.retry_policy.should_retry(self.outputs[index], self.attempts[index])
+        if kind is None:
+            return
+        attempt = self.attempts[index] + 1
+        inp = self.retry_policy.next_input(self.inputs[index], kind, attempt)
+        params = self.submit_params or {"program": self.program}
+        try:
+            (task_id,) = await self.client._submit_async([inp], params)
+        except HTTPError as exc:
+            logger.error(f"Unable to resubmit task {self.task_ids[index]}: {exc}")
+            return  # Keep the failed output
+        logger.warning(
+            f"Task {self.task_ids[index]} failed ({kind.value}). Resubmitted as "
+            f"{task_id} (attempt {attempt} of {self.retry_policy.max_attempts})."
+        )
+        self.task_ids[index] = task_id
+        self.inputs[index] = inp
+        self.statuses[index] = TaskStatus.PENDING
+        self.outputs[index] = None
+        self.attempts[index] = attempt
+
+    def add_task_callback(
+        self, fn: TaskCallback, executor: Optional[Executor] = None
+    ) -> None:
+        """
+        Call `fn(index, task_id, output)` as each task becomes ready.
+
+        Callbacks run on `executor` (a thread or process pool) while the remaining
+        tasks are polled, so post-processing overlaps with waiting. At most
+        `chemcloud_callback_backlog` callbacks of a FutureOutput are submitted at
+        once; further callbacks wait in a queue, and the client's `PollScheduler`
+        stops polling this FutureOutput (only) until it drains. Exceptions raised by
+        callbacks are
+        collected in `.callback_errors`. Tasks that are already ready are passed to
+        `fn` immediately. `.get()` returns once all callbacks have finished.
+
+        Parameters:
+            fn: The callback. Must be picklable if `executor` is a process pool.
+            executor: The executor that runs `fn`. Defaults to the client's
+                `callback_executor` thread pool.
+        """
+        self._task_callbacks.append((fn, executor))
+        for i in range(len(self.task_ids)):
+            if self._is_task_done(i) and self.outputs[i] is not None:
+                self._submit_callback(
+                    executor, i, fn, i, self.task_ids[i], self.outputs[i]
                 )
-                self.statuses[i] = TaskStatus.FAILURE
-                self.outputs[i] = self._output_from_exception(result, self.inputs[i])
-            else:
-                assert (
-                    isinstance(result, tuple) and len(result) == 2
-                ), "Invalid result returned."
-                logger.debug(f"Task {self.task_ids[i]} collected: status {result[0]}")
-                self.statuses[i], self.outputs[i] = result
-
-    def refresh(self):
+
+    def add_done_callback(
+        self, fn: Callable[["FutureOutput"], Any], executor: Optional[Executor] = None
+    ) -> None:
+        """
+        Call `fn(future)` once every task is ready. See `add_task_callback`.
+
+        Parameters:
+            fn: The callback, called with this FutureOutput.
+            executor: The executor that runs `fn`. Defaults to the client's
+                `callback_executor` thread pool.
+        """
+        if self._unfinished_indices():
+            self._done_callbacks.append((fn, executor))
+        else:
+            self._submit_callback(executor, None, fn, self)
+
+    @property
+    def callback_errors(self) -> list[CallbackError]:
+        """Exceptions raised by completion callbacks so far."""
+        with self._callback_lock:
+            return list(self._callback_errors)
+
+    def _run_callbacks(self, index: int) -> None:
+        """Submit callbacks for a task that just became ready."""
+        for fn, executor in self._task_callbacks:
+            self._submit_callback(
+                executor, index, fn, index, self.task_ids[index], self.outputs[index]
+            )
+        if self._done_callbacks and not self._unfinished_indices():
+            callbacks, self._done_callbacks = self._done_callbacks, []
+            for fn, executor in callbacks:
+                self._submit_callback(executor, None, fn, self)
+
+    def _submit_callback(
+        self, executor: Optional[Executor], index: Optional[int], fn: Callable, *args
+    ) -> None:
+        """Submit a callback, or queue it if the backlog is full. Never blocks."""
+        backlog = self.client._settings.chemcloud_callback_backlog
+        with self._callback_lock:
+            if self._queued_callbacks or len(self._pending_callbacks) >= backlog:
+                self._queued_callbacks.append((executor, index, fn, args))
+                return
+            callback = self._start_callback(executor, fn, args)
+        callback.add_done_callback(partial(self._callback_finished, index))
+
+    def _start_callback(
+        self, executor: Optional[Executor], fn: Callable, args: tuple
+    ) -> ConcurrentFuture:
+        """Submit a callback to its executor. The caller must hold the lock."""
+        callback = (executor or self.client.callback_executor).submit(fn, *args)
+        self._pending_callbacks.add(callback)
+        return callback
+
+    def _callback_finished(self, index: Optional[int], callback: ConcurrentFuture):
+        """
+        Record the outcome of a callback and start the next queued one. May run on
+        an executor thread.
+        """
+        error = None if callback.cancelled() else callback.exception()
+        started = None
+        with self._callback_lock:
+            self._pending_callbacks.discard(callback)
+            if error is not None:
+                task_id = self.task_ids[index] if index is not None else None
+                logger.error(f"Callback for task {task_id} raised {error!r}.")
+                self._callback_errors.append(CallbackError(index, task_id, error))
+            if self._queued_callbacks:
+                executor, next_index, fn, args = self._queued_callbacks.popleft()
+                # Started under the lock so waiters never see an empty backlog
+                # while callbacks are still queued.
+                started = (next_index, self._start_callback(executor, fn, args))
+        if started is not None:
+            next_index, next_callback = started
+            next_callback.add_done_callback(
+                partial(self._callback_finished, next_index)
+            )
+
+    def _callbacks_backlogged(self) -> bool:
+        """Whether polling should pause until outstanding callbacks catch up."""
+        backlog = self.client._settings.chemcloud_callback_backlog
+        with self._callback_lock:
+            return (
+                bool(self._queued_callbacks) or len(self._pending_callbacks) >= backlog
+            )
+
+    async def wait_callbacks_async(self) -> list[CallbackError]:
+        """Wait for all submitted callbacks to finish and return their errors."""
+        while True:
+            with self._callback_lock:
+                pending = list(self._pending_callbacks)
+            if not pending:
+                return self.callback_errors
+            await asyncio.wait([asyncio.wrap_future(cb) for cb in pending])
+
+    def wait_callbacks(self) -> list[CallbackError]:
+        """Sync wrapper around `wait_callbacks_async`."""
+        return self.client.run(self.wait_callbacks_async())
+
+    def refresh(self, indices: Optional[list[int]] = None, **kwargs):
         """Sync wrapper around `refresh_async`."""
-        return self.client.run(self.refresh_async())
+        return self.client.run(self.refresh_async(indices, **kwargs))
+
+    def _is_task_done(self, index: int) -> bool:
+        """Whether the task at `index` is in a ready state."""
+        return self.statuses[index] in READY_STATES
+
+    def _is_task_successful(self, index: int) -> bool:
+        """Whether the task at `index` completed with a successful ProgramOutput."""
+        output = self.outputs[index]
+        return (
+            self.statuses[index] == TaskStatus.SUCCESS
+            and output is not None
+            and output.success
+        )
+
+    def _next_poll_delay(self, index: int, initial_interval: float) -> float:
+        """Delay until the task at `index` should be polled again."""
+        calctype = getattr(self.inputs[index], "calctype", None)
+        return next_poll_delay(
+            time() - self.submitted_at,
+            self.client.runtime_history.expected_wall_time(
+                self.program, self.inputs[index]
+            ),
+            initial_interval=initial_interval,
+            max_interval=self.client._settings.chemcloud_max_poll_interval,
+            calctype_cost=CALCTYPE_COST.get(
+                str(getattr(calctype, "value", calctype)), 1.0
+            ),
+        )
+
+    def _unfinished_indices(self) -> list[int]:
+        return [i for i in range(len(self.task_ids)) if not self._is_task_done(i)]
 
     async def get_async(
-        self, timeout: Optional[float] = None, initial_interval: float = 1.0
+        self,
+        timeout: Optional[float] = None,
+        initial_interval: float = 1.0,
+        *,
+        cancel_on_timeout: bool = False,
+        min_completed: Optional[int] = None,
     ) -> Union[ProgramOutput, list[ProgramOutput]]:
         """
         Block until all tasks complete and return their ProgramOutputs.
@@ -188,9 +480,20 @@ class FutureOutput(BaseModel):
         If only one task was submitted, returns the single result;
         otherwise, returns a list of program_outputs.
 
+        Tasks are polled by the client's `PollScheduler`, which merges the polls of
+        all FutureOutputs using the client into one rate-limited timeline. Each task
+        is polled on its own schedule based on how long it has been running, its
+        calctype and the runtimes of similar calculations recorded in
+        `CCClient.runtime_history`, so long-running tasks are polled less often.
+
         Parameters:
             timeout: The maximum time to wait for all tasks to complete.
-            initial_interval: The initial interval between status checks.
+            initial_interval: The minimum interval between status checks of a task.
+            cancel_on_timeout: Revoke unfinished tasks on the server if the timeout
+                is exceeded.
+            min_completed: Return as soon as this many tasks are complete and revoke
+                the rest. Revoked tasks have a failed placeholder ProgramOutput. If
+                the server cannot revoke tasks, all tasks are waited for instead.
 
         Returns:
             The ProgramOutput objects for all tasks once they are complete.
@@ -199,31 +502,39 @@ class FutureOutput(BaseModel):
             TimeoutError: If the timeout is exceeded before all tasks complete.
         """
         start = time()
-        interval = initial_interval
-        completed = 0
-        while not await self.is_ready_async():
-            # Check for timeout
-            elapsed = time() - start
-            logger.debug(
-                f"Waiting for tasks to complete... elapsed time: {elapsed:.2f}s"
+        target = len(self.task_ids) if min_completed is None else min_completed
+        completed = len(self.task_ids) - len(self._unfinished_indices())
+        watch = self.client.poll_scheduler.watch(
+            self, self._unfinished_indices(), initial_interval
+        )
+        try:
+            while completed < target and (watch.pending or not watch.ready.empty()):
+                remaining = None if timeout is None else start + timeout - time()
+                try:
+                    await asyncio.wait_for(watch.next_ready(), timeout=remaining)
+                except asyncio.TimeoutError:
+                    if cancel_on_timeout:
+                        await self.cancel_async()
+                    raise TimeoutError(
+                        f"Timeout of {timeout} seconds exceeded while waiting for tasks."
+                    )
+                completed += 1
+        finally:
+            self.client.poll_scheduler.unwatch(watch)
+
+        if self._unfinished_indices():
+            logger.info(f"{completed} task(s) complete. Revoking remaining tasks.")
+            await self.cancel_async()
+        if self._unfinished_indices():
+            # The server could not revoke them; collect them instead
+            remaining = None if timeout is None else max(start + timeout - time(), 0)
+            return await self.get_async(
+                remaining, initial_interval, cancel_on_timeout=cancel_on_timeout
             )
-            if timeout is not None and elapsed > timeout:
-                raise TimeoutError(
-                    f"Timeout of {timeout} seconds exceeded while waiting for tasks."
-                )
-            # Refresh statuses and outputs
-            await self.refresh_async()
-            # Check for new completions
-            new_completed = sum(status in READY_STATES for status in self.statuses)
-            if new_completed > completed:
-                completed = new_completed
-                interval = initial_interval  # Reset interval if new completions found
-            else:
-                # Increase interval gradually (up to a max value)
-                interval = min(interval * 1.5, 30.0)
-            logger.debug(f"Sleeping for {interval:.2f} seconds before next poll.")
-            await asyncio.sleep(interval)
 
+        errors = await self.wait_callbacks_async()
+        if errors:
+            logger.warning(f"{len(errors)} callback(s) raised; see `.callback_errors`.")
         logger.info("All tasks are ready. Returning results.")
         assert all(
             output is not None for output in self.outputs
@@ -236,6 +547,93 @@ class FutureOutput(BaseModel):
         """Sync wrapper around `get_async`."""
         return self.client.run(self.get_async(*args, **kwargs))
 
+    async def first_success_async(
+        self, timeout: Optional[float] = None, initial_interval: float = 1.0
+    ) -> ProgramOutput:
+        """
+        Return the first successful ProgramOutput and revoke all other tasks.
+
+        Parameters:
+            timeout: The maximum time to wait for a successful task.
+            initial_interval: The minimum interval between status checks of a task.
+
+        Returns:
+            The first successful ProgramOutput. If every task fails, the output of the
+                first failed task is returned.
+
+        Raises:
+            TimeoutError: If the timeout is exceeded before a task succeeds. Unfinished
+                tasks are revoked.
+        """
+        start = time()
+        first_done: Optional[int] = None
+        winner: Optional[int] = None
+        for i in range(len(self.task_ids)):  # Tasks collected by earlier refreshes
+            if self._is_task_done(i):
+                first_done = i if first_done is None else first_done
+                if self._is_task_successful(i):
+                    winner = i
+                    break
+        watch = self.client.poll_scheduler.watch(
+            self,
+            [] if winner is not None else self._unfinished_indices(),
+            initial_interval,
+        )
+        try:
+            while winner is None and (watch.pending or not watch.ready.empty()):
+                remaining = None if timeout is None else start + timeout - time()
+                try:
+                    i = await asyncio.wait_for(watch.next_ready(), timeout=remaining)
+                except asyncio.TimeoutError:
+                    await self.cancel_async()
+                    raise TimeoutError(
+                        f"Timeout of {timeout} seconds exceeded while waiting for a "
+                        "successful task."
+                    )
+                first_done = i if first_done is None else first_done
+                if self._is_task_successful(i):
+                    winner = i
+        finally:
+            self.client.poll_scheduler.unwatch(watch)
+
+        await self.cancel_async()
+        index = winner if winner is not None else first_done
+        assert index is not None, "At least one task should be complete."
+        return cast(ProgramOutput, self.outputs[index])
+
+    def first_success(self, *args, **kwargs) -> ProgramOutput:
+        """Sync wrapper around `first_success_async`."""
+        return self.client.run(self.first_success_async(*args, **kwargs))
+
+    async def cancel_async(self) -> list[str]:
+        """
+        Revoke all unfinished tasks on the server.
+
+        Tasks the server accepts for revocation are marked as `REVOKED` and receive
+        a failed placeholder ProgramOutput. If the server cannot revoke tasks, they
+        keep running and their statuses are left unchanged, so they can still be
+        collected (and deleted from the server) with `.get()`.
+
+        Returns:
+            The IDs of the revoked tasks.
+        """
+        unfinished = self._unfinished_indices()
+        if not unfinished:
+            return []
+        revoked = set(
+            await self.client.revoke_async([self.task_ids[i] for i in unfinished])
+        )
+        for i in unfinished:
+            if self.task_ids[i] in revoked:
+                self.statuses[i] = TaskStatus.REVOKED
+                self.outputs[i] = self._revoked_output(self.inputs[i])
+                self._run_callbacks(i)
+        return [self.task_ids[i] for i in unfinished if self.task_ids[i] in revoked]
+
+    def cancel(self) -> list[str]:
+        """Sync wrapper around `cancel_async`."""
+        return self.client.run(self.cancel_async())
+
     async def is_ready_async(self) -> bool:
         """
         Asynchronously refreshes the statuses and checks if all tasks are complete.
@@ -261,77 +659,118 @@ class FutureOutput(BaseModel):
         to match the exact order tasks finish on the server.
 
         Parameters:
-            initial_interval: The initial interval (in seconds) between refresh calls.
-                This interval is increased by a factor of 1.5 on every poll cycle that
-                finds no newly completed tasks, up to a maximum of 30 seconds.
+            initial_interval: The minimum interval (in seconds) between polls of a
+                task. Tasks are polled by the client's `PollScheduler` (see
+                `.get_async()`).
 
         Yields:
             ProgramOutput objects for each task as they become ready.
             If a task fails, the yielded ProgramOutput will contain
             error/traceback information (just like `.get_async()`).
         """
-        done_indices: set[int] = set()
-        interval = initial_interval
-        while len(done_indices) < len(self.task_ids):
-            logger.debug("Polling for task completions...")
-            await self.refresh_async()
-            any_new = False
-            for i, status in enumerate(self.statuses):
-                if i not in done_indices and status in READY_STATES:
-                    logger.info(
-                        f"Task {self.task_ids[i]} is complete with status {status}."
-                    )
-                    done_indices.add(i)
-                    any_new = True
-                    if self.outputs[i] is not None:
-                        yield cast(ProgramOutput, self.outputs[i])
-                        self.outputs[i] = None  # Optional: clear to free memory
-
-            if any_new:
-                # Reset interval if new completions were found.
-                interval = initial_interval
-
-            else:
-                interval = min(interval * 1.5, 30.0)
-                logger.debug(f"No new completions; sleeping {interval:.2f} seconds.")
-                await asyncio.sleep(interval)
+        async for _, _, output in self.stream_async(initial_interval=initial_interval):
+            yield output
 
     def as_completed(
         self, initial_interval: float = 1.0
     ) -> Generator[ProgramOutput, None, None]:
+        """Synchronous implementation of `as_completed_async`."""
+        for _, _, output in self.stream(initial_interval=initial_interval):
+            yield output
+
+    def _unstreamed_indices(self) -> list[int]:
+        """Indices of tasks that are unfinished or whose output is still held."""
+        return [
+            i
+            for i in range(len(self.task_ids))
+            if not self._is_task_done(i) or self.outputs[i] is not None
+        ]
+
+    def _stream_buffer(self, ordered: bool, max_buffer: Optional[int]) -> ReorderBuffer:
+        capacity = max_buffer or self.client._settings.chemcloud_stream_buffer
+        return ReorderBuffer(self._unstreamed_indices(), capacity if ordered else None)
+
+    def _release(self, i: int) -> tuple[int, str, ProgramOutput]:
+        """Return the stream item of a completed task and clear its output."""
+        logger.info(
+            f"Task {self.task_ids[i]} is complete with status {self.statuses[i]}."
+        )
+        output = cast(ProgramOutput, self.outputs[i])
+        self.outputs[i] = None  # Clear the output to save memory
+        return i, self.task_ids[i], output
+
+    async def stream_async(
+        self,
+        ordered: bool = False,
+        max_buffer: Optional[int] = None,
+        initial_interval: float = 1.0,
+    ) -> AsyncGenerator[tuple[int, str, ProgramOutput], None]:
+        """
+        Yield `(index, task_id, output)` for each task as it becomes ready.
+
+        Outputs are cleared from `.outputs` once yielded to save memory, so each
+        output is streamed once.
+
+        Parameters:
+            ordered: Yield results in submission order. Only `max_buffer` tasks past
+                the oldest task not yet yielded are polled, so at most `max_buffer`
+                completed outputs are held while waiting for an earlier task.
+            max_buffer: Size of the reorder buffer when `ordered` is True. Defaults to
+                `chemcloud_stream_buffer`.
+            initial_interval: The minimum interval (in seconds) between polls of a
+                task (see `.get_async()`).
+
+        Yields:
+            Tuples of the task index, task ID and ProgramOutput. Failed tasks yield a
+                ProgramOutput with error/traceback information.
         """
-        Synchronous implementation of `as_completed_async`.
+        buffer = self._stream_buffer(ordered, max_buffer)
+        scheduler = self.client.poll_scheduler
+        watch = scheduler.watch(self, buffer.admit(), initial_interval)
+        try:
+            while buffer:
+                for i in buffer.put(await watch.next_ready()):
+                    yield self._release(i)
+                scheduler.add(watch, buffer.admit())
+        finally:
+            scheduler.unwatch(watch)
+
+    def stream(
+        self,
+        ordered: bool = False,
+        max_buffer: Optional[int] = None,
+        initial_interval: float = 1.0,
+    ) -> Generator[tuple[int, str, ProgramOutput], None, None]:
+        """
+        Synchronous implementation of `stream_async`.
 
         Cannot directly wrap async version due to it containing an AsyncGenerator, and
         asyncio.sleep() so we must reimplement the logic here.
         """
-        done_indices: set[int] = set()
-        interval = initial_interval
-
-        # Keep polling until all tasks are completed
-        while len(done_indices) < len(self.task_ids):
-            logger.debug("Polling for task completions...")
-            self.refresh()
-            any_new = False
-            for i, status in enumerate(self.statuses):
-                if i not in done_indices and status in READY_STATES:
-                    logger.info(
-                        f"Task {self.task_ids[i]} is complete with status {status}."
-                    )
-                    done_indices.add(i)
-                    any_new = True
-                    assert self.outputs[i] is not None
-                    yield cast(ProgramOutput, self.outputs[i])
-                    self.outputs[i] = None  # Clear the output to save memory
-
-            if any_new:
-                # Reset interval if new completions were found.
-                interval = initial_interval
-            else:
-                # Increase interval if nothing new was found.
-                interval = min(interval * 1.5, 30.0)
-                logger.debug(f"No new completions; sleeping {interval:.2f} seconds.")
-                sleep(interval)
+        buffer = self._stream_buffer(ordered, max_buffer)
+        queue = PollQueue()
+        for i in buffer.admit():
+            queue.push(i, time())
+
+        # Keep polling until all tasks are released
+        while buffer:
+            due = queue.pop_due(time())
+            if not due:
+                interval = cast(float, queue.next_due()) - time()
+                logger.debug(f"No tasks due; sleeping {interval:.2f} seconds.")
+                sleep(max(interval, 0))
+                continue
+            logger.debug(f"Polling {len(due)} task(s) for completion...")
+            self.refresh(due)
+            now = time()
+            for i in due:
+                if self._is_task_done(i):
+                    for j in buffer.put(i):
+                        yield self._release(j)
+                else:
+                    queue.push(i, now + self._next_poll_delay(i, initial_interval))
+            for i in buffer.admit():
+                queue.push(i, time())
 
     def _output_from_exception(
         self, exc: Exception, input_data: Inputs
@@ -353,6 +792,33 @@ class FutureOutput(BaseModel):
             provenance=Provenance(program=self.program),
         )
 
+    def _revoked_output(self, input_data: Inputs) -> ProgramOutput:
+        """Create a placeholder ProgramOutput for a task revoked by the client."""
+        return ProgramOutput(
+            input_data=input_data,
+            success=False,
+            data=Files(),
+            logs="Task was revoked by the client before it completed.",
+            traceback="",
+            provenance=Provenance(program=self.program),
+        )
+
+    def __getstate__(self) -> dict[Any, Any]:
+        """
+        Pickle the tasks and their client. Callbacks, their pending futures and lock
+        belong to this process and are not sent.
+        """
+        state = super().__getstate__()
+        state["__pydantic_private__"] = {"_refresh_cursor": self._refresh_cursor}
+        return state
+
+    def __setstate__(self, state: dict[Any, Any]) -> None:
+        state["__pydantic_private__"] = {
+            name: private.get_default(call_default_factory=True)
+            for name, private in self.__private_attributes__.items()
+        } | (state.get("__pydantic_private__") or {})
+        super().__setstate__(state)
+
     def model_dump(self, **kwargs) -> dict[str, Any]:
         """
         Custom dump method that replaces the `client` field with a minimal configuration
@@ -0,0 +1,267 @@
+"""Per-task poll scheduling for ChemCloud tasks."""
+
+import asyncio
+import heapq
+import logging
+import random
+from collections.abc import Callable, Hashable
+from itertools import count
+from time import time
+from typing import TYPE_CHECKING, Optional
+
+if TYPE_CHECKING:
+    from .models import FutureOutput
+
+logger = logging.getLogger(__name__)
+
+
+def next_poll_delay(
+    elapsed: float,
+    expected: Optional[float],
+    *,
+    initial_interval: float,
+    max_interval: float,
+    calctype_cost: float = 1.0,
+) -> float:
+    """
+    Return the delay (seconds) until a task should be polled again.
+
+    If the expected runtime of a task is known and has not passed, the task is polled
+    again after half of its remaining expected runtime so polls converge on the
+    expected completion time. Otherwise the delay grows in proportion to the time the
+    task has already been running; long-running calctypes back off faster.
+
+    Parameters:
+        elapsed: Seconds since the task was submitted.
+        expected: Expected wall time of the task in seconds, if known.
+        initial_interval: The minimum delay between polls.
+        max_interval: The maximum delay between polls.
+        calctype_cost: Relative cost of the task's calctype (1.0 for an energy).
+    """
+    if expected is not None and elapsed < expected:
+        delay = (expected - elapsed) / 2
+    else:
+        delay = elapsed * min(0.1 * calctype_cost**0.5, 0.5)
+    return min(max(delay, initial_interval), max_interval)
+
+
+class PollQueue:
+    """Priority queue of items (e.g., task indices) ordered by when they are due."""
+
+    def __init__(self) -> None:
+        self._heap: list[tuple[float, int, Hashable]] = []
+        self._counter = count()  # Tie breaker keeps insertion order for equal times
+
+    def push(self, item: Hashable, due: float) -> None:
+        """Schedule an item to be polled at time `due`."""
+        heapq.heappush(self._heap, (due, next(self._counter), item))
+
+    def pop_due(self, now: float, limit: Optional[int] = None) -> list:
+        """Remove and return up to `limit` items that are due at time `now`."""
+        due: list = []
+        while self._heap and self._heap[0][0] <= now:
+            if limit is not None and len(due) >= limit:
+                break
+            due.append(heapq.heappop(self._heap)[2])
+        return due
+
+    def next_due(self) -> Optional[float]:
+        """Time the next item is due or None if the queue is empty."""
+        return self._heap[0][0] if self._heap else None
+
+    def remove_if(self, predicate: Callable[[Hashable], bool]) -> None:
+        """Remove all items for which `predicate(item)` is True."""
+        self._heap = [entry for entry in self._heap if not predicate(entry[2])]
+        heapq.heapify(self._heap)
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+
+class ReorderBuffer:
+    """
+    Releases completed items in a fixed order with a bounded number in flight.
+
+    Items are admitted (e.g., polled) at most `capacity` ahead of the oldest item
+    not yet released, so at most `capacity` completed items wait in the buffer. If
+    `capacity` is None, every item is admitted at once and released as it completes.
+
+    Parameters:
+        order: The order in which items are released.
+        capacity: Maximum number of admitted items not yet released.
+    """
+
+    def __init__(self, order: list[int], capacity: Optional[int] = None):
+        if capacity is not None and capacity < 1:
+            raise ValueError("capacity must be at least 1.")
+        self._order = order
+        self._capacity = capacity
+        self._admitted = 0
+        self._released = 0
+        self._ready: set[int] = set()
+
+    def admit(self) -> list[int]:
+        """Return items that may now be put in flight."""
+        limit = len(self._order)
+        if self._capacity is not None:
+            limit = min(limit, self._released + self._capacity)
+        admitted = self._order[self._admitted : limit]
+        self._admitted = max(self._admitted, limit)
+        return admitted
+
+    def put(self, item: int) -> list[int]:
+        """Mark an item complete and return the items that can be released now."""
+        if self._capacity is None:
+            self._released += 1
+            return [item]
+        self._ready.add(item)
+        released = []
+        while (
+            self._released < len(self._order)
+            and self._order[self._released] in self._ready
+        ):
+            released.append(self._order[self._released])
+            self._ready.discard(released[-1])
+            self._released += 1
+        return released
+
+    def __len__(self) -> int:
+        """Number of items not yet released."""
+        return len(self._order) - self._released
+
+
+class Watch:
+    """
+    Registration of a FutureOutput's tasks with a `PollScheduler`.
+
+    Indices of tasks that become ready are put on `.ready` as they complete.
+    """
+
+    def __init__(
+        self, future: "FutureOutput", indices: list[int], initial_interval: float
+    ):
+        self.future = future
+        self.initial_interval = initial_interval
+        self.pending = set(indices)
+        self.ready: asyncio.Queue[int] = asyncio.Queue()
+        self.error: Optional[BaseException] = None
+        self.active = True
+
+    async def next_ready(self) -> int:
+        """Wait for the next ready task index. Re-raises errors from polling."""
+        index = await self.ready.get()
+        if self.error is not None:
+            raise self.error
+        return index
+
+
+class PollScheduler:
+    """
+    Client-level scheduler that polls the tasks of many FutureOutputs.
+
+    Futures register their unfinished tasks with `.watch()`. All tasks are merged into
+    one timeline ordered by each task's next poll time (see `next_poll_delay`). Poll
+    times are jittered so tasks submitted together drift apart, and the total poll
+    rate is limited to `max_polls_per_second`. Results are written to the owning
+    FutureOutput and the indices of ready tasks are dispatched to each watch.
+
+    Parameters:
+        max_polls_per_second: Maximum number of task polls per second.
+        jitter: Relative jitter applied to each poll delay (0.1 means +/-10%).
+    """
+
+    def __init__(self, *, max_polls_per_second: float, jitter: float):
+        if max_polls_per_second <= 0:
+            raise ValueError("max_polls_per_second must be positive.")
+        self.max_polls_per_second = max_polls_per_second
+        self.jitter = jitter
+        self._queue = PollQueue()
+        self._wakeup = asyncio.Event()
+        self._dispatcher: Optional[asyncio.Task] = None
+
+    def watch(
+        self, future: "FutureOutput", indices: list[int], initial_interval: float
+    ) -> Watch:
+        """Register tasks of a FutureOutput. All tasks are polled immediately."""
+        watch = Watch(future, [], initial_interval)
+        self.add(watch, indices)
+        return watch
+
+    def add(self, watch: Watch, indices: list[int]) -> None:
+        """Add more tasks of the watched FutureOutput to a watch."""
+        now = time()
+        for i in indices:
+            if watch.future._is_task_done(i):
+                watch.ready.put_nowait(i)
+            else:
+                watch.pending.add(i)
+                self._queue.push((watch, i), now)
+        self._wakeup.set()
+        if self._dispatcher is None or self._dispatcher.done():
+            self._dispatcher = asyncio.create_task(self._dispatch())
+
+    def unwatch(self, watch: Watch) -> None:
+        """Stop polling the tasks of a watch."""
+        watch.active = False
+        self._queue.remove_if(lambda item: item[0] is watch)  # type: ignore[index]
+        self._wakeup.set()
+
+    async def _dispatch(self) -> None:
+        """Poll tasks as they come due until no tasks are left."""
+        rate = self.max_polls_per_second
+        # Rates below 1/s still need room for a whole poll in the bucket
+        burst = max(rate, 1.0)
+        tokens, last = burst, time()
+        while self._queue:
+            now = time()
+            tokens, last = min(burst, tokens + (now - last) * rate), now
+            due = self._queue.pop_due(now, limit=int(tokens))
+            if due:
+                tokens -= len(due)
+                await self._poll(due)
+                continue
+            # Sleep until the next task is due, a token is available or a new watch
+            next_due = self._queue.next_due()
+            assert next_due is not None  # For mypy
+            wait = max(next_due - now, (1 - tokens) / rate)
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=max(wait, 0))
+            except asyncio.TimeoutError:
+                pass
+        logger.debug("No tasks left to poll. Stopping poll dispatcher.")
+
+    async def _poll(self, due: list[tuple[Watch, int]]) -> None:
+        """Refresh due tasks, grouped by watch, and dispatch or reschedule them."""
+        groups: dict[Watch, list[int]] = {}
+        now = time()
+        for watch, i in due:
+            if not watch.active:
+                continue
+            if watch.future._callbacks_backlogged():
+                # Backpressure for this watch only; try again later
+                self._queue.push((watch, i), now + watch.initial_interval)
+                continue
+            groups.setdefault(watch, []).append(i)
+        watches = list(groups)
+        logger.debug(f"Polling {len(due)} task(s) across {len(watches)} watch(es).")
+        results = await asyncio.gather(
+            *(w.future.refresh_async(groups[w]) for w in watches),
+            return_exceptions=True,
+        )
+        now = time()
+        for watch, result in zip(watches, results):
+            if isinstance(result, BaseException):
+                logger.error(f"Error polling tasks: {result}")
+                watch.error = result
+                watch.ready.put_nowait(-1)
+                self.unwatch(watch)
+                continue
+            for i in groups[watch]:
+                if watch.future._is_task_done(i):
+                    watch.pending.discard(i)
+                    watch.ready.put_nowait(i)
+                else:
+                    delay = watch.future._next_poll_delay(i, watch.initial_interval)
+                    delay *= random.uniform(1 - self.jitter, 1 + self.jitter)
+                    self._queue.push((watch, i), now + delay)
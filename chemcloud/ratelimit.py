@@ -0,0 +1,171 @@
+"""Node-wide limits on ChemCloud requests shared by every process on a machine."""
+
+import asyncio
+import json
+import logging
+import os
+import sys
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from pathlib import Path
+from time import time
+from typing import Any, Optional, Union
+
+from .filelock import FileLock
+
+logger = logging.getLogger(__name__)
+
+
+def _pid_alive(pid: int) -> bool:
+    if sys.platform == "win32":  # pragma: no cover
+        return True  # os.kill(pid, 0) would send CTRL_C_EVENT on Windows
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:  # Alive, owned by another user
+        return True
+    return True
+
+
+class NodeRateLimiter:
+    """
+    Token bucket and in-flight budget shared by all processes using the same state
+    file, so the whole machine stays within the limits however many clients run.
+
+    The state (bucket level and in-flight requests per process) is kept in a small
+    JSON file that is only read and written under a `FileLock`. Slots held by
+    processes that died are reclaimed.
+
+    Parameters:
+        path: The shared state file. A `.lock` file is created next to it.
+        rate: Requests per second allowed for the whole machine. None for no limit.
+        burst: Maximum number of requests that may be sent at once after an idle
+            period. Defaults to `max(rate, 1)`.
+        max_in_flight: Maximum number of requests in flight on the whole machine.
+            None for no limit.
+        poll_interval: Seconds to wait before checking again while the in-flight
+            budget is exhausted.
+    """
+
+    def __init__(
+        self,
+        path: Union[str, Path],
+        *,
+        rate: Optional[float] = None,
+        burst: Optional[float] = None,
+        max_in_flight: Optional[int] = None,
+        poll_interval: float = 0.05,
+    ):
+        if rate is not None and rate <= 0:
+            raise ValueError("rate must be positive.")
+        if max_in_flight is not None and max_in_flight < 1:
+            raise ValueError("max_in_flight must be at least 1.")
+        self.path = Path(path)
+        self.rate = rate
+        self.burst = burst if burst is not None else max(rate or 1.0, 1.0)
+        self.max_in_flight = max_in_flight
+        self.poll_interval = poll_interval
+
+    @property
+    def _lock_path(self) -> Path:
+        return self.path.with_name(f"{self.path.name}.lock")
+
+    def _read(self, now: float) -> dict[str, Any]:
+        try:
+            state = json.loads(self.path.read_text())
+        except (FileNotFoundError, ValueError):  # Missing or torn by a crash
+            state = {}
+        tokens = state.get("tokens", self.burst)
+        if self.rate is not None:
+            tokens += (now - state.get("updated", now)) * self.rate
+        in_flight = {
+            pid: n
+            for pid, n in state.get("in_flight", {}).items()
+            if n > 0 and (int(pid) == os.getpid() or _pid_alive(int(pid)))
+        }
+        return {
+            "tokens": min(tokens, self.burst),
+            "updated": now,
+            "in_flight": in_flight,
+        }
+
+    def _write(self, state: dict[str, Any]) -> None:
+        self.path.write_text(json.dumps(state))
+
+    def _take(self) -> float:
+        """
+        Take a slot if available. Returns 0 on success or the seconds to wait. The
+        caller must hold the lock.
+        """
+        now = time()
+        state = self._read(now)
+        wait = 0.0
+        if (
+            self.max_in_flight is not None
+            and sum(state["in_flight"].values()) >= self.max_in_flight
+        ):
+            wait = self.poll_interval
+        elif self.rate is not None and state["tokens"] < 1:
+            wait = (1 - state["tokens"]) / self.rate
+        else:
+            if self.rate is not None:
+                state["tokens"] -= 1
+            pid = str(os.getpid())
+            state["in_flight"][pid] = state["in_flight"].get(pid, 0) + 1
+        self._write(state)
+        return wait
+
+    async def acquire(self) -> None:
+        """Wait until a request may be sent and take a slot for it."""
+        while True:
+            # Held for a single read-modify-write, so poll it quickly.
+            async with FileLock(self._lock_path, poll_interval=0.005):
+                wait = self._take()
+            if not wait:
+                return
+            logger.debug(f"Node request limit reached; waiting {wait:.3f}s.")
+            await asyncio.sleep(wait)
+
+    def _return_slot(self) -> None:
+        """Return one of this process's in-flight slots. The caller must hold the lock."""
+        state = self._read(time())
+        pid = str(os.getpid())
+        state["in_flight"][pid] = max(state["in_flight"].get(pid, 0) - 1, 0)
+        self._write(state)
+
+    async def release_async(self) -> None:
+        """Return the in-flight slot taken by `acquire()`."""
+        async with FileLock(self._lock_path, poll_interval=0.005):
+            self._return_slot()
+
+    def release(self) -> None:
+        """Synchronous `release_async()`; blocks while the lock is held elsewhere."""
+        with FileLock(self._lock_path, poll_interval=0.005):
+            self._return_slot()
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        """Hold a slot for the duration of a request."""
+        await self.acquire()
+        try:
+            yield
+        finally:
+            # Shielded so a cancelled request still returns its slot without
+            # blocking the event loop on the lock.
+            release = asyncio.ensure_future(self.release_async())
+            try:
+                await asyncio.shield(release)
+            except asyncio.CancelledError:
+                if not release.done():
+                    # The task only awaits before writing, so cancelling it leaves
+                    # the slot taken; return it synchronously instead.
+                    release.cancel()
+                    self.release()
+                raise
+
+    def __repr__(self) -> str:
+        return (
+            f"{type(self).__name__}({self.path}, rate={self.rate}, "
+            f"burst={self.burst}, max_in_flight={self.max_in_flight})"
+        )
@@ -0,0 +1,130 @@
+"""Classification and resubmission of failed ChemCloud tasks."""
+
+import re
+from collections.abc import Mapping
+from enum import Enum
+from typing import Any, Optional
+
+from qcdata import ProgramOutput
+
+
+class FailureKind(str, Enum):
+    """Why a task failed."""
+
+    #: The SCF (or another iterative solver) did not converge.
+    SCF_CONVERGENCE = "SCF_CONVERGENCE"
+    #: The worker running the task died (killed, out of memory, lost heartbeat).
+    WORKER_LOST = "WORKER_LOST"
+    #: A transient network or server error unrelated to the calculation.
+    TRANSIENT = "TRANSIENT"
+    #: Anything else, e.g. invalid input. Not retried by default.
+    OTHER = "OTHER"
+
+
+# Patterns are matched against the traceback and logs of a failed ProgramOutput in
+# this order, so more specific kinds come first.
+FAILURE_PATTERNS: dict[FailureKind, re.Pattern] = {
+    FailureKind.WORKER_LOST: re.compile(
+        r"WorkerLostError|worker.{0,40}(lost|exited prematurely)|SIGKILL|signal 9"
+        r"|\bKilled\b",
+        re.IGNORECASE,
+    ),
+    FailureKind.SCF_CONVERGENCE: re.compile(
+        r"(scf|convergence).{0,80}(not converge|failed|failure)"
+        r"|(did not|failed to) converge|maximum number of .{0,20}iterations",
+        re.IGNORECASE,
+    ),
+    FailureKind.TRANSIENT: re.compile(
+        r"ConnectionError|ConnectionResetError|BrokenPipeError|timed out"
+        r"|Temporary failure|Service Unavailable|Bad Gateway|Gateway Time-?out"
+        # 502/503/504 only as HTTP statuses, not any number in the logs
+        r"|\bHTTP(?:/\S+)? 50[234]\b|\bstatus(?: code)?[ :=]+50[234]\b",
+        re.IGNORECASE,
+    ),
+}
+
+
+def classify_failure(output: Optional[ProgramOutput]) -> FailureKind:
+    """
+    Classify a failed task from the traceback and logs of its ProgramOutput.
+
+    Tasks that failed without returning a ProgramOutput are assumed to have lost
+    their worker.
+    """
+    if output is None:
+        return FailureKind.WORKER_LOST
+    text = f"{output.traceback or ''}\n{output.logs or ''}"
+    for kind, pattern in FAILURE_PATTERNS.items():
+        if pattern.search(text):
+            return kind
+    return FailureKind.OTHER
+
+
+class RetryPolicy:
+    """
+    Decides which failed tasks of a FutureOutput are resubmitted and with what input.
+
+    Subclass and override `classify` or `next_input` for custom behavior.
+
+    Parameters:
+        max_attempts: Maximum number of times a task is submitted, including the
+            first submission.
+        retry_on: Kinds of failure that are retried.
+        keyword_updates: Keywords merged into the input when resubmitting after a
+            failure of the given kind, e.g.
+            `{FailureKind.SCF_CONVERGENCE: {"maxiter": 300, "level_shift": 0.3}}`.
+    """
+
+    def __init__(
+        self,
+        max_attempts: int = 3,
+        retry_on: tuple[FailureKind, ...] = (
+            FailureKind.SCF_CONVERGENCE,
+            FailureKind.WORKER_LOST,
+            FailureKind.TRANSIENT,
+        ),
+        keyword_updates: Optional[Mapping[FailureKind, dict[str, Any]]] = None,
+    ):
+        self.max_attempts = max_attempts
+        self.retry_on = set(retry_on)
+        self.keyword_updates = dict(keyword_updates or {})
+
+    def classify(self, output: Optional[ProgramOutput]) -> FailureKind:
+        """Classify a failed task. Defaults to `classify_failure`."""
+        return classify_failure(output)
+
+    def should_retry(
+        self, output: Optional[ProgramOutput], attempts: int
+    ) -> Optional[FailureKind]:
+        """
+        Return the kind of failure if a task should be resubmitted, otherwise None.
+
+        Parameters:
+            output: The ProgramOutput of the failed task, if any.
+            attempts: Number of times the task has been submitted so far.
+        """
+        if attempts >= self.max_attempts:
+            return None
+        kind = self.classify(output)
+        return kind if kind in self.retry_on else None
+
+    def next_input(self, inp: Any, kind: FailureKind, attempt: int) -> Any:
+        """
+        Return the input to resubmit after a failure of kind `kind`.
+
+        Parameters:
+            inp: The input of the failed task.
+            kind: The kind of failure.
+            attempt: The number of the upcoming attempt (2 for the first retry).
+        """
+        updates = self.keyword_updates.get(kind)
+        if not updates or not hasattr(inp, "keywords"):
+            return inp
+        return inp.model_copy(update={"keywords": {**inp.keywords, **updates}})
+
+    def __repr__(self) -> str:
+        kinds = sorted(kind.value for kind in self.retry_on)
+        return (
+            f"{type(self).__name__}(max_attempts={self.max_attempts}, "
+            f"retry_on={kinds})"
+        )
@@ -0,0 +1,265 @@
+"""Cost estimation and local runtime history used to schedule ChemCloud tasks."""
+
+import abc
+import json
+import logging
+import threading
+from collections.abc import Callable
+from pathlib import Path
+from statistics import median
+from typing import Any, Optional
+
+from qcdata import ProgramOutput
+from typing_extensions import TypeAlias
+
+from .filelock import FileLock, atomic_write
+
+logger = logging.getLogger(__name__)
+
+# Maps (program, input) to a relative cost. Only the ordering of costs matters.
+CostEstimator: TypeAlias = Callable[[str, Any], float]
+
+# Rough relative cost multipliers used when no runtime history is available.
+CALCTYPE_COST = {
+    "energy": 1.0,
+    "gradient": 2.0,
+    "hessian": 20.0,
+    "optimization": 15.0,
+    "transition_state": 30.0,
+    "scan": 50.0,
+    "conformer_search": 100.0,
+}
+PROGRAM_COST = {
+    "crest": 5.0,
+    "bigchem": 2.0,
+}
+
+
+def _model_of(inp: Any) -> Optional[Any]:
+    """Return the model of an input, looking inside subprogram_args if needed."""
+    model = getattr(inp, "model", None)
+    if model is None:
+        subprogram_args = getattr(inp, "subprogram_args", None)
+        model = getattr(subprogram_args, "model", None)
+    return model
+
+
+def _natoms(inp: Any) -> int:
+    structure = getattr(inp, "structure", None)
+    return len(structure.symbols) if structure is not None else 1
+
+
+def _basis_cost(basis: Optional[str]) -> float:
+    """Relative cost of a basis set based on its name."""
+    if not basis:
+        return 1.0
+    name = basis.lower()
+    if "qz" in name:
+        cost = 20.0
+    elif "tz" in name or "6-311" in name:
+        cost = 6.0
+    elif "dz" in name or "svp" in name or "6-31" in name:
+        cost = 2.5
+    else:  # Minimal basis sets such as sto-3g
+        cost = 1.0
+    if "*" in name or "+" in name or "aug" in name:
+        cost *= 1.5
+    return cost
+
+
+def runtime_key(program: str, inp: Any) -> str:
+    """Key identifying "similar" calculations in the runtime history."""
+    model = _model_of(inp)
+    calctype = getattr(inp, "calctype", None)
+    parts = [
+        program,
+        str(getattr(calctype, "value", calctype)),
+        str(getattr(model, "method", None)).lower(),
+        str(getattr(model, "basis", None)).lower(),
+    ]
+    return "|".join(parts)
+
+
+class _JsonStore(abc.ABC):
+    """
+    Small dictionary persisted to a JSON file in the ChemCloud base directory.
+
+    Several processes may share the file. Changes recorded since the last save are
+    kept in `_pending` and merged into the file's current contents by `_merge`
+    under a `FileLock`, so concurrent saves don't drop each other's records.
+    """
+
+    def __init__(self, path: Optional[Path] = None):
+        self.path = path
+        self._data: dict[str, Any] = self._load() if path is not None else {}
+        self._pending: dict[str, Any] = {}
+        self._lock = threading.Lock()  # Guards _data and _pending
+
+    def _load(self) -> dict[str, Any]:
+        assert self.path is not None  # For mypy
+        try:
+            return json.loads(self.path.read_text())
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError):
+            logger.warning(f"Ignoring unreadable file at {self.path}.")
+            return {}
+
+    @abc.abstractmethod
+    def _merge(self, data: dict[str, Any], pending: dict[str, Any]) -> None:
+        """Apply changes recorded since the last save to `data` in place."""
+
+    def save(self) -> None:
+        """Merge changes recorded since the last save into the file at `path`."""
+        if self.path is None:
+            return
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return
+        try:
+            with FileLock(self.path.with_name(f"{self.path.name}.lock")):
+                data = self._load()
+                self._merge(data, pending)
+                atomic_write(self.path, json.dumps(data).encode("utf-8"))
+        except BaseException:
+            with self._lock:  # Keep the changes for the next save
+                self._merge(pending, self._pending)
+                self._pending = pending
+            raise
+        with self._lock:
+            # Pick up records saved by other processes
+            self._merge(data, self._pending)
+            self._data = data
+
+
+class RuntimeHistory(_JsonStore):
+    """
+    Locally recorded wall times of completed calculations.
+
+    Samples are stored per `runtime_key` as wall time per cubed atom count so a single
+    history can predict runtimes for molecules of different sizes.
+
+    Parameters:
+        path: JSON file the history is loaded from and saved to. If None, the
+            history is kept in memory only.
+        max_samples: Maximum number of samples kept per key.
+    """
+
+    def __init__(self, path: Optional[Path] = None, max_samples: int = 50):
+        super().__init__(path)
+        self.max_samples = max_samples
+
+    def record(self, program: str, inp: Any, output: ProgramOutput) -> None:
+        """Record the wall time of a successful ProgramOutput."""
+        wall_time = output.provenance.wall_time
+        if not output.success or wall_time is None:
+            return
+        key, sample = runtime_key(program, inp), wall_time / _natoms(inp) ** 3
+        with self._lock:
+            samples = self._data.setdefault(key, [])
+            samples.append(sample)
+            del samples[: -self.max_samples]
+            self._pending.setdefault(key, []).append(sample)
+
+    def _merge(self, data: dict[str, Any], pending: dict[str, Any]) -> None:
+        for key, new in pending.items():
+            samples = data.setdefault(key, [])
+            samples.extend(new)
+            del samples[: -self.max_samples]
+
+    def expected_wall_time(self, program: str, inp: Any) -> Optional[float]:
+        """Return the expected wall time (seconds) of an input or None if unknown."""
+        samples = self._data.get(runtime_key(program, inp))
+        if not samples:
+            return None
+        return median(samples) * _natoms(inp) ** 3
+
+
+class RaceStatistics(_JsonStore):
+    """
+    Number of races each candidate has won, per set of candidates and kind of input.
+
+    Parameters:
+        path: JSON file the statistics are loaded from and saved to. If None, the
+            statistics are kept in memory only.
+    """
+
+    @staticmethod
+    def key(labels: list[str], inp: Any) -> str:
+        """Key identifying races between the same candidates on similar inputs."""
+        return f"{','.join(sorted(labels))}|{runtime_key('race', inp)}"
+
+    def record(self, key: str, winner: str) -> None:
+        """Record the winner of a race."""
+        with self._lock:
+            self._merge(self._data, {key: {winner: 1}})
+            self._merge(self._pending, {key: {winner: 1}})
+
+    def _merge(self, data: dict[str, Any], pending: dict[str, Any]) -> None:
+        for key, new in pending.items():
+            wins = data.setdefault(key, {})
+            for label, won in new.items():
+                wins[label] = wins.get(label, 0) + won
+
+    def wins(self, key: str) -> dict[str, int]:
+        """Number of races won by each candidate."""
+        return dict(self._data.get(key, {}))
+
+    def favorite(
+        self, key: str, *, min_races: int, min_win_rate: float = 0.9
+    ) -> Optional[str]:
+        """
+        Return the candidate that wins so reliably that the race can be skipped.
+
+        Parameters:
+            key: The race key.
+            min_races: Minimum number of recorded races before a favorite is chosen.
+            min_win_rate: Fraction of races the favorite must have won.
+        """
+        wins = self._data.get(key, {})
+        races = sum(wins.values())
+        if not wins or races < min_races:
+            return None
+        label, won = max(wins.items(), key=lambda item: item[1])
+        return label if won / races >= min_win_rate else None
+
+
+class HeuristicCostEstimator:
+    """
+    Estimate the relative cost of an input.
+
+    Uses the expected wall time from a `RuntimeHistory` when similar calculations
+    have been recorded, otherwise falls back to a heuristic based on atom count,
+    basis set, calctype and program. Heuristic costs are in arbitrary units that
+    roughly track seconds so history and heuristic estimates can be mixed.
+
+    Parameters:
+        history: Optional history used to calibrate estimates.
+    """
+
+    def __init__(self, history: Optional[RuntimeHistory] = None):
+        self.history = history
+
+    def __call__(self, program: str, inp: Any) -> float:
+        if self.history is not None:
+            expected = self.history.expected_wall_time(program, inp)
+            if expected is not None:
+                return expected
+        model = _model_of(inp)
+        calctype = getattr(inp, "calctype", None)
+        return (
+            1e-3
+            * _natoms(inp) ** 3
+            * _basis_cost(getattr(model, "basis", None))
+            * CALCTYPE_COST.get(str(getattr(calctype, "value", calctype)), 1.0)
+            * PROGRAM_COST.get(program, 1.0)
+        )
+
+
+def longest_first(
+    program: str, inputs: list[Any], estimator: CostEstimator
+) -> list[int]:
+    """Return input indices ordered from most to least expensive (stable on ties)."""
+    costs = [estimator(program, inp) for inp in inputs]
+    return sorted(range(len(inputs)), key=lambda i: -costs[i])
@@ -0,0 +1,231 @@
+"""Split batches across several ChemCloud queues and service accounts."""
+
+import asyncio
+import logging
+from typing import Any, Literal, NamedTuple, Optional, Union
+
+from qcdata import ProgramOutput
+
+from .client import CCClient
+from .config import Settings, settings
+from .models import READY_STATES, TaskStatus
+
+logger = logging.getLogger(__name__)
+
+Routing = Literal["weighted", "least_loaded"]
+
+
+class ShardTarget(NamedTuple):
+    """A queue and the credentials profile used to submit to it."""
+
+    profile: Optional[str] = None
+    queue: Optional[str] = None
+    weight: float = 1.0
+
+
+def smooth_weighted(n: int, weights: list[float], credit: list[float]) -> list[int]:
+    """
+    Assign `n` items to targets by smooth weighted round-robin.
+
+    `credit` holds the running credit of each target and is updated in place, so
+    consecutive calls (including many calls with `n=1`) stay proportional to
+    `weights` and interleave the targets rather than sending runs to one of them.
+    """
+    total = sum(weights)
+    assigned = []
+    for _ in range(n):
+        for i, weight in enumerate(weights):
+            credit[i] += weight
+        best = max(range(len(weights)), key=credit.__getitem__)
+        credit[best] -= total
+        assigned.append(best)
+    return assigned
+
+
+class ShardedClient(CCClient):
+    """
+    Client that splits each batch across several `(profile, queue)` targets.
+
+    Each profile gets its own client and tokens. `compute_async` and everything built
+    on it (`FutureOutput`, sweeps, workflows, executors) work unchanged and return
+    one merged `FutureOutput`; polls, deletions and revocations of each task are sent
+    with the credentials of the target it was submitted to.
+
+    Usage:
+        ```python
+        client = ShardedClient(
+            [("default", "group-a", 2.0), ("service", "group-b", 1.0)],
+            routing="least_loaded",
+        )
+        outputs = client.compute("psi4", prog_inputs)
+        ```
+
+    Parameters:
+        targets: `ShardTarget`s or `(profile, queue[, weight])` tuples. A queue of
+            None keeps the queue `compute_async` would otherwise use.
+        routing: `"weighted"` sends inputs to the targets in proportion to their
+            weights, round-robin across batches (so single-input calls are spread
+            too).
+            `"least_loaded"` sends each input to the target with the fewest
+            unfinished tasks relative to its weight.
+        chemcloud_domain: The domain for the ChemCloud server.
+        settings: An instance of the Settings class. Defaults to the global settings
+            object.
+    """
+
+    def __init__(
+        self,
+        targets: list[Union[ShardTarget, tuple]],
+        *,
+        routing: Routing = "weighted",
+        chemcloud_domain: Optional[str] = None,
+        settings: Settings = settings,
+    ):
+        if not targets:
+            raise ValueError("Please provide at least one shard target.")
+        if routing not in ("weighted", "least_loaded"):
+            raise ValueError(f"Unknown routing {routing!r}.")
+        self.targets = [ShardTarget(*target) for target in targets]
+        if any(target.weight <= 0 for target in self.targets):
+            raise ValueError("Shard weights must be positive.")
+        self.routing = routing
+        super().__init__(
+            profile=self.targets[0].profile,
+            chemcloud_domain=chemcloud_domain,
+            settings=settings,
+        )
+        # One client (and token) per profile, shared by its targets
+        self._shards: dict[Optional[str], CCClient] = {}
+        for target in self.targets:
+            if target.profile not in self._shards:
+                self._shards[target.profile] = CCClient(
+                    profile=target.profile,
+                    chemcloud_domain=chemcloud_domain,
+                    settings=settings,
+                )
+        # Target of each unfinished task and number of unfinished tasks per target
+        self._owners: dict[str, int] = {}
+        self._outstanding = [0] * len(self.targets)
+        # Weighted round-robin credit, carried across submissions
+        self._credit = [0.0] * len(self.targets)
+
+    def __getstate__(self) -> dict[str, Any]:
+        return {
+            **super().__getstate__(),
+            "targets": self.targets,
+            "routing": self.routing,
+            "_shards": self._shards,
+            "_owners": self._owners,
+            "_outstanding": self._outstanding,
+            "_credit": self._credit,
+        }
+
+    def _assign(self, n: int) -> list[int]:
+        """Return the target index of each of `n` new inputs."""
+        weights = [target.weight for target in self.targets]
+        if self.routing == "weighted":
+            return smooth_weighted(n, weights, self._credit)
+        load = list(self._outstanding)
+        assigned = []
+        for _ in range(n):
+            i = min(range(len(load)), key=lambda i: (load[i] + 1) / weights[i])
+            load[i] += 1
+            assigned.append(i)
+        return assigned
+
+    def _shard_for(self, task_id: str) -> CCClient:
+        """Client of the task's target (the first target for unknown tasks)."""
+        target = self.targets[self._owners.get(task_id, 0)]
+        return self._shards[target.profile]
+
+    def _finish(self, task_id: str) -> None:
+        target = self._owners.pop(task_id, None)
+        if target is not None:
+            self._outstanding[target] -= 1
+
+    async def _submit_async(
+        self, inp_list: list[Any], url_params: dict[str, Any]
+    ) -> list[str]:
+        """Split the inputs across the targets and submit each share concurrently."""
+        assigned = self._assign(len(inp_list))
+        groups: dict[int, list[int]] = {}
+        for position, target in enumerate(assigned):
+            groups.setdefault(target, []).append(position)
+
+        async def submit(target_index: int, positions: list[int]) -> list[str]:
+            target = self.targets[target_index]
+            params = dict(url_params)
+            if target.queue:
+                params["queue"] = target.queue
+            task_ids = await self._shards[target.profile]._submit_async(
+                [inp_list[position] for position in positions], params
+            )
+            for task_id in task_ids:
+                self._owners[task_id] = target_index
+            self._outstanding[target_index] += len(task_ids)
+            return task_ids
+
+        logger.info(
+            f"Submitting {len(inp_list)} inputs to "
+            + ", ".join(
+                f"{self.targets[t].profile}@{self.targets[t].queue}: {len(p)}"
+                for t, p in groups.items()
+            )
+        )
+        results = await asyncio.gather(*(submit(t, p) for t, p in groups.items()))
+        task_ids = [""] * len(inp_list)
+        for positions, ids in zip(groups.values(), results):
+            for position, task_id in zip(positions, ids):
+                task_ids[position] = task_id
+        return task_ids
+
+    async def fetch_output_async(
+        self, task_id: str, delete: bool = True
+    ) -> tuple[TaskStatus, Optional[ProgramOutput]]:
+        status, output = await self._shard_for(task_id).fetch_output_async(
+            task_id, delete=delete
+        )
+        if status in READY_STATES:
+            self._finish(task_id)
+        return status, output
+
+    async def delete_output_async(self, task_id: str) -> None:
+        await self._shard_for(task_id).delete_output_async(task_id)
+
+    async def revoke_async(self, task_ids: list[str]) -> list[str]:
+        by_shard: dict[Optional[str], list[str]] = {}
+        for task_id in task_ids:
+            by_shard.setdefault(
+                self.targets[self._owners.get(task_id, 0)].profile, []
+            ).append(task_id)
+        revoked = await asyncio.gather(
+            *(
+                self._shards[profile].revoke_async(ids)
+                for profile, ids in by_shard.items()
+            )
+        )
+        # Tasks not revoked finish when their output is fetched
+        accepted = {task_id for ids in revoked for task_id in ids}
+        for task_id in accepted:
+            self._finish(task_id)
+        return [task_id for task_id in task_ids if task_id in accepted]
+
+    async def _pause_background_work(self) -> None:
+        await super()._pause_background_work()
+        for shard in self._shards.values():
+            await shard._pause_background_work()
+
+    async def _flush_deletions(self, timeout: Optional[float] = None) -> None:
+        await asyncio.gather(
+            super()._flush_deletions(timeout),
+            *(shard._flush_deletions(timeout) for shard in self._shards.values()),
+        )
+
+    async def close_async(self) -> None:
+        for shard in self._shards.values():
+            await shard.close_async()
+        await super().close_async()
+
+    def load(self) -> dict[ShardTarget, int]:
+        """Number of unfinished tasks submitted to each target."""
+        return dict(zip(self.targets, self._outstanding))
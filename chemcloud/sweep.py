@@ -0,0 +1,199 @@
+"""Lazily expanded parameter sweeps over structures, models and keywords."""
+
+import asyncio
+import logging
+from collections.abc import Callable, Iterator, Mapping, Sequence
+from itertools import product
+from typing import TYPE_CHECKING, Any, Optional, Union, cast
+
+import numpy as np
+from qcdata import ProgramOutput
+from qcdata.utils import json_dumps
+
+from .encoding import content_hash
+from .models import FutureOutput
+
+if TYPE_CHECKING:
+    from .client import CCClient
+
+logger = logging.getLogger(__name__)
+
+# Values of an axis, optionally keyed by the label used to select them.
+AxisValues = Union[Sequence[Any], Mapping[Any, Any]]
+# Builds the input of a grid point from the template and the point's values.
+PointBuilder = Callable[..., Any]
+
+
+def _labels_and_values(values: AxisValues) -> tuple[list[Any], list[Any]]:
+    """Split axis values into labels and values. Unlabeled values label themselves
+    if they are strings or numbers, otherwise by their position."""
+    if isinstance(values, Mapping):
+        return list(values), list(values.values())
+    values = list(values)
+    labels = [
+        value if isinstance(value, (str, int, float)) else i
+        for i, value in enumerate(values)
+    ]
+    return labels, values
+
+
+def apply_point(template: Any, **point: Any) -> Any:
+    """
+    Return a copy of `template` updated with the values of a grid point.
+
+    Recognized axes are `structure`, `method`, `basis` and `keywords` (a dict merged
+    into the template's keywords).
+    """
+    update: dict[str, Any] = {}
+    for name, value in point.items():
+        if name == "structure":
+            update["structure"] = value
+        elif name in ("method", "basis"):
+            model = update.get("model", template.model)
+            update["model"] = model.model_copy(update={name: value})
+        elif name == "keywords":
+            update["keywords"] = {**template.keywords, **value}
+        else:
+            raise ValueError(
+                f"Unknown sweep axis '{name}'. Pass `build` to use custom axes."
+            )
+    return template.model_copy(update=update)
+
+
+class Sweep:
+    """
+    A grid of inputs described by named axes and expanded lazily.
+
+    Parameters:
+        template: The input every grid point is derived from.
+        axes: Maps axis names to their values. Values may be a sequence or a mapping
+            from labels to values (e.g. `{"water": water, "ammonia": nh3}`).
+        build: Called as `build(template, **point)` to create the input of a grid
+            point. Defaults to `apply_point`.
+    """
+
+    def __init__(
+        self,
+        template: Any,
+        axes: Mapping[str, AxisValues],
+        build: Optional[PointBuilder] = None,
+    ):
+        self.template = template
+        self.build = build or apply_point
+        self.dims = list(axes)
+        self.coords: dict[str, list[Any]] = {}
+        self._values: list[list[Any]] = []
+        for name, values in axes.items():
+            labels, vals = _labels_and_values(values)
+            self.coords[name] = labels
+            self._values.append(vals)
+
+    @property
+    def shape(self) -> tuple[int, ...]:
+        return tuple(len(values) for values in self._values)
+
+    def __len__(self) -> int:
+        return int(np.prod(self.shape))
+
+    def points(self) -> Iterator[tuple[tuple[int, ...], Any]]:
+        """Yield `(index, input)` for every grid point without building the grid."""
+        for index in product(*(range(n) for n in self.shape)):
+            point = {
+                name: self._values[axis][i]
+                for axis, (name, i) in enumerate(zip(self.dims, index))
+            }
+            yield index, self.build(self.template, **point)
+
+
+class SweepResult:
+    """
+    ProgramOutputs of a Sweep arranged on its grid.
+
+    Index positionally with `result[i, j, ...]` or by label with
+    `result.sel(method="b3lyp", basis="6-31g")`.
+    """
+
+    def __init__(self, dims: list[str], coords: dict[str, list[Any]], outputs):
+        self.dims = dims
+        self.coords = coords
+        self.outputs: np.ndarray = outputs
+
+    @property
+    def shape(self) -> tuple[int, ...]:
+        return self.outputs.shape
+
+    def __getitem__(self, key):
+        return self.outputs[key]
+
+    def sel(self, **labels: Any) -> Union[ProgramOutput, "SweepResult"]:
+        """
+        Select outputs by axis labels. Axes not given are kept.
+
+        Returns:
+            A ProgramOutput if every axis is selected, otherwise a SweepResult over
+                the remaining axes.
+        """
+        unknown = set(labels) - set(self.dims)
+        if unknown:
+            raise KeyError(f"Unknown sweep axes: {sorted(unknown)}.")
+        key = tuple(
+            self.coords[name].index(labels[name]) if name in labels else slice(None)
+            for name in self.dims
+        )
+        selected = self.outputs[key]
+        if not isinstance(selected, np.ndarray):
+            return selected
+        dims = [name for name in self.dims if name not in labels]
+        return SweepResult(dims, {name: self.coords[name] for name in dims}, selected)
+
+    def __repr__(self) -> str:
+        axes = ", ".join(f"{name}={len(self.coords[name])}" for name in self.dims)
+        return f"{type(self).__name__}({axes})"
+
+
+async def run_sweep_async(
+    client: "CCClient",
+    program: str,
+    sweep: Sweep,
+    *,
+    window: int,
+    initial_interval: float = 1.0,
+    **compute_kwargs,
+) -> SweepResult:
+    """Run every point of a Sweep. See `CCClient.sweep_async`."""
+    outputs = np.empty(sweep.shape, dtype=object)
+    slots = asyncio.Semaphore(window)
+    # Grid points with identical inputs share one task
+    tasks: dict[str, asyncio.Task] = {}
+
+    async def run_point(inp: Any) -> ProgramOutput:
+        try:
+            future = cast(
+                FutureOutput,
+                await client.compute_async(
+                    program, inp, return_future=True, **compute_kwargs
+                ),
+            )
+            return cast(
+                ProgramOutput, await future.get_async(initial_interval=initial_interval)
+            )
+        finally:
+            slots.release()
+
+    digests: list[tuple[tuple[int, ...], str]] = []
+    try:
+        for index, inp in sweep.points():
+            digest = content_hash(json_dumps(inp).encode("utf-8"))
+            if digest not in tasks:
+                await slots.acquire()  # Expansion pauses while the window is full
+                tasks[digest] = asyncio.ensure_future(run_point(inp))
+            digests.append((index, digest))
+        logger.info(f"Sweep of {len(sweep)} points submitted as {len(tasks)} tasks.")
+        await asyncio.gather(*tasks.values())
+    finally:
+        for task in tasks.values():
+            task.cancel()
+        await asyncio.gather(*tasks.values(), return_exceptions=True)
+    for index, digest in digests:
+        outputs[index] = tasks[digest].result()
+    return SweepResult(sweep.dims, sweep.coords, outputs)
@@ -0,0 +1,311 @@
+"""Dependent computations that flow through ChemCloud one molecule at a time."""
+
+import asyncio
+import logging
+from collections.abc import Callable
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Optional, Union, cast
+
+from qcdata import ProgramOutput
+
+from .models import FutureOutput
+
+if TYPE_CHECKING:
+    from .client import CCClient
+
+logger = logging.getLogger(__name__)
+
+# Maps a completed upstream ProgramOutput to the next input (or None to stop).
+InputBuilder = Callable[[ProgramOutput], Optional[Any]]
+
+
+class Stage:
+    """
+    A node of a Workflow.
+
+    Parameters:
+        name: Unique name of the stage.
+        program: The program used to run the stage.
+        build: Maps the completed ProgramOutput of the parent stage to this stage's
+            input. Returning None skips the stage (and its children) for a molecule.
+            Root stages have no builder and run the inputs passed to the workflow.
+        after: Name of the parent stage. None for root stages.
+        compute_kwargs: Keyword arguments passed to `CCClient.compute_async`.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        program: str,
+        build: Optional[InputBuilder] = None,
+        after: Optional[str] = None,
+        **compute_kwargs,
+    ):
+        self.name = name
+        self.program = program
+        self.build = build
+        self.after = after
+        self.compute_kwargs = compute_kwargs
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.name}, program={self.program})"
+
+
+class StageProgress:
+    """Number of tasks submitted, completed and failed for a stage."""
+
+    def __init__(self) -> None:
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+
+    def __repr__(self) -> str:
+        return (
+            f"{type(self).__name__}(submitted={self.submitted}, "
+            f"completed={self.completed}, failed={self.failed})"
+        )
+
+
+class Workflow:
+    """
+    A DAG of dependent computations applied to each input molecule.
+
+    Each stage after the first maps the completed ProgramOutput of its parent to a
+    new input. When run, a downstream task is submitted as soon as its own upstream
+    task finishes, so molecules flow through the pipeline independently rather than
+    waiting for a whole stage to finish.
+
+    Usage:
+        ```python
+        workflow = (
+            Workflow()
+            .stage("opt", "geometric", **opt_kwargs)
+            .stage("hess", "bigchem", build=hessian_input)
+            .stage("sp", "terachem", build=single_point_input, after="opt")
+        )
+        results = client.run_workflow(workflow, prog_inputs)
+        results[0]["hess"]  # ProgramOutput of the hessian of the first molecule
+        ```
+    """
+
+    def __init__(self) -> None:
+        self.stages: dict[str, Stage] = {}
+        self._last: Optional[str] = None
+
+    def stage(
+        self,
+        name: str,
+        program: str,
+        build: Optional[InputBuilder] = None,
+        *,
+        after: Optional[str] = None,
+        **compute_kwargs,
+    ) -> "Workflow":
+        """
+        Add a stage to the workflow.
+
+        Parameters:
+            name: Unique name of the stage.
+            program: The program used to run the stage.
+            build: Maps the parent's ProgramOutput to this stage's input. Required for
+                every stage except the first.
+            after: Name of the parent stage. Defaults to the previously added stage.
+            **compute_kwargs: Keyword arguments passed to `CCClient.compute_async`.
+
+        Returns:
+            The workflow so calls can be chained.
+        """
+        if name in self.stages:
+            raise ValueError(f"Stage '{name}' already exists.")
+        after = after or (self._last if build is not None else None)
+        if after is not None and after not in self.stages:
+            raise ValueError(f"Unknown parent stage '{after}'.")
+        if (after is None) != (build is None):
+            raise ValueError(
+                "Every stage except root stages requires a build function."
+            )
+        self.stages[name] = Stage(name, program, build, after, **compute_kwargs)
+        self._last = name
+        return self
+
+    def children(self, name: Optional[str]) -> list[Stage]:
+        """Stages that depend on stage `name` (root stages if `name` is None)."""
+        return [stage for stage in self.stages.values() if stage.after == name]
+
+    async def run_async(
+        self,
+        client: "CCClient",
+        inputs: list[Any],
+        *,
+        checkpoint_dir: Optional[Union[str, Path]] = None,
+        initial_interval: float = 1.0,
+        on_progress: Optional[Callable[[dict[str, StageProgress]], None]] = None,
+    ) -> list[dict[str, ProgramOutput]]:
+        """
+        Run the workflow for each input. See `CCClient.run_workflow_async`.
+        """
+        if not self.stages:
+            raise ValueError("Please add stages to the workflow.")
+        checkpoint_path = Path(checkpoint_dir) if checkpoint_dir else None
+        if checkpoint_path is not None:
+            checkpoint_path.mkdir(parents=True, exist_ok=True)
+        progress = {name: StageProgress() for name in self.stages}
+        results: list[dict[str, ProgramOutput]] = [{} for _ in inputs]
+        nodes: set[asyncio.Task] = set()
+
+        def report() -> None:
+            logger.info(f"Workflow progress: {progress}")
+            if on_progress is not None:
+                on_progress(progress)
+
+        async def run_node(stage: Stage, index: int, inp: Any) -> None:
+            checkpoint = (
+                checkpoint_path / f"{stage.name}-{index}.json"
+                if checkpoint_path is not None
+                else None
+            )
+            if checkpoint is not None and checkpoint.is_file():
+                # Resume a task submitted by a previous run
+                future = FutureOutput.open(checkpoint)
+                future.client = client
+            else:
+                future = cast(
+                    FutureOutput,
+                    await client.compute_async(
+                        stage.program, inp, return_future=True, **stage.compute_kwargs
+                    ),
+                )
+                if checkpoint is not None:
+                    future.save(checkpoint)
+            progress[stage.name].submitted += 1
+            report()
+
+            output = cast(
+                ProgramOutput, await future.get_async(initial_interval=initial_interval)
+            )
+            if checkpoint is not None:
+                future.save(checkpoint)  # Checkpoint includes the output now
+            results[index][stage.name] = output
+            progress[stage.name].completed += 1
+            if not output.success:
+                progress[stage.name].failed += 1
+            report()
+
+            if not output.success:
+                return
+            for child in self.children(stage.name):
+                assert child.build is not None  # For mypy
+                next_inp = child.build(output)
+                if next_inp is not None:
+                    spawn(child, index, next_inp)
+
+        def spawn(stage: Stage, index: int, inp: Any) -> None:
+            node = asyncio.ensure_future(run_node(stage, index, inp))
+            nodes.add(node)
+
+        for stage in self.children(None):
+            for index, inp in enumerate(inputs):
+                spawn(stage, index, inp)
+
+        try:
+            while nodes:
+                done, _ = await asyncio.wait(nodes, return_when=asyncio.FIRST_COMPLETED)
+                nodes.difference_update(done)
+                for node in done:
+                    node.result()  # Re-raise errors
+        finally:
+            for node in nodes:
+                node.cancel()
+            await asyncio.gather(*nodes, return_exceptions=True)
+        return results
+
+
+def seed_wavefunction(
+    inp: Any, output: ProgramOutput, guess_keyword: str = "guess"
+) -> Any:
+    """
+    Return a copy of `inp` that uses the wavefunction of `output` as its guess.
+
+    The wavefunction files collected with `collect_wfn=True` are added to the input's
+    `files` and their names are set as `keywords[guess_keyword]`, the way
+    `examples/energy_wfn_input.py` does by hand. If `output` failed or collected no
+    files, `inp` is returned unchanged.
+
+    Parameters:
+        inp: The input to seed.
+        output: A completed ProgramOutput of a neighboring calculation.
+        guess_keyword: The program keyword that names the guess file(s).
+    """
+    files = getattr(output.data, "files", None) if output.success else None
+    if not files:
+        return inp
+    # Wavefunction files may be collected with their scratch directory prefix
+    wfn = {Path(name).name: content for name, content in files.items()}
+    return inp.model_copy(
+        update={
+            "files": {**inp.files, **wfn},
+            "keywords": {**inp.keywords, guess_keyword: " ".join(wfn)},
+        }
+    )
+
+
+async def run_chains_async(
+    client: "CCClient",
+    program: str,
+    chains: list[list[Any]],
+    *,
+    guess_keyword: str = "guess",
+    initial_interval: float = 1.0,
+    **compute_kwargs,
+) -> list[list[ProgramOutput]]:
+    """
+    Compute chains of correlated inputs, seeding each input with its predecessor's
+    wavefunction. See `CCClient.compute_chains_async`.
+    """
+
+    async def run_chain(chain: list[Any]) -> list[ProgramOutput]:
+        outputs: list[ProgramOutput] = []
+        for inp in chain:
+            if outputs:
+                inp = seed_wavefunction(inp, outputs[-1], guess_keyword)
+            future = cast(
+                FutureOutput,
+                await client.compute_async(
+                    program,
+                    inp,
+                    collect_wfn=True,
+                    return_future=True,
+                    **compute_kwargs,
+                ),
+            )
+            output = cast(
+                ProgramOutput, await future.get_async(initial_interval=initial_interval)
+            )
+            if not output.success:
+                logger.warning(
+                    f"Task {future.task_ids[0]} failed; the next input in its chain "
+                    "will start without a wavefunction guess."
+                )
+            outputs.append(output)
+        return outputs
+
+    return list(await asyncio.gather(*(run_chain(chain) for chain in chains)))
+
+
+def split_into_chains(inputs: list[Any], n_chains: int) -> list[list[Any]]:
+    """
+    Split ordered inputs (e.g., scan points or trajectory frames) into `n_chains`
+    contiguous chains of near-equal length.
+
+    More chains run more calculations in parallel; fewer chains warm-start more of
+    them from a neighbor's wavefunction.
+    """
+    if n_chains < 1:
+        raise ValueError("n_chains must be at least 1.")
+    size, extra = divmod(len(inputs), n_chains)
+    chains, start = [], 0
+    for i in range(min(n_chains, len(inputs))):
+        end = start + size + (1 if i < extra else 0)
+        chains.append(inputs[start:end])
+        start = end
+    return chains
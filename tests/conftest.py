@@ -3,7 +3,9 @@ import re
 from base64 import b64encode
 from pathlib import Path
 from time import time
+from typing import Any
 
+import httpx
 import pytest
 import tomli_w
 from pytest_httpx import HTTPXMock
@@ -12,7 +14,7 @@ from qcdata import CalcType, Model, ProgramInput, Structure
 from chemcloud.config import Settings
 
 
-def _jwt_from_payload(payload: dict[str, int]) -> str:
+def _jwt_from_payload(payload: dict[str, Any]) -> str:
     """Convert payload to fake JWT"""
     b64_encoded_access_token = b64encode(json.dumps(payload).encode("utf-8")).decode(
         "utf-8"
@@ -42,6 +44,16 @@ def patch_global_settings(settings):
     chemcloud.config.settings = original_settings
 
 
+@pytest.fixture(autouse=True)
+def discard_queued_deletions():
+    """Keep deletions queued by a test from being sent at interpreter exit"""
+    yield
+    from chemcloud.client import _live_clients
+
+    for client in list(_live_clients):
+        client._deletions._pending.clear()
+
+
 @pytest.fixture
 def credentials_file(settings):
     """Fixture for writing credentials files"""
@@ -123,18 +135,82 @@ def patch_compute_output_endpoint(httpx_mock: HTTPXMock, prog_input):
         method="GET", url=output_endpoint, json=response_data, is_reusable=True
     )
 
-    # Patch DELETE requests (assuming a 202 Accepted with no JSON body)
+    # Patch DELETE requests (assuming a 202 Accepted with no JSON body). Deletions
+    # are deferred until the next run() or close(), so they may not be requested.
     httpx_mock.add_response(
         method="DELETE",
         url=output_endpoint,
         status_code=202,
         json=None,
         is_reusable=True,
+        is_optional=True,
     )
 
     yield response_data
 
 
+class EchoServer:
+    """
+    Fake ChemCloud server that completes each task with its submitted input.
+
+    Records the submission request and input of each task and every poll of it.
+    """
+
+    def __init__(self) -> None:
+        self.requests: dict[str, httpx.Request] = {}
+        self.inputs: dict[str, dict] = {}
+        self.polls: dict[str, list[httpx.Request]] = {}
+
+    def compute_endpoint(self, request: httpx.Request) -> httpx.Response:
+        task_id = f"task_{len(self.requests)}"
+        self.requests[task_id] = request
+        self.inputs[task_id] = json.loads(request.content)
+        return httpx.Response(200, json=task_id)
+
+    def output_endpoint(self, request: httpx.Request) -> httpx.Response:
+        if request.method == "DELETE":
+            return httpx.Response(204)
+        task_id = request.url.path.rsplit("/", 1)[-1]
+        self.polls.setdefault(task_id, []).append(request)
+        output = {
+            "input_data": self.inputs[task_id],
+            "success": True,
+            "data": {"energy": -76.0},
+            "provenance": {"program": "psi4"},
+        }
+        return httpx.Response(200, json={"status": "SUCCESS", "program_output": output})
+
+
+@pytest.fixture
+def echo_server(request, httpx_mock: HTTPXMock) -> EchoServer:
+    """
+    Patch the openapi, compute and output endpoints with an `EchoServer`.
+
+    Supported programs default to `["psi4"]`; parametrize indirectly with a list to
+    change them.
+    """
+    server = EchoServer()
+    programs = getattr(request, "param", ["psi4"])
+    httpx_mock.add_response(
+        url=re.compile(r".*/openapi\.json$"),
+        json={"components": {"schemas": {"SupportedPrograms": {"enum": programs}}}},
+        is_reusable=True,
+    )
+    httpx_mock.add_callback(
+        server.compute_endpoint,
+        method="POST",
+        url=re.compile(r".*/compute\?.*"),
+        is_reusable=True,
+    )
+    httpx_mock.add_callback(
+        server.output_endpoint,
+        url=re.compile(r".*/compute/output/.*"),
+        is_reusable=True,
+        is_optional=True,
+    )
+    return server
+
+
 @pytest.fixture
 def patch_openapi_endpoint(httpx_mock: HTTPXMock):
     """Patch httpx methods against /openapi endpoint"""
@@ -0,0 +1,118 @@
+import asyncio
+import os
+import stat
+from contextlib import asynccontextmanager
+
+import pytest
+
+from chemcloud import CCClient
+from chemcloud.agent import Agent, AgentClient
+from chemcloud.exceptions import AgentError
+
+
+@asynccontextmanager
+async def running_agent(settings, jwt, **kwargs):
+    client = CCClient(settings=settings)
+    client._http_client._access_token = jwt
+    agent = Agent(client, settings.chemcloud_base_directory / "agent.sock", **kwargs)
+    server = asyncio.create_task(agent.serve_async())
+    while not agent.path.exists():
+        await asyncio.sleep(0.01)
+    try:
+        yield agent
+    finally:
+        server.cancel()
+        await asyncio.gather(server, return_exceptions=True)
+
+
+@pytest.mark.asyncio
+async def test_agent_computes_for_many_clients(settings, jwt, prog_input, echo_server):
+    inputs = [
+        prog_input.model_copy(update={"keywords": {"index": i}}) for i in range(3)
+    ]
+    async with running_agent(settings, jwt) as agent:
+        clients = [AgentClient(agent.path) for _ in range(4)]
+        results = await asyncio.gather(
+            *(c.compute_async("psi4", inputs) for c in clients)
+        )
+
+    for outputs in results:
+        assert isinstance(outputs, list)
+        assert [o.input_data.keywords["index"] for o in outputs] == [0, 1, 2]
+    assert len(echo_server.polls) == 12
+    assert not agent._results  # Delivered outputs are released
+
+
+@pytest.mark.asyncio
+async def test_agent_socket_is_owner_only_and_runs_are_saved(
+    settings, jwt, prog_input, echo_server, mocker
+):
+    umask = os.umask(0o022)
+    try:
+        async with running_agent(settings, jwt) as agent:
+            assert stat.S_IMODE(os.stat(agent.path).st_mode) == 0o600
+            assert os.umask(0o022) == 0o022  # Restored after binding
+            save = mocker.spy(agent.client.runtime_history, "save")
+
+            await AgentClient(agent.path).compute_async("psi4", [prog_input])
+            for _ in range(100):
+                if not agent._collectors:
+                    break
+                await asyncio.sleep(0.01)
+
+            save.assert_called_once()
+            assert agent.client._active_runs == 0
+    finally:
+        os.umask(umask)
+
+
+@pytest.mark.asyncio
+async def test_agent_fans_out_to_concurrent_subscribers(
+    settings, jwt, prog_input, echo_server
+):
+    async with running_agent(settings, jwt) as agent:
+        client = AgentClient(agent.path)
+        task_ids = await client.submit_async("psi4", [prog_input])
+
+        async def collect():
+            return [item async for item in client.as_completed_async(task_ids)]
+
+        first, second = await asyncio.gather(collect(), collect())
+
+    assert [task_id for _, task_id, _ in first] == task_ids
+    assert [task_id for _, task_id, _ in second] == task_ids
+
+
+@pytest.mark.asyncio
+async def test_agent_releases_uncollected_outputs(
+    settings, jwt, prog_input, echo_server
+):
+    async with running_agent(settings, jwt, result_ttl=0.05) as agent:
+        client = AgentClient(agent.path)
+        task_ids = await client.submit_async("psi4", [prog_input])
+        for _ in range(100):
+            if not agent._results:
+                break
+            await asyncio.sleep(0.01)
+
+        assert not agent._results and not agent._expiry
+        with pytest.raises(AgentError, match="not submitted through this agent"):
+            async for _ in client.as_completed_async(task_ids):
+                pass
+
+
+@pytest.mark.asyncio
+async def test_agent_rejects_unknown_tasks(settings, jwt):
+    async with running_agent(settings, jwt) as agent:
+        client = AgentClient(agent.path)
+        with pytest.raises(AgentError, match="not submitted through this agent"):
+            async for _ in client.as_completed_async(["someone_elses_task"]):
+                pass
+
+
+@pytest.mark.asyncio
+async def test_agent_client_without_agent_raises(tmp_path, prog_input):
+    client = AgentClient(tmp_path / "missing.sock")
+
+    with pytest.raises(AgentError, match="python -m chemcloud.agent"):
+        await client.compute_async("psi4", prog_input)
@@ -1,8 +1,15 @@
+import json
+import re
+
+import httpx
 import pytest
 from pytest_httpx import HTTPXMock
 from qcdata import ProgramOutput
 
-from chemcloud import CCClient, FutureOutput
+from chemcloud import CCClient, FutureOutput, encoding
+from chemcloud import client as client_module
+from chemcloud.encoding import decode_batch
+from chemcloud.exceptions import UnsupportedProgramError
 
 
 def test_version():
@@ -76,6 +83,7 @@ def test_compute_queue_explicit(
     explicit_queue = "explicit_queue"
     # Call compute() with an explicit queue
     client.compute("psi4", prog_input, queue=explicit_queue)
+    client.close()  # Flush the deferred deletion
 
     # Verify that _authenticated_request_async was called at least once with the correct queue.
     assert (
@@ -112,6 +120,7 @@ def test_compute_queue_from_client(
 
     # Call compute() without an explicit queue.
     client.compute("psi4", prog_input)
+    client.close()  # Flush the deferred deletion
 
     # Verify that _authenticated_request_async was called twice.
     assert (
@@ -147,6 +156,7 @@ def test_compute_queue_from_settings(
 
     # Call compute() without providing a queue.
     client.compute("psi4", prog_input)
+    client.close()  # Flush the deferred deletion
 
     # Verify that _authenticated_request_async was called twice.
     assert (
@@ -219,3 +229,365 @@ def test_compute_raise_value_error_empty_inp_objs(prog_input):
     # Empty list
     with pytest.raises(ValueError):
         client.compute("psi4", [])
+
+
+def test_compute_batch_uses_template_route_if_supported(
+    httpx_mock: HTTPXMock, prog_input, jwt
+):
+    httpx_mock.add_response(
+        url=re.compile(r".*/openapi\.json$"),
+        json={
+            "paths": {"/api/v2/compute/batch": {"post": {}}},
+            "components": {"schemas": {"SupportedPrograms": {"enum": ["psi4"]}}},
+        },
+    )
+    httpx_mock.add_response(
+        method="POST",
+        url=re.compile(r".*/compute/batch.*"),
+        json=["task_0", "task_1", "task_2"],
+    )
+    client = CCClient()
+    client._http_client._access_token = jwt
+
+    future = client.compute("psi4", [prog_input] * 3, return_future=True)
+
+    assert isinstance(future, FutureOutput)
+    assert future.task_ids == ["task_0", "task_1", "task_2"]
+    posts = [r for r in httpx_mock.get_requests() if r.method == "POST"]
+    assert len(posts) == 1
+    payload = json.loads(posts[0].content)
+    assert payload["geometry_shape"] == [3, 3, 3]
+    assert len(decode_batch(payload)) == 3
+
+
+def test_compute_batch_falls_back_to_per_input_route(
+    httpx_mock: HTTPXMock,
+    patch_openapi_endpoint,
+    patch_compute_endpoints,
+    prog_input,
+    jwt,
+):
+    client = CCClient()
+    client._http_client._access_token = jwt
+
+    future = client.compute("psi4", [prog_input] * 3, return_future=True)
+
+    assert isinstance(future, FutureOutput)
+    assert len(future.task_ids) == 3
+    posts = [r for r in httpx_mock.get_requests() if r.method == "POST"]
+    assert len(posts) == 3
+    assert all(r.url.path.endswith("/compute") for r in posts)
+
+
+def test_compute_batch_serializes_repeated_input_once(
+    settings,
+    httpx_mock: HTTPXMock,
+    patch_openapi_endpoint,
+    patch_compute_endpoints,
+    prog_input,
+    jwt,
+    mocker,
+):
+    settings.chemcloud_serialization_chunk_size = 2  # Force threaded chunks
+    client = CCClient(settings=settings)
+    client._http_client._access_token = jwt
+    spy = mocker.spy(encoding, "json_dumps")
+    template = mocker.spy(client_module, "batch_template")
+
+    future = client.compute("psi4", [prog_input] * 5, return_future=True)
+
+    assert isinstance(future, FutureOutput)
+    assert len(future.task_ids) == 5
+    assert spy.call_count == 1
+    template.assert_not_called()  # Server has no batch route
+    posts = [r for r in httpx_mock.get_requests() if r.method == "POST"]
+    assert len(posts) == 5
+    assert len({r.content for r in posts}) == 1
+
+
+def test_compute_order_by_cost_submits_expensive_first(
+    settings, httpx_mock: HTTPXMock, patch_openapi_endpoint, prog_input, jwt
+):
+    def task_id_from_keywords(request):
+        return httpx.Response(200, json=json.loads(request.content)["keywords"]["id"])
+
+    httpx_mock.add_callback(
+        task_id_from_keywords,
+        method="POST",
+        url=re.compile(r".*/compute"),
+        is_reusable=True,
+    )
+    inputs = [
+        prog_input.model_copy(update={"keywords": {"id": f"task_{i}", "cost": cost}})
+        for i, cost in enumerate([1.0, 3.0, 2.0])
+    ]
+    client = CCClient(settings=settings)
+    client._http_client._access_token = jwt
+
+    future = client.compute(
+        "psi4",
+        inputs,
+        return_future=True,
+        order_by_cost=lambda program, inp: inp.keywords["cost"],
+    )
+
+    # Outputs keep the caller's order while submission follows cost.
+    assert isinstance(future, FutureOutput)
+    assert future.task_ids == ["task_0", "task_1", "task_2"]
+    submitted = [
+        json.loads(r.content)["keywords"]["id"]
+        for r in httpx_mock.get_requests()
+        if r.method == "POST"
+    ]
+    assert submitted == ["task_1", "task_2", "task_0"]
+
+
+@pytest.fixture
+def race_server(httpx_mock: HTTPXMock, prog_input):
+    """Server where psi4 tasks finish immediately and terachem tasks never finish."""
+    revoked: list[str] = []
+    output = {
+        "input_data": prog_input.model_dump(),
+        "success": True,
+        "data": {"energy": -76.0},
+        "provenance": {"program": "psi4"},
+    }
+
+    def output_endpoint(request):
+        if request.method == "DELETE":
+            return httpx.Response(204)
+        if request.url.path.endswith("psi4_task"):
+            return httpx.Response(
+                200, json={"status": "SUCCESS", "program_output": output}
+            )
+        return httpx.Response(200, json={"status": "STARTED"})
+
+    def revoke_endpoint(request):
+        revoked.extend(json.loads(request.content))
+        return httpx.Response(200, json=None)
+
+    httpx_mock.add_response(
+        url=re.compile(r".*/openapi\.json$"),
+        json={
+            "paths": {"/api/v2/compute/revoke": {"post": {}}},
+            "components": {
+                "schemas": {"SupportedPrograms": {"enum": ["psi4", "terachem"]}}
+            },
+        },
+        is_reusable=True,
+    )
+    httpx_mock.add_callback(
+        lambda request: httpx.Response(
+            200, json=f"{request.url.params['program']}_task"
+        ),
+        method="POST",
+        url=re.compile(r".*/compute\?.*"),
+        is_reusable=True,
+    )
+    httpx_mock.add_callback(
+        output_endpoint,
+        url=re.compile(r".*/compute/output/.*"),
+        is_reusable=True,
+        is_optional=True,
+    )
+    httpx_mock.add_callback(
+        revoke_endpoint,
+        url=re.compile(r".*/compute/revoke"),
+        is_reusable=True,
+        is_optional=True,
+    )
+    return revoked
+
+
+def test_race_returns_first_success_and_revokes_losers(
+    settings, race_server, prog_input, jwt
+):
+    client = CCClient(settings=settings)
+    client._http_client._access_token = jwt
+
+    output = client.race(
+        ["psi4", ("terachem", "gpu")], prog_input, initial_interval=0.01
+    )
+
+    assert output.success is True
+    assert race_server == ["terachem_task"]
+    key = client.race_stats.key(["psi4", "terachem@gpu"], prog_input)
+    assert client.race_stats.wins(key) == {"psi4": 1}
+
+
+def test_race_skipped_for_reliable_winner(
+    settings, race_server, httpx_mock: HTTPXMock, prog_input, jwt
+):
+    client = CCClient(settings=settings)
+    client._http_client._access_token = jwt
+    key = client.race_stats.key(["psi4", "terachem"], prog_input)
+    for _ in range(3):
+        client.race_stats.record(key, "psi4")
+
+    output = client.race(
+        ["psi4", "terachem"], prog_input, initial_interval=0.01, skip_after=3
+    )
+
+    assert output.success is True
+    posts = [
+        r
+        for r in httpx_mock.get_requests()
+        if r.method == "POST" and r.url.path.endswith("/compute")
+    ]
+    assert [r.url.params["program"] for r in posts] == ["psi4"]
+
+
+def test_race_skip_after_zero_always_races(
+    settings, race_server, httpx_mock: HTTPXMock, prog_input, jwt
+):
+    settings.chemcloud_race_skip_after = 3
+    client = CCClient(settings=settings)
+    client._http_client._access_token = jwt
+    key = client.race_stats.key(["psi4", "terachem"], prog_input)
+    for _ in range(3):
+        client.race_stats.record(key, "psi4")
+
+    client.race(["psi4", "terachem"], prog_input, initial_interval=0.01, skip_after=0)
+
+    posts = [
+        r
+        for r in httpx_mock.get_requests()
+        if r.method == "POST" and r.url.path.endswith("/compute")
+    ]
+    assert sorted(r.url.params["program"] for r in posts) == ["psi4", "terachem"]
+
+
+def test_race_revokes_submitted_candidates_if_a_submission_fails(
+    settings, race_server, prog_input, jwt
+):
+    client = CCClient(settings=settings)
+    client._http_client._access_token = jwt
+
+    with pytest.raises(UnsupportedProgramError):
+        client.race(["terachem", "gaussian"], prog_input, initial_interval=0.01)
+
+    assert race_server == ["terachem_task"]
+
+
+def test_run_from_many_threads_shares_one_loop_and_connection_pool(
+    settings, httpx_mock: HTTPXMock
+):
+    from concurrent.futures import ThreadPoolExecutor
+
+    httpx_mock.add_response(
+        url=re.compile(r".*/hello-world.*"), json="Hello!", is_reusable=True
+    )
+    client = CCClient(settings=settings)
+
+    async def pool_id() -> int:
+        await client._http_client._request_async("get", "/hello-world", api_call=False)
+        return id(client._http_client.async_client)
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        ids = list(pool.map(lambda _: client.run(pool_id()), range(32)))
+
+    assert len(set(ids)) == 1
+    assert len(httpx_mock.get_requests()) == 32
+    client.close()
+    assert client._loop is None
+
+
+def test_run_from_background_loop_raises(settings):
+    client = CCClient(settings=settings)
+
+    async def nested_run() -> None:
+        client.run(client.openapi_spec_async())
+
+    with pytest.raises(RuntimeError, match="own thread"):
+        client.run(nested_run())
+    client.close()
+
+
+def test_interrupted_run_cancels_its_coroutine(settings):
+    import asyncio
+    import os
+    import signal
+    import threading
+
+    client = CCClient(settings=settings)
+    cancelled = threading.Event()
+
+    async def poll_forever() -> None:
+        try:
+            await asyncio.sleep(60)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    threading.Timer(0.1, os.kill, (os.getpid(), signal.SIGINT)).start()  # Ctrl-C
+    with pytest.raises(KeyboardInterrupt):
+        client.run(poll_forever())
+
+    assert cancelled.is_set()
+    assert client._active_runs == 0  # So background work is paused again
+    client.close()
+
+
+def test_pickled_client_keeps_config_and_token_but_not_connections(
+    settings, httpx_mock: HTTPXMock, jwt
+):
+    import pickle
+
+    httpx_mock.add_response(
+        url=re.compile(r".*/hello-world.*"), json="Hello!", is_reusable=True
+    )
+    client = CCClient(settings=settings, queue="gpu", profile="worker")
+    client._http_client._access_token = jwt
+    client._http_client._refresh_token = "refresh"
+    client.hello_world()  # Starts the background loop and a connection pool
+
+    clone = pickle.loads(pickle.dumps(client))
+
+    assert clone.queue == "gpu"
+    assert clone.profile == "worker"
+    assert clone._settings == settings
+    assert clone._http_client._access_token == jwt
+    assert clone._http_client._refresh_token == "refresh"
+    assert clone._loop is None
+    assert not clone._http_client._loop_state
+    assert clone.hello_world() == "Hello!"  # Rebuilt lazily
+    client.close()
+    clone.close()
+
+
+def test_pickled_client_excludes_passwords(settings, jwt):
+    import pickle
+
+    settings = settings.model_copy(
+        update={"chemcloud_username": "env@example.com", "chemcloud_password": "env-pw"}
+    )
+    client = CCClient(
+        chemcloud_username="me@example.com",
+        chemcloud_password="hunter2",
+        settings=settings,
+    )
+    client._http_client._access_token = jwt
+
+    data = pickle.dumps(client)
+
+    assert b"hunter2" not in data and b"env-pw" not in data
+    clone = pickle.loads(data)
+    assert clone._http_client._access_token == jwt
+    assert clone._settings.chemcloud_password is None
+    assert client._http_client._chemcloud_password == "hunter2"  # Left untouched
+
+
+def test_fork_resets_loop_bound_state(settings, jwt):
+    from chemcloud.client import _reset_clients_after_fork
+
+    client = CCClient(settings=settings)
+    client._http_client._access_token = jwt
+    client._http_client._token_mutex.acquire()  # Held by a thread at fork time
+    loop = client._background_loop
+
+    _reset_clients_after_fork()  # What the child runs after os.fork()
+
+    assert client._loop is None
+    assert client._http_client._token_mutex.acquire(blocking=False)
+    assert client._http_client._access_token == jwt
+    loop.stop()
@@ -0,0 +1,69 @@
+import asyncio
+
+import pytest
+
+from chemcloud import CCClient
+
+
+@pytest.mark.asyncio
+async def test_concurrent_calls_are_submitted_as_one_batch(
+    settings, jwt, prog_input, echo_server, mocker
+):
+    client = CCClient(settings=settings)
+    client._http_client._access_token = jwt
+    compute = mocker.spy(client, "compute_async")
+    coalescer = client.coalescer(window=0.05, initial_interval=0.01)
+
+    async def handler(i):
+        inp = prog_input.model_copy(update={"keywords": {"index": i}})
+        return await coalescer.compute_async("psi4", inp)
+
+    outputs = await asyncio.gather(*(handler(i) for i in range(8)))
+
+    assert [o.input_data.keywords["index"] for o in outputs] == list(range(8))
+    compute.assert_called_once()
+    assert len(compute.call_args.args[1]) == 8
+    await client.close_async()
+
+
+@pytest.mark.asyncio
+async def test_batches_split_by_options_and_size(
+    settings, jwt, prog_input, echo_server, mocker
+):
+    client = CCClient(settings=settings)
+    client._http_client._access_token = jwt
+    compute = mocker.spy(client, "compute_async")
+    coalescer = client.coalescer(window=0.05, max_batch_size=2, initial_interval=0.01)
+
+    await asyncio.gather(
+        coalescer.compute_async("psi4", prog_input),
+        coalescer.compute_async("psi4", prog_input),
+        coalescer.compute_async("psi4", prog_input),
+        coalescer.compute_async("psi4", prog_input, collect_files=True),
+    )
+
+    sizes = sorted(
+        (len(call.args[1]), call.kwargs.get("collect_files", False))
+        for call in compute.call_args_list
+    )
+    assert sizes == [(1, False), (1, True), (2, False)]
+    await client.close_async()
+
+
+@pytest.mark.asyncio
+async def test_early_flush_cancels_window_timer(settings, jwt, prog_input, echo_server):
+    client = CCClient(settings=settings)
+    client._http_client._access_token = jwt
+    coalescer = client.coalescer(window=0.2, max_batch_size=2, initial_interval=0.01)
+
+    first = asyncio.gather(
+        coalescer.compute_async("psi4", prog_input),
+        coalescer.compute_async("psi4", prog_input),
+    )
+    await asyncio.sleep(0.15)
+    late = asyncio.ensure_future(coalescer.compute_async("psi4", prog_input))
+    await asyncio.sleep(0.1)  # Past the first batch's window, within the new one
+
+    assert len(coalescer._batches) == 1  # Not flushed by the first batch's timer
+    await asyncio.gather(first, late)
+    await client.close_async()
@@ -0,0 +1,135 @@
+import asyncio
+import json
+import re
+
+import httpx
+import pytest
+from pytest_httpx import HTTPXMock
+
+from chemcloud import CCClient
+
+
+def _openapi(httpx_mock: HTTPXMock, paths: dict) -> None:
+    httpx_mock.add_response(
+        url=re.compile(r".*/openapi\.json$"), json={"paths": paths}, is_reusable=True
+    )
+
+
+def _delete_requests(httpx_mock: HTTPXMock):
+    return [r for r in httpx_mock.get_requests() if r.method == "DELETE"]
+
+
+@pytest.mark.asyncio
+async def test_deletions_sent_in_bulk_if_supported(settings, httpx_mock, jwt):
+    _openapi(httpx_mock, {"/api/v2/compute/output": {"delete": {}}})
+    httpx_mock.add_response(
+        method="DELETE", url=re.compile(r".*/compute/output$"), status_code=204
+    )
+    client = CCClient(settings=settings)
+    client._http_client._access_token = jwt
+
+    for task_id in ["a", "b", "c"]:
+        client._deletions.add(task_id)
+    await client.close_async()
+
+    requests = _delete_requests(httpx_mock)
+    assert len(requests) == 1
+    assert json.loads(requests[0].content) == ["a", "b", "c"]
+    assert len(client._deletions) == 0
+
+
+@pytest.mark.asyncio
+async def test_deletions_fall_back_to_one_request_per_task(settings, httpx_mock, jwt):
+    _openapi(httpx_mock, {})
+    httpx_mock.add_response(
+        method="DELETE",
+        url=re.compile(r".*/compute/output/.*"),
+        status_code=204,
+        is_reusable=True,
+    )
+    client = CCClient(settings=settings)
+    client._http_client._access_token = jwt
+
+    for task_id in ["a", "b"]:
+        client._deletions.add(task_id)
+    await client._deletions.flush()
+
+    assert [r.url.path.rsplit("/", 1)[-1] for r in _delete_requests(httpx_mock)] == [
+        "a",
+        "b",
+    ]
+
+
+@pytest.mark.asyncio
+async def test_ids_added_during_a_flush_are_deleted_once(settings, httpx_mock, jwt):
+    _openapi(httpx_mock, {})
+
+    async def slow_delete(request):
+        await asyncio.sleep(0.01)
+        return httpx.Response(204)
+
+    httpx_mock.add_callback(
+        slow_delete,
+        method="DELETE",
+        url=re.compile(r".*/compute/output/.*"),
+        is_reusable=True,
+    )
+    settings.chemcloud_delete_delay = 0
+    client = CCClient(settings=settings)
+    client._http_client._access_token = jwt
+
+    for task_id in ["t0", "t1"]:
+        client._deletions.add(task_id)
+    flush = asyncio.create_task(client._deletions.flush())
+    await asyncio.sleep(0.005)  # The flush is sending t0
+    client._deletions.add("t2")
+    await flush
+    await client._deletions.flush()
+
+    deleted = [r.url.path.rsplit("/", 1)[-1] for r in _delete_requests(httpx_mock)]
+    assert sorted(deleted) == ["t0", "t1", "t2"]
+    assert len(client._deletions) == 0
+
+
+def test_run_returns_without_sending_queued_deletions(settings, httpx_mock, jwt):
+    httpx_mock.add_response(
+        method="DELETE",
+        url=re.compile(r".*/compute/output/.*"),
+        status_code=204,
+    )
+    settings.chemcloud_delete_delay = 60  # Never sent in the background
+    client = CCClient(settings=settings)
+    client._http_client._access_token = jwt
+
+    async def collect():
+        client._deletions.add("a")
+
+    client.run(collect())
+    assert len(client._deletions) == 1
+    assert not _delete_requests(httpx_mock)
+
+    client.close()
+    assert len(client._deletions) == 0
+    assert len(_delete_requests(httpx_mock)) == 1
+
+
+def test_queued_deletions_are_flushed_at_exit(settings, httpx_mock, jwt):
+    from chemcloud.client import _flush_deletions_at_exit
+
+    httpx_mock.add_response(
+        method="DELETE",
+        url=re.compile(r".*/compute/output/.*"),
+        status_code=204,
+    )
+    settings.chemcloud_delete_delay = 60
+    client = CCClient(settings=settings)
+    client._http_client._access_token = jwt
+
+    async def collect():
+        client._deletions.add("a")
+
+    client.run(collect())
+    _flush_deletions_at_exit()  # What atexit runs
+
+    assert len(_delete_requests(httpx_mock)) == 1
+    client.close()
@@ -0,0 +1,81 @@
+import json
+
+import numpy as np
+from qcdata import ProgramInput
+from qcdata.utils import json_dumps
+
+from chemcloud import encoding
+from chemcloud.encoding import PayloadCache, batch_template, decode_batch, encode_batch
+
+
+def _displaced(prog_input, shift: float) -> ProgramInput:
+    structure = prog_input.structure.model_copy(
+        update={"geometry": prog_input.structure.geometry + shift}
+    )
+    return prog_input.model_copy(update={"structure": structure})
+
+
+def test_batch_template_excludes_geometry(prog_input):
+    inputs = [_displaced(prog_input, 0.1 * i) for i in range(3)]
+    template = batch_template(inputs)
+
+    assert template is not None
+    assert "geometry" not in template["structure"]
+    assert template["structure"]["symbols"] == prog_input.structure.symbols
+    assert template["keywords"] == prog_input.keywords
+
+
+def test_batch_template_none_if_inputs_differ(prog_input):
+    other = prog_input.model_copy(update={"keywords": {"maxiter": 200}})
+    assert batch_template([prog_input, other]) is None
+
+
+def test_batch_template_dumps_repeated_input_once(prog_input, mocker):
+    dump = mocker.spy(ProgramInput, "model_dump")
+
+    assert batch_template([prog_input] * 100) is not None
+    assert dump.call_count == 1
+
+
+def test_batch_template_none_for_single_input(prog_input):
+    assert batch_template([prog_input]) is None
+
+
+def test_encode_decode_round_trip(prog_input):
+    inputs = [_displaced(prog_input, 0.1 * i) for i in range(4)]
+    template = batch_template(inputs)
+    assert template is not None
+
+    payload = encode_batch(inputs, template)
+    assert payload["geometry_shape"] == [4, 3, 3]
+
+    decoded = decode_batch(payload)
+    assert len(decoded) == len(inputs)
+    for original, data in zip(inputs, decoded):
+        restored = ProgramInput.model_validate(data)
+        assert np.array_equal(restored.structure.geometry, original.structure.geometry)
+        assert restored.model == original.model
+        assert restored.keywords == original.keywords
+
+
+def test_payload_cache_serializes_identical_objects_once(prog_input, mocker):
+    spy = mocker.spy(encoding, "json_dumps")
+    cache = PayloadCache()
+
+    payloads = cache.serialize_many([prog_input] * 5)
+
+    assert spy.call_count == 1
+    assert len(cache) == 1
+    assert all(payload is payloads[0] for payload in payloads)
+    assert json.loads(payloads[0]) == json.loads(json_dumps(prog_input))
+
+
+def test_payload_cache_dedupes_equal_objects_by_content(prog_input):
+    copy = prog_input.model_copy(deep=True)
+    cache = PayloadCache()
+
+    first, second = cache.serialize_many([prog_input, copy])
+
+    assert first is second
+    assert len(cache) == 1
+    assert cache.hash_of(prog_input) == cache.hash_of(copy)
@@ -0,0 +1,63 @@
+from concurrent.futures import CancelledError, wait
+
+import pytest
+
+from chemcloud import CCClient
+
+
+def test_executor_returns_standard_futures(settings, jwt, prog_input, echo_server):
+    client = CCClient(settings=settings)
+    client._http_client._access_token = jwt
+    inputs = [
+        prog_input.model_copy(update={"keywords": {"index": i}}) for i in range(5)
+    ]
+
+    with client.executor(initial_interval=0.01) as executor:
+        futures = [executor.submit("psi4", inp) for inp in inputs]
+        done, _ = wait(futures, timeout=10)
+        mapped = list(executor.map("psi4", inputs[:2]))
+
+    assert len(done) == 5
+    assert [f.result().input_data.keywords["index"] for f in futures] == list(range(5))
+    assert [output.input_data.keywords["index"] for output in mapped] == [0, 1]
+    with pytest.raises(RuntimeError):
+        executor.submit("psi4", prog_input)
+
+
+def test_executor_drops_inputs_cancelled_before_sending(
+    settings, jwt, prog_input, echo_server
+):
+    client = CCClient(settings=settings)
+    client._http_client._access_token = jwt
+    executor = client.executor(batch_delay=0.2, initial_interval=0.01)
+
+    cancelled = executor.submit("psi4", prog_input)
+    kept = executor.submit(
+        "psi4", prog_input.model_copy(update={"keywords": {"kept": True}})
+    )
+    cancelled.cancel()
+    executor.shutdown()
+
+    with pytest.raises(CancelledError):
+        cancelled.result()
+    assert kept.result().success is True
+    assert [inp["keywords"] for inp in echo_server.inputs.values()] == [{"kept": True}]
+
+
+def test_executor_pauses_and_saves_once_on_shutdown(
+    settings, jwt, prog_input, echo_server, mocker
+):
+    client = CCClient(settings=settings)
+    client._http_client._access_token = jwt
+    pause = mocker.spy(client, "_pause_background_work")
+    save = mocker.spy(client.runtime_history, "save")
+
+    with client.executor(batch_delay=0.01, initial_interval=0.01) as executor:
+        futures = [executor.submit("psi4", prog_input) for _ in range(20)]
+        wait(futures, timeout=10)
+        assert pause.call_count == 0 and save.call_count == 0
+
+    assert all(f.result().success for f in futures)
+    assert pause.call_count == 1
+    assert save.call_count == 1
+    client.close()
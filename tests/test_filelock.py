@@ -0,0 +1,41 @@
+import asyncio
+
+import pytest
+
+from chemcloud.filelock import FileLock, atomic_write
+
+
+def test_file_lock_excludes_other_holders(tmp_path):
+    path = tmp_path / "locks" / "shared.lock"
+    with FileLock(path):
+        other = FileLock(path)
+        assert other.acquire(blocking=False) is False
+        assert not other.locked
+    assert other.acquire(blocking=False) is True
+    other.release()
+
+
+@pytest.mark.asyncio
+async def test_file_lock_async_waits_for_holder(tmp_path):
+    path = tmp_path / "shared.lock"
+    order = []
+
+    async def hold(name: str) -> None:
+        async with FileLock(path, poll_interval=0.01):
+            order.append(f"{name} start")
+            await asyncio.sleep(0.05)
+            order.append(f"{name} end")
+
+    await asyncio.gather(hold("a"), hold("b"))
+
+    assert order == ["a start", "a end", "b start", "b end"]
+
+
+def test_atomic_write_replaces_file_without_leftovers(tmp_path):
+    path = tmp_path / "credentials"
+    path.write_bytes(b"old")
+
+    atomic_write(path, b"new")
+
+    assert path.read_bytes() == b"new"
+    assert [p.name for p in tmp_path.iterdir()] == ["credentials"]
@@ -0,0 +1,126 @@
+import json
+import re
+
+import httpx
+import numpy as np
+import pytest
+from qcdata import CalcType
+
+from chemcloud import CCClient
+from chemcloud.finite_difference import derivative, displacements
+
+# Pairwise spring constants of a translationally invariant quadratic potential
+K = np.array([[0.0, 0.5, 0.3], [0.5, 0.0, 0.2], [0.3, 0.2, 0.0]])
+
+
+def _energy(geom):
+    diff = geom[:, None, :] - geom[None, :, :]
+    return 0.5 * np.sum(K[:, :, None] * diff**2)
+
+
+def _gradient(geom):
+    return 2 * (K.sum(axis=1)[:, None] * geom - K @ geom)
+
+
+def _hessian():
+    return np.kron(2 * (np.diag(K.sum(axis=1)) - K), np.eye(3))
+
+
+@pytest.mark.parametrize("scheme", ["central", "forward"])
+@pytest.mark.parametrize("translational", [True, False])
+def test_derivative_of_quadratic_potential(water, scheme, translational):
+    geom = water.geometry
+    disp = displacements(3, 1e-3, scheme, translational)
+    energies = np.array([[_energy(geom + d)] for d in disp])
+    gradients = np.array([_gradient(geom + d).ravel() for d in disp])
+
+    gradient = derivative(energies, 3, 1e-3, scheme, translational)
+    hessian = derivative(gradients, 3, 1e-3, scheme, translational)
+
+    assert len(disp) == (2 if scheme == "central" else 1) * (
+        6 if translational else 9
+    ) + (scheme == "forward")
+    tol = 1e-6 if scheme == "central" else 1e-2
+    assert np.allclose(gradient.reshape(3, 3), _gradient(geom), atol=tol)
+    assert np.allclose(hessian, _hessian(), atol=1e-6)
+
+
+@pytest.fixture
+def potential_server(httpx_mock):
+    """Server evaluating the quadratic potential at each submitted geometry."""
+    submitted: dict[str, dict] = {}
+
+    def compute_endpoint(request):
+        task_id = f"task_{len(submitted)}"
+        submitted[task_id] = json.loads(request.content)
+        return httpx.Response(200, json=task_id)
+
+    def output_endpoint(request):
+        task_id = request.url.path.rsplit("/", 1)[-1]
+        if request.method == "DELETE":
+            return httpx.Response(204)
+        inp = submitted[task_id]
+        geom = np.array(inp["structure"]["geometry"]).reshape(-1, 3)
+        if inp["calctype"] == "energy":
+            data = {"energy": _energy(geom)}
+        else:
+            data = {"energy": _energy(geom), "gradient": _gradient(geom).tolist()}
+        output = {
+            "input_data": inp,
+            "success": True,
+            "data": data,
+            "provenance": {"program": "psi4"},
+        }
+        return httpx.Response(200, json={"status": "SUCCESS", "program_output": output})
+
+    httpx_mock.add_response(
+        url=re.compile(r".*/openapi\.json$"),
+        json={"components": {"schemas": {"SupportedPrograms": {"enum": ["psi4"]}}}},
+        is_reusable=True,
+    )
+    httpx_mock.add_callback(
+        compute_endpoint,
+        method="POST",
+        url=re.compile(r".*/compute\?.*"),
+        is_reusable=True,
+    )
+    httpx_mock.add_callback(
+        output_endpoint,
+        url=re.compile(r".*/compute/output/.*"),
+        is_reusable=True,
+        is_optional=True,
+    )
+    return submitted
+
+
+def test_finite_difference_gradient(settings, jwt, prog_input, potential_server):
+    client = CCClient(settings=settings)
+    client._http_client._access_token = jwt
+    inp = prog_input.model_copy(update={"calctype": CalcType.gradient})
+
+    output = client.finite_difference("psi4", inp, initial_interval=0.01)
+
+    assert output.success
+    assert len(potential_server) == 12  # 2 * 3 * (natoms - 1)
+    assert {inp["calctype"] for inp in potential_server.values()} == {"energy"}
+    assert np.allclose(output.data.gradient, _gradient(inp.structure.geometry))
+
+
+def test_finite_difference_hessian(settings, jwt, prog_input, potential_server):
+    client = CCClient(settings=settings)
+    client._http_client._access_token = jwt
+    inp = prog_input.model_copy(update={"calctype": CalcType.hessian})
+
+    output = client.finite_difference(
+        "psi4", inp, scheme="forward", initial_interval=0.01
+    )
+
+    assert len(potential_server) == 7  # Reference + 3 * (natoms - 1)
+    assert np.allclose(output.data.hessian, _hessian())
+    assert np.allclose(output.data.gradient, _gradient(inp.structure.geometry))
+
+
+def test_finite_difference_requires_derivative_calctype(settings, prog_input):
+    client = CCClient(settings=settings)
+    with pytest.raises(ValueError):
+        client.finite_difference("psi4", prog_input)
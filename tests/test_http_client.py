@@ -1,3 +1,4 @@
+import re
 import sys
 from pathlib import Path
 
@@ -401,3 +402,112 @@ async def test__set_tokens_gets_new_access_token_if_credentials_file_expired(
     spy.assert_called_once_with(client, refresh_token)
     assert client._access_token == patch_token_endpoint["access_token"]
     assert client._refresh_token == patch_token_endpoint["refresh_token"]
+
+
+@pytest.mark.asyncio
+async def test__refresh_tokens_adopts_tokens_refreshed_by_another_process(
+    settings, credentials_file, expired_jwt, jwt, httpx_mock
+):
+    # Another process already refreshed and rotated the refresh token
+    credentials_file(jwt, "rotated_refresh_token")
+    client = _HttpClient(settings=settings)
+    client._access_token = expired_jwt
+    client._refresh_token = "stale_refresh_token"
+    client._tokens_set_from_file = True
+
+    assert await client.get_access_token() == jwt
+
+    assert client._refresh_token == "rotated_refresh_token"
+    assert not httpx_mock.get_requests()  # No request to /oauth/token
+
+
+@pytest.mark.asyncio
+async def test_concurrent_refreshes_share_one_token_request(
+    settings, credentials_file, expired_jwt, jwt, httpx_mock
+):
+    import asyncio
+    from urllib.parse import parse_qs
+
+    httpx_mock.add_response(
+        url=re.compile(r".*/oauth/token"),
+        json={"access_token": jwt, "refresh_token": "rotated_refresh_token"},
+    )
+    credentials_file(expired_jwt, "file_refresh_token")
+    # One client per "process"; each has its own locks and stale tokens
+    clients = [_HttpClient(settings=settings) for _ in range(5)]
+    for client in clients:
+        client._access_token = expired_jwt
+        client._refresh_token = "stale_refresh_token"
+        client._tokens_set_from_file = True
+
+    tokens = await asyncio.gather(*(c.get_access_token() for c in clients))
+
+    assert tokens == [jwt] * 5
+    assert {c._refresh_token for c in clients} == {"rotated_refresh_token"}
+    (request,) = httpx_mock.get_requests()
+    assert parse_qs(request.content.decode())["refresh_token"] == ["file_refresh_token"]
+    credentials_path = (
+        settings.chemcloud_base_directory / settings.chemcloud_credentials_file
+    )
+    with open(credentials_path, "rb") as f:
+        saved = tomllib.load(f)[settings.chemcloud_credentials_profile]
+    assert saved == {"access_token": jwt, "refresh_token": "rotated_refresh_token"}
+
+
+def test_token_claims_are_decoded_once(settings, mocker):
+    from time import time
+
+    from tests.conftest import _jwt_from_payload
+
+    jwt = _jwt_from_payload({"exp": int(time()) + 3600, "iat": int(time()) + 1})
+    client = _HttpClient(settings=settings)
+    spy = mocker.spy(_HttpClient, "_decode_access_token")
+
+    for _ in range(3):
+        assert not client._is_token_expired(jwt)
+
+    spy.assert_called_once_with(jwt)
+
+
+@pytest.mark.asyncio
+async def test_access_token_refreshed_ahead_of_expiry(settings, httpx_mock):
+    import asyncio
+    from time import time
+
+    from tests.conftest import _jwt_from_payload
+
+    now = int(time())
+    # 60% of the lifetime has passed, but the token is still valid
+    old_jwt = _jwt_from_payload({"iat": now - 60, "exp": now + 40})
+    new_jwt = _jwt_from_payload({"iat": now, "exp": now + 100})
+    httpx_mock.add_response(
+        url=re.compile(r".*/oauth/token"),
+        json={"access_token": new_jwt, "refresh_token": "new_refresh_token"},
+    )
+    client = _HttpClient(
+        settings=settings.model_copy(update={"chemcloud_token_refresh_fraction": 0.5})
+    )
+    client._access_token = old_jwt
+    client._refresh_token = "refresh_token"
+
+    assert await client.get_access_token() == old_jwt  # Does not wait
+    await asyncio.sleep(0.05)
+
+    assert client._access_token == new_jwt
+    assert client._refresh_token == "new_refresh_token"
+    assert len(httpx_mock.get_requests()) == 1
+    await client.aclose()
+
+
+@pytest.mark.asyncio
+async def test_access_token_not_refreshed_ahead_if_disabled(settings, jwt):
+    client = _HttpClient(
+        settings=settings.model_copy(update={"chemcloud_token_refresh_fraction": None})
+    )
+    client._access_token = jwt
+    client._refresh_token = "refresh_token"
+
+    await client.get_access_token()
+
+    assert client._state().refresher is None
+    assert not client._state().scheduled_token
@@ -1,11 +1,20 @@
+import asyncio
 import json
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+import httpx
+import pytest
 from pytest_httpx import HTTPXMock
 from qcdata import FileInput, ProgramOutput
 
 from chemcloud import CCClient, FutureOutput
+from chemcloud.exceptions import TimeoutError
 from chemcloud.models import TaskStatus
+from chemcloud.retry import FailureKind, RetryPolicy
 
 
 def test_result_pending(
@@ -213,3 +222,500 @@ def test_serialization(tmp_path, prog_input):
     assert (
         loaded_future.model_dump() == future.model_dump()
     ), "Loaded data does not match original data."
+
+
+def test_get_only_polls_unfinished_tasks(settings, jwt, prog_input, httpx_mock):
+    client = CCClient(settings=settings)
+    client._http_client._access_token = jwt
+    output = {
+        "input_data": prog_input.model_dump(),
+        "success": True,
+        "data": {"energy": -76.0},
+        "provenance": {"program": "psi4"},
+    }
+    polls = {"fast": 0, "slow": 0}
+
+    def output_endpoint(request):
+        task_id = request.url.path.rsplit("/", 1)[-1]
+        if request.method == "DELETE":
+            return httpx.Response(202, json=None)
+        polls[task_id] += 1
+        if task_id == "slow" and polls[task_id] < 3:
+            return httpx.Response(200, json={"status": "STARTED"})
+        return httpx.Response(200, json={"status": "SUCCESS", "program_output": output})
+
+    httpx_mock.add_callback(
+        output_endpoint, url=re.compile(r".*/compute/output/.*"), is_reusable=True
+    )
+    future = FutureOutput(
+        task_ids=["fast", "slow"],
+        inputs=[prog_input, prog_input],
+        program="psi4",
+        client=client,
+    )
+
+    outputs = future.get(initial_interval=0.01)
+
+    assert isinstance(outputs, list)
+    assert len(outputs) == 2
+    assert polls == {"fast": 1, "slow": 3}
+
+
+def test_get_raises_timeout(settings, jwt, prog_input, httpx_mock):
+    client = CCClient(settings=settings)
+    client._http_client._access_token = jwt
+    httpx_mock.add_response(json={"status": "PENDING"}, is_reusable=True)
+    future = FutureOutput(
+        task_ids=["task"], inputs=[prog_input], program="psi4", client=client
+    )
+
+    with pytest.raises(TimeoutError):
+        future.get(timeout=0.05, initial_interval=0.01)
+
+
+def _pending_future(client, prog_input, n_tasks):
+    return FutureOutput(
+        task_ids=[f"task_{i}" for i in range(n_tasks)],
+        inputs=[prog_input] * n_tasks,
+        program="psi4",
+        client=client,
+    )
+
+
+def test_refresh_walks_tasks_in_round_robin_windows(settings, prog_input, mocker):
+    client = CCClient(settings=settings)
+    refreshed: list[str] = []
+
+    async def fetch_output_async(task_id):
+        refreshed.append(task_id)
+        return TaskStatus.PENDING, None
+
+    mocker.patch.object(client, "fetch_output_async", side_effect=fetch_output_async)
+    future = _pending_future(client, prog_input, 5)
+
+    for _ in range(3):
+        future.refresh(max_requests=2)
+
+    assert refreshed == [f"task_{i}" for i in [0, 1, 2, 3, 4, 0]]
+
+
+def test_refresh_oldest_first_skips_finished_tasks(settings, prog_input, mocker):
+    client = CCClient(settings=settings)
+    refreshed: list[str] = []
+
+    async def fetch_output_async(task_id):
+        refreshed.append(task_id)
+        return TaskStatus.PENDING, None
+
+    mocker.patch.object(client, "fetch_output_async", side_effect=fetch_output_async)
+    future = _pending_future(client, prog_input, 5)
+    future.statuses[0] = TaskStatus.SUCCESS
+
+    future.refresh(max_requests=2, order="oldest")
+    future.refresh(max_requests=2, order="oldest")
+
+    assert refreshed == ["task_1", "task_2"] * 2
+
+
+def test_refresh_bounds_concurrent_requests(settings, prog_input, mocker):
+    settings.chemcloud_concurrency = 3
+    client = CCClient(settings=settings)
+    in_flight, max_in_flight = 0, 0
+
+    async def fetch_output_async(task_id):
+        nonlocal in_flight, max_in_flight
+        in_flight += 1
+        max_in_flight = max(max_in_flight, in_flight)
+        await asyncio.sleep(0)
+        in_flight -= 1
+        return TaskStatus.PENDING, None
+
+    fetch = mocker.patch.object(
+        client, "fetch_output_async", side_effect=fetch_output_async
+    )
+    future = _pending_future(client, prog_input, 50)
+
+    future.refresh()
+
+    assert fetch.call_count == 50
+    assert max_in_flight == 3
+
+
+def _output_json(prog_input, success: bool = True):
+    return {
+        "input_data": prog_input.model_dump(),
+        "success": success,
+        "data": {"energy": -76.0} if success else {},
+        "logs": "",
+        "traceback": "" if success else "SCF did not converge",
+        "provenance": {"program": "psi4"},
+    }
+
+
+@pytest.fixture
+def revokable_server(httpx_mock, prog_input):
+    """Server where task IDs map to a final status; unknown IDs stay PENDING."""
+    final: dict[str, str] = {}
+    revoked: list[str] = []
+
+    def output_endpoint(request):
+        task_id = request.url.path.rsplit("/", 1)[-1]
+        if request.method == "DELETE":
+            return httpx.Response(204)
+        if task_id not in final:
+            return httpx.Response(200, json={"status": "PENDING"})
+        success = final[task_id] == "SUCCESS"
+        return httpx.Response(
+            200,
+            json={
+                "status": final[task_id],
+                "program_output": _output_json(prog_input, success),
+            },
+        )
+
+    def revoke_endpoint(request):
+        revoked.extend(json.loads(request.content))
+        return httpx.Response(200, json=None)
+
+    httpx_mock.add_response(
+        url=re.compile(r".*/openapi\.json$"),
+        json={"paths": {"/api/v2/compute/revoke": {"post": {}}}},
+        is_reusable=True,
+        is_optional=True,
+    )
+    httpx_mock.add_callback(
+        output_endpoint,
+        url=re.compile(r".*/compute/output/.*"),
+        is_reusable=True,
+        is_optional=True,
+    )
+    httpx_mock.add_callback(
+        revoke_endpoint,
+        url=re.compile(r".*/compute/revoke"),
+        is_reusable=True,
+        is_optional=True,
+    )
+    return final, revoked
+
+
+def test_cancel_revokes_unfinished_tasks(settings, jwt, prog_input, revokable_server):
+    final, revoked = revokable_server
+    client = CCClient(settings=settings)
+    client._http_client._access_token = jwt
+    future = _pending_future(client, prog_input, 3)
+    future.statuses[0] = TaskStatus.SUCCESS
+
+    assert future.cancel() == ["task_1", "task_2"]
+
+    assert revoked == ["task_1", "task_2"]
+    assert future.statuses[1:] == [TaskStatus.REVOKED] * 2
+    assert all(output.success is False for output in future.outputs[1:])
+
+
+def test_get_min_completed_revokes_the_rest(
+    settings, jwt, prog_input, revokable_server
+):
+    final, revoked = revokable_server
+    final["task_0"] = "SUCCESS"
+    client = CCClient(settings=settings)
+    client._http_client._access_token = jwt
+    future = _pending_future(client, prog_input, 2)
+
+    outputs = future.get(min_completed=1, initial_interval=0.01)
+
+    assert outputs[0].success is True
+    assert future.statuses[1] == TaskStatus.REVOKED
+    assert revoked == ["task_1"]
+
+
+def test_tasks_the_server_cannot_revoke_are_collected(
+    settings, jwt, prog_input, httpx_mock
+):
+    polls = {"task_0": 0, "task_1": 0}
+
+    def output_endpoint(request):
+        task_id = request.url.path.rsplit("/", 1)[-1]
+        if request.method == "DELETE":
+            return httpx.Response(204)
+        polls[task_id] += 1
+        if task_id == "task_1" and polls[task_id] < 3:
+            return httpx.Response(200, json={"status": "PENDING"})
+        return httpx.Response(
+            200,
+            json={"status": "SUCCESS", "program_output": _output_json(prog_input)},
+        )
+
+    httpx_mock.add_response(
+        url=re.compile(r".*/openapi\.json$"), json={"paths": {}}, is_reusable=True
+    )
+    httpx_mock.add_callback(
+        output_endpoint,
+        url=re.compile(r".*/compute/output/.*"),
+        is_reusable=True,
+        is_optional=True,
+    )
+    client = CCClient(settings=settings)
+    client._http_client._access_token = jwt
+    future = _pending_future(client, prog_input, 2)
+
+    assert future.cancel() == []
+    assert future.statuses == [TaskStatus.PENDING] * 2
+
+    outputs = future.get(min_completed=1, initial_interval=0.01)
+
+    # Both tasks kept running on the server, so both are collected
+    assert isinstance(outputs, list)
+    assert [output.success for output in outputs] == [True, True]
+    assert future.statuses == [TaskStatus.SUCCESS] * 2
+
+
+def test_get_cancel_on_timeout(settings, jwt, prog_input, revokable_server):
+    final, revoked = revokable_server
+    client = CCClient(settings=settings)
+    client._http_client._access_token = jwt
+    future = _pending_future(client, prog_input, 1)
+
+    with pytest.raises(TimeoutError):
+        future.get(timeout=0.05, initial_interval=0.01, cancel_on_timeout=True)
+
+    assert revoked == ["task_0"]
+
+
+def test_first_success_skips_failures(settings, jwt, prog_input, revokable_server):
+    final, revoked = revokable_server
+    final["task_0"] = "FAILURE"
+    final["task_1"] = "SUCCESS"
+    client = CCClient(settings=settings)
+    client._http_client._access_token = jwt
+    future = _pending_future(client, prog_input, 3)
+
+    output = future.first_success(initial_interval=0.01)
+
+    assert output.success is True
+    assert output is future.outputs[1]
+    assert revoked == ["task_2"]
+
+
+@pytest.fixture
+def resubmit_endpoint(httpx_mock):
+    """POST /compute returns "retry_<n>" task IDs and records submitted inputs."""
+    submitted: list[dict] = []
+
+    def compute_endpoint(request):
+        submitted.append(json.loads(request.content))
+        return httpx.Response(200, json=f"retry_{len(submitted)}")
+
+    httpx_mock.add_callback(
+        compute_endpoint,
+        method="POST",
+        url=re.compile(r".*/compute\?.*"),
+        is_reusable=True,
+    )
+    return submitted
+
+
+def test_retry_policy_resubmits_failed_tasks(
+    settings, jwt, prog_input, revokable_server, resubmit_endpoint
+):
+    final, _ = revokable_server
+    final.update(task_0="FAILURE", task_1="SUCCESS", retry_1="SUCCESS")
+    client = CCClient(settings=settings)
+    client._http_client._access_token = jwt
+    future = _pending_future(client, prog_input, 2)
+    future.retry_policy = RetryPolicy(
+        keyword_updates={FailureKind.SCF_CONVERGENCE: {"maxiter": 300}}
+    )
+
+    outputs = future.get(initial_interval=0.01)
+
+    assert [output.success for output in outputs] == [True, True]
+    assert future.task_ids == ["retry_1", "task_1"]
+    assert future.attempts == [2, 1]
+    assert resubmit_endpoint[0]["keywords"]["maxiter"] == 300
+    assert future.inputs[0].keywords["maxiter"] == 300
+
+
+def test_retry_policy_stops_after_max_attempts(
+    settings, jwt, prog_input, revokable_server, resubmit_endpoint
+):
+    final, _ = revokable_server
+    final.update(task_0="FAILURE", retry_1="FAILURE", retry_2="FAILURE")
+    client = CCClient(settings=settings)
+    client._http_client._access_token = jwt
+    future = _pending_future(client, prog_input, 1)
+    future.retry_policy = RetryPolicy(max_attempts=2)
+
+    output = future.get(initial_interval=0.01)
+
+    assert output[0].success is False
+    assert future.task_ids == ["retry_1"]
+    assert len(resubmit_endpoint) == 1
+
+
+def _countdown_fetch(prog_input, polls_needed: dict[str, int], polled: list[str]):
+    """fetch_output_async replacement where tasks finish after a number of polls."""
+
+    async def fetch_output_async(task_id):
+        polled.append(task_id)
+        polls_needed[task_id] -= 1
+        if polls_needed[task_id] > 0:
+            return TaskStatus.PENDING, None
+        output = ProgramOutput(**_output_json(prog_input))
+        return TaskStatus.SUCCESS, output
+
+    return fetch_output_async
+
+
+def test_stream_ordered_bounds_tasks_in_flight(settings, prog_input, mocker):
+    client = CCClient(settings=settings)
+    polled: list[str] = []
+    polls_needed = {"task_0": 3, "task_1": 1, "task_2": 1, "task_3": 1}
+    mocker.patch.object(
+        client,
+        "fetch_output_async",
+        side_effect=_countdown_fetch(prog_input, polls_needed, polled),
+    )
+    future = _pending_future(client, prog_input, 4)
+
+    streamed = []
+    for index, task_id, output in future.stream(
+        ordered=True, max_buffer=2, initial_interval=0.01
+    ):
+        streamed.append((index, task_id, output.success))
+        if index == 0:
+            # Only the first two tasks were polled until task 0 was released
+            assert set(polled) == {"task_0", "task_1"}
+
+    assert streamed == [(i, f"task_{i}", True) for i in range(4)]
+    assert future.outputs == [None] * 4
+
+
+@pytest.mark.asyncio
+async def test_stream_async_yields_indices(settings, prog_input, mocker):
+    client = CCClient(settings=settings)
+    polls_needed = {"task_0": 3, "task_1": 1}
+    mocker.patch.object(
+        client,
+        "fetch_output_async",
+        side_effect=_countdown_fetch(prog_input, polls_needed, []),
+    )
+    future = _pending_future(client, prog_input, 2)
+
+    streamed = [
+        (index, task_id)
+        async for index, task_id, _ in future.stream_async(initial_interval=0.01)
+    ]
+    ordered = [
+        index async for index, _, _ in future.stream_async(ordered=True)
+    ]  # Everything was already streamed
+
+    assert streamed == [(1, "task_1"), (0, "task_0")]
+    assert ordered == []
+
+
+def test_callbacks_run_on_executor_and_collect_errors(settings, prog_input, mocker):
+    client = CCClient(settings=settings)
+    polls_needed = {f"task_{i}": i + 1 for i in range(3)}
+    mocker.patch.object(
+        client,
+        "fetch_output_async",
+        side_effect=_countdown_fetch(prog_input, polls_needed, []),
+    )
+    future = _pending_future(client, prog_input, 3)
+    seen, done, threads = [], [], set()
+
+    def on_task(index, task_id, output):
+        threads.add(threading.current_thread().name)
+        seen.append((index, task_id, output.success))
+        if index == 1:
+            raise ValueError("bad output")
+
+    future.add_task_callback(on_task)
+    future.add_done_callback(lambda f: done.append(f))
+    future.get(initial_interval=0.01)
+
+    assert sorted(seen) == [(i, f"task_{i}", True) for i in range(3)]
+    assert done == [future]
+    assert all(name.startswith("chemcloud-callback") for name in threads)
+    [error] = future.callback_errors
+    assert (error.task_index, error.task_id) == (1, "task_1")
+    assert isinstance(error.error, ValueError)
+
+
+def test_callbacks_apply_backpressure(settings, prog_input, mocker):
+    settings.chemcloud_callback_backlog = 1
+    client = CCClient(settings=settings)
+    mocker.patch.object(
+        client,
+        "fetch_output_async",
+        side_effect=_countdown_fetch(
+            prog_input, {f"task_{i}": 1 for i in range(4)}, []
+        ),
+    )
+    future = _pending_future(client, prog_input, 4)
+    lock = threading.Lock()
+    running, max_running = 0, 0
+
+    def slow(index, task_id, output):
+        nonlocal running, max_running
+        with lock:
+            running += 1
+            max_running = max(max_running, running)
+        time.sleep(0.02)
+        with lock:
+            running -= 1
+
+    future.add_task_callback(slow, executor=ThreadPoolExecutor(max_workers=4))
+    future.get(initial_interval=0.01)
+
+    assert max_running == 1
+    assert future.callback_errors == []
+
+
+@pytest.mark.asyncio
+async def test_backlogged_callbacks_only_pause_their_own_future(
+    settings, prog_input, mocker
+):
+    settings.chemcloud_callback_backlog = 1
+    client = CCClient(settings=settings)
+    polled: list[str] = []
+    polls_needed = {"task_0": 1, "task_1": 2, "task_2": 3, "other": 3}
+    mocker.patch.object(
+        client,
+        "fetch_output_async",
+        side_effect=_countdown_fetch(prog_input, polls_needed, polled),
+    )
+    stalled = _pending_future(client, prog_input, 3)
+    other = FutureOutput(
+        task_ids=["other"], inputs=[prog_input], program="psi4", client=client
+    )
+    release = threading.Event()
+    stalled.add_task_callback(lambda *args: release.wait(5))
+
+    stalled_get = asyncio.ensure_future(stalled.get_async(initial_interval=0.01))
+    await asyncio.wait_for(other.get_async(initial_interval=0.01), timeout=2)
+
+    assert not stalled_get.done()
+    assert polled.count("task_2") < 3  # Polling of the stalled future paused
+    release.set()
+    await asyncio.wait_for(stalled_get, timeout=2)
+    assert polled.count("task_2") == 3
+    await client.close_async()
+
+
+def test_pickle_drops_callbacks_and_keeps_tasks(settings, jwt, prog_input):
+    import pickle
+
+    client = CCClient(settings=settings)
+    client._http_client._access_token = jwt
+    future = _pending_future(client, prog_input, 2)
+    future.add_task_callback(lambda index, task_id, output: None)
+    future.statuses[0] = TaskStatus.SUCCESS
+
+    clone = pickle.loads(pickle.dumps(future))
+
+    assert clone.task_ids == future.task_ids
+    assert clone.statuses == future.statuses
+    assert clone.client._http_client._access_token == jwt
+    assert clone._task_callbacks == []
+    assert clone._callback_lock.acquire(blocking=False)
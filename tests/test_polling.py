@@ -0,0 +1,144 @@
+import asyncio
+from time import time
+from typing import cast
+
+import pytest
+
+from chemcloud.models import FutureOutput
+from chemcloud.polling import PollQueue, PollScheduler, ReorderBuffer, next_poll_delay
+
+
+def test_next_poll_delay_converges_on_expected_runtime():
+    kwargs = {"initial_interval": 1.0, "max_interval": 1000.0}
+    assert next_poll_delay(0.0, 100.0, **kwargs) == 50.0
+    assert next_poll_delay(80.0, 100.0, **kwargs) == 10.0
+    # Never shorter than the initial interval
+    assert next_poll_delay(99.5, 100.0, **kwargs) == 1.0
+
+
+def test_next_poll_delay_backs_off_with_elapsed_time():
+    kwargs = {"initial_interval": 1.0, "max_interval": 30.0}
+    assert next_poll_delay(0.0, None, **kwargs) == 1.0
+    assert next_poll_delay(100.0, None, **kwargs) == pytest.approx(10.0)
+    # Overdue tasks back off the same way and respect the maximum
+    assert next_poll_delay(6 * 3600.0, 60.0, **kwargs) == 30.0
+
+
+def test_next_poll_delay_long_calctypes_back_off_faster():
+    kwargs = {"initial_interval": 1.0, "max_interval": 1000.0}
+    energy = next_poll_delay(100.0, None, **kwargs)
+    optimization = next_poll_delay(100.0, None, calctype_cost=15.0, **kwargs)
+    assert optimization > energy
+
+
+def test_poll_queue_pops_due_indices_in_time_order():
+    queue = PollQueue()
+    queue.push(0, 5.0)
+    queue.push(1, 1.0)
+    queue.push(2, 1.0)
+
+    assert queue.next_due() == 1.0
+    assert queue.pop_due(0.5) == []
+    assert queue.pop_due(2.0) == [1, 2]
+    assert len(queue) == 1
+    assert queue.pop_due(10.0) == [0]
+    assert queue.next_due() is None
+
+
+class _FakeFuture:
+    """Duck-typed FutureOutput whose tasks finish after `polls_needed` polls."""
+
+    def __init__(self, polls_needed: list[int]):
+        self.polls_needed = polls_needed
+        self.polls = [0] * len(polls_needed)
+        self.refresh_calls: list[list[int]] = []
+
+    async def refresh_async(self, indices):
+        self.refresh_calls.append(list(indices))
+        for i in indices:
+            self.polls[i] += 1
+
+    def _is_task_done(self, i):
+        return self.polls[i] >= self.polls_needed[i]
+
+    def _next_poll_delay(self, i, initial_interval):
+        return initial_interval
+
+    def _callbacks_backlogged(self):
+        return False
+
+
+async def _drain(scheduler, future, initial_interval=0.01):
+    watch = scheduler.watch(future, list(range(len(future.polls))), initial_interval)
+    return sorted([await watch.next_ready() for _ in future.polls])
+
+
+@pytest.mark.asyncio
+async def test_poll_scheduler_merges_futures_into_one_dispatcher():
+    scheduler = PollScheduler(max_polls_per_second=1000, jitter=0.1)
+    first, second = _FakeFuture([1, 3]), _FakeFuture([2])
+
+    results = await asyncio.gather(_drain(scheduler, first), _drain(scheduler, second))
+
+    assert results == [[0, 1], [0]]
+    assert first.polls == [1, 3]
+    assert second.polls == [2]
+    # Both futures were polled in the first dispatch cycle.
+    assert first.refresh_calls[0] == [0, 1]
+    assert second.refresh_calls[0] == [0]
+
+
+@pytest.mark.asyncio
+async def test_poll_scheduler_limits_poll_rate():
+    scheduler = PollScheduler(max_polls_per_second=20, jitter=0.0)
+    future = _FakeFuture([1] * 30)
+
+    start = time()
+    await _drain(scheduler, future)
+
+    # 20 polls fit in the initial burst; the remaining 10 take ~0.5 s at 20/s.
+    assert time() - start >= 0.4
+    assert all(len(call) <= 20 for call in future.refresh_calls)
+
+
+@pytest.mark.asyncio
+async def test_poll_scheduler_polls_with_rate_below_one():
+    scheduler = PollScheduler(max_polls_per_second=0.5, jitter=0.0)
+    future = _FakeFuture([1])
+
+    assert await asyncio.wait_for(_drain(scheduler, future), timeout=1.0) == [0]
+
+
+@pytest.mark.asyncio
+async def test_poll_scheduler_unwatch_stops_polling():
+    scheduler = PollScheduler(max_polls_per_second=1000, jitter=0.0)
+    future = _FakeFuture([1000])
+
+    watch = scheduler.watch(cast(FutureOutput, future), [0], initial_interval=0.01)
+    await asyncio.sleep(0.05)
+    scheduler.unwatch(watch)
+    polls = future.polls[0]
+    await asyncio.sleep(0.05)
+
+    assert future.polls[0] == polls
+    assert scheduler._dispatcher is not None and scheduler._dispatcher.done()
+
+
+def test_reorder_buffer_releases_in_order_with_bounded_admission():
+    buffer = ReorderBuffer([0, 1, 2, 3], capacity=2)
+
+    assert buffer.admit() == [0, 1]
+    assert buffer.put(1) == []
+    assert buffer.admit() == []  # Task 0 still blocks the window
+    assert buffer.put(0) == [0, 1]
+    assert buffer.admit() == [2, 3]
+    assert buffer.put(3) == [] and buffer.put(2) == [2, 3]
+    assert len(buffer) == 0
+
+
+def test_reorder_buffer_unordered():
+    buffer = ReorderBuffer([0, 1, 2])
+
+    assert buffer.admit() == [0, 1, 2]
+    assert buffer.put(2) == [2]
+    assert len(buffer) == 2
@@ -0,0 +1,121 @@
+import asyncio
+import json
+import re
+import subprocess
+import sys
+import threading
+from time import perf_counter
+
+import pytest
+
+from chemcloud.filelock import FileLock
+from chemcloud.http_client import _HttpClient
+from chemcloud.ratelimit import NodeRateLimiter
+
+
+@pytest.mark.asyncio
+async def test_in_flight_budget_is_shared_by_limiters_on_one_file(tmp_path):
+    path = tmp_path / "ratelimit.json"
+    # One limiter per "process"
+    first, second = (NodeRateLimiter(path, max_in_flight=2) for _ in range(2))
+    await first.acquire()
+    await second.acquire()
+
+    third = asyncio.ensure_future(first.acquire())
+    await asyncio.sleep(0.1)
+    assert not third.done()
+
+    second.release()
+    await asyncio.wait_for(third, timeout=1)
+
+
+@pytest.mark.asyncio
+async def test_slots_of_dead_processes_are_reclaimed(tmp_path):
+    dead = subprocess.Popen([sys.executable, "-c", "pass"])
+    dead.wait()
+    path = tmp_path / "ratelimit.json"
+    path.write_text(json.dumps({"in_flight": {str(dead.pid): 5}}))
+    limiter = NodeRateLimiter(path, max_in_flight=1)
+
+    await asyncio.wait_for(limiter.acquire(), timeout=1)
+
+
+@pytest.mark.asyncio
+async def test_rate_limits_requests_per_second(tmp_path):
+    limiter = NodeRateLimiter(tmp_path / "ratelimit.json", rate=50, burst=1)
+
+    start = perf_counter()
+    for _ in range(6):
+        async with limiter.slot():
+            pass
+
+    assert perf_counter() - start >= 5 / 50 * 0.9
+
+
+def _in_flight(path):
+    return sum(json.loads(path.read_text())["in_flight"].values())
+
+
+async def _hold_slot(limiter, leave):
+    entered = asyncio.Event()
+
+    async def request():
+        async with limiter.slot():
+            entered.set()
+            await leave.wait()
+
+    task = asyncio.ensure_future(request())
+    await entered.wait()
+    return task
+
+
+@pytest.mark.asyncio
+async def test_slot_release_waits_for_lock_without_blocking_loop(tmp_path):
+    path = tmp_path / "ratelimit.json"
+    limiter = NodeRateLimiter(path, max_in_flight=2)
+    leave = asyncio.Event()
+    task = await _hold_slot(limiter, leave)
+
+    with FileLock(limiter._lock_path):  # Held by "another process"
+        leave.set()
+        await asyncio.sleep(0.05)  # The loop keeps running while release waits
+        assert not task.done()
+        assert _in_flight(path) == 1
+    await asyncio.wait_for(task, timeout=1)
+
+    assert _in_flight(path) == 0
+
+
+@pytest.mark.asyncio
+async def test_cancelled_release_still_returns_slot(tmp_path):
+    path = tmp_path / "ratelimit.json"
+    limiter = NodeRateLimiter(path, max_in_flight=2)
+    leave = asyncio.Event()
+    task = await _hold_slot(limiter, leave)
+
+    lock = FileLock(limiter._lock_path)
+    lock.acquire()
+    leave.set()
+    await asyncio.sleep(0.05)
+    threading.Timer(0.1, lock.release).start()
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+
+    assert _in_flight(path) == 0
+
+
+@pytest.mark.asyncio
+async def test_http_client_opts_into_node_limiter(settings, httpx_mock):
+    httpx_mock.add_response(url=re.compile(r".*/hello-world.*"), json="Hello!")
+    settings = settings.model_copy(update={"chemcloud_node_max_in_flight": 4})
+    client = _HttpClient(settings=settings)
+    assert client._node_limiter is not None
+
+    await client._request_async("get", "/hello-world", api_call=False)
+
+    state = json.loads(
+        (settings.chemcloud_base_directory / "ratelimit.json").read_text()
+    )
+    assert sum(state["in_flight"].values()) == 0
+    await client.aclose()
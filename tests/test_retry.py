@@ -0,0 +1,56 @@
+import pytest
+from qcdata import ProgramOutput, Provenance
+
+from chemcloud.retry import FailureKind, RetryPolicy, classify_failure
+
+
+def _failed(prog_input, traceback: str, logs: str = "") -> ProgramOutput:
+    return ProgramOutput(
+        input_data=prog_input,
+        success=False,
+        data={},
+        logs=logs,
+        traceback=traceback,
+        provenance=Provenance(program="psi4"),
+    )
+
+
+@pytest.mark.parametrize(
+    "traceback,logs,kind",
+    [
+        ("psi4.SCFConvergenceError: SCF did not converge", "", "SCF_CONVERGENCE"),
+        ("", "Maximum number of SCF iterations exceeded", "SCF_CONVERGENCE"),
+        (
+            "celery.exceptions.WorkerLostError: Worker exited prematurely",
+            "",
+            "WORKER_LOST",
+        ),
+        ("httpx.ConnectionError: Connection reset by peer", "", "TRANSIENT"),
+        ("", "HTTP/1.1 503 from the license server", "TRANSIENT"),
+        ("RuntimeError: request failed with status code 502", "", "TRANSIENT"),
+        ("ValueError: Unknown basis set 'foo'", "", "OTHER"),
+        ("ValueError: Invalid charge", "Total energy: -76.0503\nDIIS: 0.504", "OTHER"),
+    ],
+)
+def test_classify_failure(prog_input, traceback, logs, kind):
+    assert classify_failure(_failed(prog_input, traceback, logs)) == FailureKind(kind)
+
+
+def test_classify_failure_without_output():
+    assert classify_failure(None) == FailureKind.WORKER_LOST
+
+
+def test_retry_policy(prog_input):
+    policy = RetryPolicy(
+        max_attempts=2,
+        keyword_updates={FailureKind.SCF_CONVERGENCE: {"level_shift": 0.3}},
+    )
+    scf = _failed(prog_input, "SCF did not converge")
+
+    assert policy.should_retry(scf, attempts=1) == FailureKind.SCF_CONVERGENCE
+    assert policy.should_retry(scf, attempts=2) is None
+    assert policy.should_retry(_failed(prog_input, "Bad input"), attempts=1) is None
+
+    retried = policy.next_input(prog_input, FailureKind.SCF_CONVERGENCE, 2)
+    assert retried.keywords == {**prog_input.keywords, "level_shift": 0.3}
+    assert policy.next_input(prog_input, FailureKind.WORKER_LOST, 2) is prog_input
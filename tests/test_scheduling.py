@@ -0,0 +1,116 @@
+import pytest
+from qcdata import CalcType, ProgramOutput, Provenance, SinglePointData
+
+from chemcloud.scheduling import (
+    HeuristicCostEstimator,
+    RaceStatistics,
+    RuntimeHistory,
+    _JsonStore,
+    longest_first,
+)
+
+
+def _output(prog_input, wall_time: float) -> ProgramOutput:
+    return ProgramOutput(
+        input_data=prog_input,
+        success=True,
+        data=SinglePointData(energy=-76.0),
+        provenance=Provenance(program="psi4", wall_time=wall_time),
+    )
+
+
+def test_heuristic_cost_orders_by_calctype_and_basis(prog_input):
+    estimator = HeuristicCostEstimator()
+    hessian = prog_input.model_copy(update={"calctype": CalcType.hessian})
+    big_basis = prog_input.model_copy(
+        update={"model": prog_input.model.model_copy(update={"basis": "cc-pvtz"})}
+    )
+
+    assert estimator("psi4", hessian) > estimator("psi4", prog_input)
+    assert estimator("psi4", big_basis) > estimator("psi4", prog_input)
+
+
+def test_runtime_history_calibrates_estimates(prog_input, tmp_path):
+    path = tmp_path / "history.json"
+    history = RuntimeHistory(path)
+    assert history.expected_wall_time("psi4", prog_input) is None
+
+    history.record("psi4", prog_input, _output(prog_input, 12.0))
+    assert history.expected_wall_time("psi4", prog_input) == 12.0
+    assert HeuristicCostEstimator(history)("psi4", prog_input) == 12.0
+
+    history.save()
+    assert RuntimeHistory(path).expected_wall_time("psi4", prog_input) == 12.0
+
+
+def test_runtime_history_ignores_failures(prog_input):
+    history = RuntimeHistory()
+    failed = _output(prog_input, 5.0).model_copy(update={"success": False})
+
+    history.record("psi4", prog_input, failed)
+
+    assert history.expected_wall_time("psi4", prog_input) is None
+
+
+def test_longest_first_is_stable():
+    costs = {"a": 1.0, "b": 3.0, "c": 1.0, "d": 2.0}
+    order = longest_first("psi4", list(costs), lambda program, inp: costs[inp])
+    assert order == [1, 3, 0, 2]
+
+
+def test_race_statistics_favorite(prog_input, tmp_path):
+    stats = RaceStatistics(tmp_path / "races.json")
+    key = stats.key(["terachem", "psi4"], prog_input)
+    assert key == stats.key(["psi4", "terachem"], prog_input)
+
+    for winner in ["psi4"] * 9 + ["terachem"]:
+        stats.record(key, winner)
+
+    assert stats.favorite(key, min_races=20) is None
+    assert stats.favorite(key, min_races=10) == "psi4"
+    assert stats.favorite(key, min_races=10, min_win_rate=0.95) is None
+
+    stats.save()
+    assert RaceStatistics(tmp_path / "races.json").wins(key) == {
+        "psi4": 9,
+        "terachem": 1,
+    }
+
+
+def test_saves_from_several_processes_are_merged(prog_input, tmp_path):
+    path = tmp_path / "history.json"
+    # One history per "process", both loaded before either saves
+    first, second = RuntimeHistory(path), RuntimeHistory(path)
+    first.record("psi4", prog_input, _output(prog_input, 10.0))
+    second.record("psi4", prog_input, _output(prog_input, 20.0))
+
+    first.save()
+    second.save()
+
+    assert RuntimeHistory(path).expected_wall_time("psi4", prog_input) == 15.0
+    # The second process also picked up the first one's sample
+    assert second.expected_wall_time("psi4", prog_input) == 15.0
+    assert not list(tmp_path.glob(".history.json.*"))  # No temporary files left
+
+
+def test_race_statistics_merge_wins_on_save(prog_input, tmp_path):
+    path = tmp_path / "races.json"
+    first, second = RaceStatistics(path), RaceStatistics(path)
+    key = first.key(["psi4", "terachem"], prog_input)
+    first.record(key, "psi4")
+    second.record(key, "psi4")
+    second.record(key, "terachem")
+
+    first.save()
+    second.save()
+    first.save()  # Nothing new to write
+
+    assert RaceStatistics(path).wins(key) == {"psi4": 2, "terachem": 1}
+
+
+def test_json_store_subclass_must_define_merge(tmp_path):
+    class NoMerge(_JsonStore):
+        pass
+
+    with pytest.raises(TypeError, match="_merge"):
+        NoMerge(tmp_path / "store.json")  # type: ignore[abstract]
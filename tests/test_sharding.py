@@ -0,0 +1,85 @@
+from time import time
+
+from chemcloud.sharding import ShardedClient, ShardTarget, smooth_weighted
+from tests.conftest import _jwt_from_payload
+
+
+def test_smooth_weighted_interleaves_in_proportion():
+    credit = [0.0, 0.0]
+    assigned = smooth_weighted(9, [2.0, 1.0], credit)
+    assert assigned == [0, 1, 0] * 3
+    assert credit == [0.0, 0.0]
+    assert smooth_weighted(3, [1.0, 1.0, 1.0], [0.0] * 3) == [0, 1, 2]
+
+
+def test_single_input_submissions_rotate_across_targets():
+    credit = [0.0, 0.0, 0.0]
+    assigned = [
+        i for _ in range(8) for i in smooth_weighted(1, [1.0, 1.0, 2.0], credit)
+    ]
+    assert assigned.count(0) == assigned.count(1) == 2
+    assert assigned.count(2) == 4
+
+
+def _sharded_client(settings, targets, **kwargs):
+    client = ShardedClient(targets, settings=settings, **kwargs)
+    for profile, shard in client._shards.items():
+        shard._http_client._access_token = _jwt_from_payload(
+            {"exp": int(time()) + 3600, "profile": profile}
+        )
+    return client
+
+
+def test_sharded_compute_splits_batch_by_weight(settings, prog_input, echo_server):
+    client = _sharded_client(
+        settings, [("alice", "queue-a", 2.0), ShardTarget("bob", "queue-b", 1.0)]
+    )
+    inputs = [
+        prog_input.model_copy(update={"keywords": {"index": i}}) for i in range(6)
+    ]
+
+    outputs = client.compute("psi4", inputs)
+
+    assert [o.input_data.keywords["index"] for o in outputs] == list(range(6))
+    queues = [r.url.params.get("queue") for r in echo_server.requests.values()]
+    assert sorted(queues) == ["queue-a"] * 4 + ["queue-b"] * 2
+    tokens = {}
+    for task_id, request in echo_server.requests.items():
+        tokens[task_id] = request.headers["Authorization"]
+        # Each task is polled with the token of the profile that submitted it
+        assert (
+            echo_server.polls[task_id][-1].headers["Authorization"] == tokens[task_id]
+        )
+    assert len(set(tokens.values())) == 2
+    assert sum(client.load().values()) == 0
+    client.close()
+
+
+def test_least_loaded_routing_prefers_idle_targets(settings, prog_input, echo_server):
+    client = _sharded_client(
+        settings,
+        [("alice", "busy"), ("alice", "idle")],
+        routing="least_loaded",
+    )
+    client._outstanding = [5, 0]
+
+    future = client.compute("psi4", [prog_input] * 3, return_future=True)
+
+    queues = [r.url.params.get("queue") for r in echo_server.requests.values()]
+    assert queues == ["idle"] * 3
+    assert len(client._shards) == 1  # Targets sharing a profile share a client
+    assert client.load()[ShardTarget("alice", "idle")] == 3
+    future.get()
+    assert client.load()[ShardTarget("alice", "idle")] == 0
+    client.close()
+
+
+def test_weighted_routing_spreads_single_input_calls(settings, prog_input, echo_server):
+    client = _sharded_client(settings, [("alice", "queue-a"), ("bob", "queue-b")])
+
+    for _ in range(4):
+        client.compute("psi4", prog_input)
+
+    queues = [r.url.params.get("queue") for r in echo_server.requests.values()]
+    assert queues == ["queue-a", "queue-b"] * 2
+    client.close()
@@ -0,0 +1,60 @@
+import pytest
+from qcdata import ProgramOutput
+
+from chemcloud import CCClient
+from chemcloud.sweep import Sweep, SweepResult, apply_point
+
+
+def test_apply_point(prog_input):
+    inp = apply_point(prog_input, method="hf", keywords={"maxiter": 200})
+    assert inp.model.method == "hf"
+    assert inp.model.basis == prog_input.model.basis
+    assert inp.keywords == {**prog_input.keywords, "maxiter": 200}
+    with pytest.raises(ValueError):
+        apply_point(prog_input, temperature=300)
+
+
+def test_sweep_expands_lazily(prog_input):
+    built = []
+
+    def build(template, **point):
+        built.append(point)
+        return apply_point(template, **point)
+
+    sweep = Sweep(prog_input, {"method": ["hf", "b3lyp"], "basis": ["sto-3g"]}, build)
+    points = sweep.points()
+
+    assert sweep.shape == (2, 1) and len(sweep) == 2
+    assert built == []
+    index, inp = next(points)
+    assert index == (0, 0) and inp.model.method == "hf"
+    assert len(built) == 1
+
+
+def test_sweep_returns_labeled_grid(settings, jwt, prog_input, water, echo_server):
+    client = CCClient(settings=settings)
+    client._http_client._access_token = jwt
+    water_copy = water.model_copy()
+
+    result = client.sweep(
+        "psi4",
+        prog_input,
+        {
+            "structure": {"water": water, "same water": water_copy},
+            "method": ["hf", "b3lyp", "pbe"],
+        },
+        window=2,
+        initial_interval=0.01,
+    )
+
+    assert result.shape == (2, 3)
+    assert len(echo_server.inputs) == 3  # Identical structures are only computed once
+    output = result.sel(structure="same water", method="b3lyp")
+    assert isinstance(output, ProgramOutput)
+    assert output.input_data.model.method == "b3lyp"
+    assert result[1, 1] == output
+    by_method = result.sel(method="pbe")
+    assert isinstance(by_method, SweepResult)
+    assert by_method.dims == ["structure"] and by_method.shape == (2,)
+    with pytest.raises(KeyError):
+        result.sel(basis="sto-3g")
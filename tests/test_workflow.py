@@ -0,0 +1,175 @@
+import json
+import re
+
+import httpx
+import pytest
+from qcdata import ProgramOutput, Provenance, SinglePointData
+
+from chemcloud import CCClient
+from chemcloud.workflow import Workflow, seed_wavefunction, split_into_chains
+
+
+@pytest.fixture
+def workflow_server(httpx_mock, prog_input):
+    """Server that echoes inputs; tasks whose keywords contain "slow" need 5 polls."""
+    submitted: dict[str, dict] = {}
+    polls: dict[str, int] = {}
+    events: list[str] = []
+
+    def compute_endpoint(request):
+        task_id = f"task_{len(submitted)}"
+        submitted[task_id] = json.loads(request.content)
+        events.append(f"submit {submitted[task_id]['keywords']['label']}")
+        return httpx.Response(200, json=task_id)
+
+    def output_endpoint(request):
+        task_id = request.url.path.rsplit("/", 1)[-1]
+        if request.method == "DELETE":
+            return httpx.Response(204)
+        polls[task_id] = polls.get(task_id, 0) + 1
+        inp = submitted[task_id]
+        if inp["keywords"].get("slow") and polls[task_id] < 5:
+            return httpx.Response(200, json={"status": "STARTED"})
+        events.append(f"done {inp['keywords']['label']}")
+        output = {
+            "input_data": inp,
+            "success": True,
+            "data": {
+                "energy": -76.0,
+                "files": {"scr.geom/c0": inp["keywords"]["label"]},
+            },
+            "provenance": {"program": "psi4"},
+        }
+        return httpx.Response(200, json={"status": "SUCCESS", "program_output": output})
+
+    httpx_mock.add_response(
+        url=re.compile(r".*/openapi\.json$"),
+        json={"components": {"schemas": {"SupportedPrograms": {"enum": ["psi4"]}}}},
+        is_reusable=True,
+    )
+    httpx_mock.add_callback(
+        compute_endpoint,
+        method="POST",
+        url=re.compile(r".*/compute\?.*"),
+        is_reusable=True,
+        is_optional=True,
+    )
+    httpx_mock.add_callback(
+        output_endpoint,
+        url=re.compile(r".*/compute/output/.*"),
+        is_reusable=True,
+        is_optional=True,
+    )
+    return submitted, events
+
+
+def _single_point(output):
+    label = output.input_data.keywords["label"].replace("opt", "sp")
+    return output.input_data.model_copy(update={"keywords": {"label": label}})
+
+
+def _workflow():
+    return Workflow().stage("opt", "psi4").stage("sp", "psi4", build=_single_point)
+
+
+def test_workflow_flows_per_molecule(settings, jwt, prog_input, workflow_server):
+    submitted, events = workflow_server
+    inputs = [
+        prog_input.model_copy(update={"keywords": {"label": "opt-0"}}),
+        prog_input.model_copy(update={"keywords": {"label": "opt-1", "slow": True}}),
+    ]
+    client = CCClient(settings=settings)
+    client._http_client._access_token = jwt
+    progress = []
+
+    results = client.run_workflow(
+        _workflow(),
+        inputs,
+        initial_interval=0.01,
+        on_progress=lambda p: progress.append(p["sp"].completed),
+    )
+
+    assert [sorted(result) for result in results] == [["opt", "sp"], ["opt", "sp"]]
+    assert results[1]["sp"].input_data.keywords["label"] == "sp-1"
+    # The single point of molecule 0 ran before the slow optimization finished.
+    assert events.index("submit sp-0") < events.index("done opt-1")
+    assert progress[-1] == 2
+
+
+def test_workflow_resumes_from_checkpoints(
+    settings, jwt, prog_input, workflow_server, tmp_path
+):
+    submitted, events = workflow_server
+    inputs = [prog_input.model_copy(update={"keywords": {"label": "opt-0"}})]
+    client = CCClient(settings=settings)
+    client._http_client._access_token = jwt
+
+    first = client.run_workflow(
+        _workflow(), inputs, checkpoint_dir=tmp_path, initial_interval=0.01
+    )
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["opt-0.json", "sp-0.json"]
+    n_submitted = len(submitted)
+
+    second = client.run_workflow(
+        _workflow(), inputs, checkpoint_dir=tmp_path, initial_interval=0.01
+    )
+
+    assert len(submitted) == n_submitted
+    assert second[0]["sp"] == first[0]["sp"]
+
+
+def test_workflow_stage_validation():
+    workflow = Workflow().stage("opt", "psi4")
+    with pytest.raises(ValueError):
+        workflow.stage("opt", "psi4", build=_single_point)
+    with pytest.raises(ValueError):
+        workflow.stage("sp", "psi4", build=_single_point, after="missing")
+    with pytest.raises(ValueError):
+        workflow.stage("root", "psi4", after="opt")
+
+
+def test_compute_chains_seeds_each_input_with_previous_wavefunction(
+    settings, jwt, prog_input, workflow_server
+):
+    submitted, events = workflow_server
+    chains = [
+        [
+            prog_input.model_copy(update={"keywords": {"label": f"{c}-{i}"}})
+            for i in range(3)
+        ]
+        for c in "ab"
+    ]
+    client = CCClient(settings=settings)
+    client._http_client._access_token = jwt
+
+    outputs = client.compute_chains("psi4", chains, initial_interval=0.01)
+
+    assert [[o.input_data.keywords["label"] for o in chain] for chain in outputs] == [
+        ["a-0", "a-1", "a-2"],
+        ["b-0", "b-1", "b-2"],
+    ]
+    by_label = {inp["keywords"]["label"]: inp for inp in submitted.values()}
+    assert "files" not in by_label["a-0"]
+    assert by_label["a-1"]["files"] == {"c0": "a-0"}
+    assert by_label["a-1"]["keywords"]["guess"] == "c0"
+    assert by_label["b-2"]["files"] == {"c0": "b-1"}
+    # Chains run in parallel: both chains start before either finishes its first task
+    assert events[:2] == ["submit a-0", "submit b-0"]
+
+
+def test_seed_wavefunction_skips_failed_outputs(prog_input):
+    failed = ProgramOutput(
+        input_data=prog_input,
+        success=False,
+        data=SinglePointData(files={"c0": "partial"}),
+        traceback="SCF did not converge",
+        provenance=Provenance(program="psi4"),
+    )
+    assert seed_wavefunction(prog_input, failed) is prog_input
+
+
+def test_split_into_chains():
+    assert split_into_chains(list(range(7)), 3) == [[0, 1, 2], [3, 4], [5, 6]]
+    assert split_into_chains([0, 1], 4) == [[0], [1]]
+    with pytest.raises(ValueError):
+        split_into_chains([0], 0)